@@ -7,7 +7,13 @@ Version 1.0 (Python)
 """
 from LibraryAssetModule import LibraryAsset
 from ExceptionsModule import InvalidTransaction
-from datetime import date, timedelta
+from MetricsRegistryModule import MetricsRegistry
+from LibraryClockModule import LibraryClock
+from HoldQueueModule import HoldQueue
+from datetime import timedelta
+import heapq
+import sys
+import threading
 
 class Book:
     """
@@ -19,10 +25,42 @@ class Book:
         _bookAuthorsList : []   -- list of authors of the book. The list contains strings
         _libAssetList    : []   -- the list of actual library assets (physical books or 
                                            digital copies) for this book. 
+        _libAssetIndex   : dict -- index of the library assets of this book by library ID
+        _availableAssets : []   -- free list of the assets that are currently available
+        _availablePos    : dict -- position of each available asset in the free list by library ID
+        _loanedHeap      : []   -- min-heap of (due date, library ID) entries for the loaned assets.
+                                   Entries of assets that were returned are discarded lazily
+        _loanedDueDates  : dict -- the due date of each loaned asset by library ID, used to tell
+                                   current heap entries from outdated ones
+        _statusCounts    : list -- the number of assets of this book in each status, indexed by status,
+                                   including the assets that are not loaded
+        _assetSource     : SnapshotAssetSource -- the store the assets of the book are loaded from when they
+                                   are used or None when all the assets are always in memory
+        _loadedAssetCount : int -- the number of assets loaded from the asset source, which are loaded in order
+        _assetsChanged   : bool -- True once an asset of the book changed or was added after the book was
+                                   created, so the asset source no longer has the current state of the assets
+        _holdQueue       : HoldQueue -- the patrons waiting for a copy of the book
+        _holdShelf       : dict -- the patron each copy set aside for a holder is kept for, by library ID
+        _heldCopies      : dict -- the library ID of the copy set aside for each holder, by patron ID
+        _library         : Library -- the library the book was added to or None if the book
+                                      is not part of a library yet
+        _lock            : RLock -- serializes the operations on the assets of this book so that two desks
+                                    cannot loan the same asset. Derived classes hold it while they call the
+                                    base implementation and calculate the late fees
 
     Version 1.0 (Python)
     """
 
+    """constant representing the default number of days a book can be borrowed"""
+    DEFAULT_BORROW_DAYS = 14
+
+    """constant for the number of assets loaded at once from the asset source"""
+    ASSET_PAGE_SIZE = 256
+
+    #the field variables are declared as slots so books do not carry a per-instance dictionary
+    __slots__ = ("_bookName", "_bookISBN", "_bookAuthorsList", "_libAssetList", "_libAssetIndex",
+                 "_availableAssets", "_availablePos", "_loanedHeap", "_loanedDueDates", "_statusCounts", "_assetSource", "_loadedAssetCount", "_assetsChanged", "_holdQueue", "_holdShelf", "_heldCopies", "_library", "_lock")
+
     def __init__(self, bookName, bookISBN):
         """
         Initialize the book object with its attributes.
@@ -38,6 +76,20 @@ class Book:
         self._bookISBN = bookISBN
         self._bookAuthorsList =[]
         self._libAssetList = []
+        self._libAssetIndex = {}
+        self._availableAssets = []
+        self._availablePos = {}
+        self._loanedHeap = []
+        self._loanedDueDates = {}
+        self._statusCounts = [0] * LibraryAsset.STATUS_COUNT
+        self._assetSource = None
+        self._loadedAssetCount = 0
+        self._assetsChanged = False
+        self._holdQueue = HoldQueue()
+        self._holdShelf = {}
+        self._heldCopies = {}
+        self._library = None
+        self._lock = threading.RLock()
     
     def getName(self):
         """Returns the name of the book"""
@@ -48,13 +100,358 @@ class Book:
         return self._bookISBN
 
     def getAuthors(self):
-        """Returns the authors of the book"""
-        return self._bookAuthorsList
+        """
+        Returns the authors of the book. The authors are returned as a tuple because they can only be changed
+        through addAuthor, removeAuthor and setAuthors, which keep the author index of the library up to date
+        """
+        return tuple(self._bookAuthorsList)
+
+    def addAuthor(self, author):
+        """
+        Adds an author to the list of authors of the book. Author names are interned so that the books
+        of the same author share a single copy of the name
+        Arguments:
+            author  : str -- the name of the author
+        """
+        with self.getAuthorsLock():
+            previousAuthors = tuple(self._bookAuthorsList)
+            self._bookAuthorsList.append(sys.intern(author))
+            self.onAuthorsChanged(previousAuthors)
+
+    def removeAuthor(self, author):
+        """
+        Removes an author from the list of authors of the book
+        Arguments:
+            author  : str -- the name of the author
+        """
+        with self.getAuthorsLock():
+            if author not in self._bookAuthorsList:
+                raise InvalidTransaction(f"{author} is not an author of the book {self.getName()}")
+
+            previousAuthors = tuple(self._bookAuthorsList)
+            self._bookAuthorsList.remove(author)
+            self.onAuthorsChanged(previousAuthors)
+
+    def setAuthors(self, authors):
+        """
+        Replaces the list of authors of the book
+        Arguments:
+            authors  : list -- the names of the authors
+        """
+        with self.getAuthorsLock():
+            previousAuthors = tuple(self._bookAuthorsList)
+            self._bookAuthorsList = [sys.intern(author) for author in authors]
+            self.onAuthorsChanged(previousAuthors)
+
+    def getAuthorsLock(self):
+        """
+        Returns the lock held while the authors are changed. Once the book is part of a library it is the lock of
+        the library, which protects the author index and is always taken before the lock of a book
+        """
+        return self._lock if self._library == None else self._library.getLock()
+
+    def onAuthorsChanged(self, previousAuthors):
+        """
+        Lets the library the book belongs to update its indexes after the authors of the book were changed.
+        Books that are not part of a library yet have nothing to update
+        Arguments:
+            previousAuthors  : tuple -- the authors of the book before the change
+        """
+        if self._library != None:
+            self._library.onAuthorsChanged(self, previousAuthors)
+
+    def getMaxBorrowDays(self):
+        """Returns the maximum number of days the book can be borrowed for. The default loan is two weeks"""
+        return Book.DEFAULT_BORROW_DAYS
+
+    def getLatePenaltyPerDay(self):
+        """Returns the late penalty per day for this book. The base class does not charge late penalties"""
+        return 0.0
 
     def getAssets(self):
-        """Returns the library assets for this book (the actual copies that are part of library inventory)"""
+        """
+        Returns the library assets for this book (the actual copies that are part of library inventory). The
+        assets that are not loaded yet are loaded first
+        """
+        if self._loadedAssetCount < self.getSourceAssetCount():
+            self.loadAssets()
+        return self._libAssetList
+
+    def getLoadedAssets(self):
+        """Returns the library assets for this book that are in memory, without loading the others"""
         return self._libAssetList
 
+    def isAssetLoaded(self, libID):
+        """Returns True if the library asset with the given ID is in memory"""
+        return libID in self._libAssetIndex
+
+    def getAssetCount(self):
+        """Returns the number of library assets for this book without loading them"""
+        return len(self._libAssetList) + self.getSourceAssetCount() - self._loadedAssetCount
+
+    def getSourceAssetCount(self):
+        """Returns the number of assets of the asset source, 0 for a book without asset source"""
+        return 0 if self._assetSource == None else self._assetSource.getAssetCount()
+
+    def setAssetSource(self, assetSource):
+        """
+        Sets the store the assets of this book are loaded from when they are used. The book must not have
+        assets yet. The status counters are set from the asset source so they are correct before any asset is loaded
+        Arguments:
+            assetSource  : SnapshotAssetSource -- the store of the assets of the book
+        """
+        with self._lock:
+            self._assetSource = assetSource
+            self._loadedAssetCount = 0
+            self._statusCounts = assetSource.countAssetStatuses()
+
+    def moveAssetSource(self, assetSource):
+        """
+        Replaces the asset source of this book by one holding the same assets in the same order, such as the
+        assets of the book in a new snapshot. The loaded assets and the status counters are kept
+        Arguments:
+            assetSource  : SnapshotAssetSource -- the new store of the assets of the book
+        """
+        with self._lock:
+            self._assetSource = assetSource
+
+    def loadAssetPage(self):
+        """
+        Loads the next page of assets from the asset source. The loaded assets are added to the free list and to the
+        heap of loaned assets like the assets of a book that is entirely in memory
+        Returns:
+            False if all the assets were already loaded
+        """
+        with self._lock:
+            if self._loadedAssetCount >= self.getSourceAssetCount():
+                return False
+
+            libAssets = self._assetSource.loadAssets(self, self._loadedAssetCount, Book.ASSET_PAGE_SIZE)
+            for libraryAsset in libAssets:
+                self._libAssetList.append(libraryAsset)
+                self._libAssetIndex[libraryAsset.getLibID()] = libraryAsset
+                self.trackAsset(libraryAsset)
+            self._loadedAssetCount += len(libAssets)
+            self.releaseStrandedCopies(libAssets)
+
+            if self._library != None:
+                self._library.onAssetsLoaded(self, libAssets)
+            return True
+
+    def loadAssets(self, assetCount = None):
+        """
+        Loads the assets from the asset source until the given number of assets is loaded
+        Arguments:
+            assetCount  : int -- the number of assets that must be loaded, None for all the assets
+        """
+        with self._lock:
+            while assetCount == None or self._loadedAssetCount < assetCount:
+                if not self.loadAssetPage():
+                    return
+
+    def unloadAssets(self):
+        """
+        Drops the assets loaded from the asset source so they can be reclaimed, keeping the status counters. Assets
+        that changed are not in the asset source so the assets are only dropped if none of them changed
+        Returns:
+            the list of the assets that were dropped, empty if they could not be dropped
+        """
+        with self._lock:
+            if self._assetSource == None or self._assetsChanged or len(self._holdShelf) > 0:
+                return []
+
+            libAssets = self._libAssetList
+            self._libAssetList = []
+            self._libAssetIndex = {}
+            self._availableAssets = []
+            self._availablePos = {}
+            self._loanedHeap = []
+            self._loanedDueDates = {}
+            self._loadedAssetCount = 0
+            return libAssets
+
+    def readAssetStates(self):
+        """
+        Returns the state of all the assets of this book as plain values, for batch jobs that go through the state
+        of many books. The assets that are not loaded are read from the asset source without being loaded
+        Returns:
+            the list of (library ID, status, borrowed on, returned on, due date) with the dates as date ordinals,
+            0 when there is no date
+        """
+        with self._lock:
+            assetStates = [(libAsset.getLibID(), libAsset.getStatus(),
+                            0 if libAsset.getBorrowedOn() == None else libAsset.getBorrowedOn().toordinal(),
+                            0 if libAsset.getReturnedOn() == None else libAsset.getReturnedOn().toordinal(),
+                            0 if libAsset.getDueDate() == None else libAsset.getDueDate().toordinal())
+                           for libAsset in self._libAssetList]
+
+            #the loaded assets are the first ones of the asset source
+            if self._loadedAssetCount < self.getSourceAssetCount():
+                assetStates.extend(self._assetSource.readAssetStates(self._loadedAssetCount))
+            return assetStates
+
+    def readSourceAssetStates(self, position):
+        """
+        Reads the state of the assets of the asset source starting at the given position, without loading them and
+        without locking the book
+        Returns:
+            an iterable of (library ID, status, borrowed on, returned on, due date) with the dates as date ordinals,
+            0 when there is no date. Empty for a book without asset source
+        """
+        if position >= self.getSourceAssetCount():
+            return ()
+        return self._assetSource.readAssetStates(position)
+
+    def hasUnchangedAssets(self):
+        """Returns True if the book loads its assets from an asset source that has their current state"""
+        return self._assetSource != None and not self._assetsChanged
+
+    def addAsset(self, libraryAsset):
+        """
+        Adds a library asset (a copy of this book) to the library inventory for this book. If the book is
+        already part of a library the library is informed about the new asset so it can be found by its ID
+        Arguments:
+            libraryAsset  : LibraryAsset -- the asset to add to this book
+        """
+        with self._lock:
+            #the new asset goes after the assets of the asset source
+            self.loadAssets()
+            self._libAssetList.append(libraryAsset)
+            self._libAssetIndex[libraryAsset.getLibID()] = libraryAsset
+
+            #the asset could already be available or loaned when it is added
+            self.onAssetChanged(libraryAsset, None)
+
+            #a new copy goes to the patrons waiting for the book
+            if libraryAsset.isAvailable() and self._holdQueue.getLength() > 0:
+                self.setAsideCopy(libraryAsset, self._holdQueue.popNextHolder())
+
+            if self._library != None:
+                self._library.onAssetAdded(libraryAsset)
+
+    def onAssetChanging(self, libraryAsset):
+        """
+        Lets the library save the state of an asset for its read snapshots before the asset changes. Called by the
+        library asset before any of its fields change
+        Arguments:
+            libraryAsset  : LibraryAsset -- the asset that is about to change
+        """
+        if self._library != None:
+            self._library.onAssetChanging(libraryAsset)
+
+    def onAssetChanged(self, libraryAsset, previousStatus):
+        """
+        Keeps the status counters, the free list of available assets and the heap of loaned assets up to date.
+        Called by the library asset every time its status or due date changes
+        Arguments:
+            libraryAsset    : LibraryAsset -- the asset that changed
+            previousStatus  : int          -- the status of the asset before the change, None for an asset
+                                              that was just added to the book
+        """
+        libID = libraryAsset.getLibID()
+
+        #assets that were not added to this book yet are picked up by addAsset
+        if self._libAssetIndex.get(libID) is not libraryAsset:
+            return
+
+        #update the status counters of the book
+        status = libraryAsset.getStatus()
+        if status != previousStatus:
+            if previousStatus != None:
+                self._statusCounts[previousStatus] -= 1
+            self._statusCounts[status] += 1
+        self._assetsChanged = True
+
+        #the library keeps the same counters and the due date index of all its assets
+        (previousDueDate, dueDate) = self.trackAsset(libraryAsset)
+        if self._library != None and (status != previousStatus or dueDate != previousDueDate):
+            self._library.onAssetChanged(libID, previousStatus, status, previousDueDate, dueDate)
+
+    def trackAsset(self, libraryAsset):
+        """
+        Updates the free list of available assets and the heap of loaned assets with the current state of an asset
+        Arguments:
+            libraryAsset  : LibraryAsset -- the asset that changed or was loaded
+        Returns:
+            (previous due date, due date) of the asset in the heap, None when the asset is not on loan
+        """
+        libID = libraryAsset.getLibID()
+        status = libraryAsset.getStatus()
+
+        #update the free list, removing an asset by moving the last one in its place
+        if status == LibraryAsset.AVAILABLE:
+            if libID not in self._availablePos:
+                self._availablePos[libID] = len(self._availableAssets)
+                self._availableAssets.append(libraryAsset)
+        elif libID in self._availablePos:
+            position = self._availablePos.pop(libID)
+            lastAsset = self._availableAssets.pop()
+            if lastAsset is not libraryAsset:
+                self._availableAssets[position] = lastAsset
+                self._availablePos[lastAsset.getLibID()] = position
+
+        #update the heap of loaned assets. Outdated entries stay in the heap until they reach the top
+        previousDueDate = self._loanedDueDates.get(libID)
+        dueDate = libraryAsset.getDueDate() if status == LibraryAsset.LOANED else None
+        if dueDate != previousDueDate:
+            if dueDate != None:
+                self._loanedDueDates[libID] = dueDate
+                heapq.heappush(self._loanedHeap, (dueDate, libID))
+
+                #rebuild the heap when it holds mostly outdated entries so it does not grow without bounds
+                if len(self._loanedHeap) > 2 * len(self._loanedDueDates) + 16:
+                    self._loanedHeap = [(due, loanedID) for (loanedID, due) in self._loanedDueDates.items()]
+                    heapq.heapify(self._loanedHeap)
+            else:
+                del self._loanedDueDates[libID]
+
+        return (previousDueDate, dueDate)
+
+    def getLock(self):
+        """Returns the lock that serializes the operations on the assets of this book"""
+        return self._lock
+
+    def getClock(self):
+        """Returns the clock that gives the current date to the book: the clock of its library or the system clock"""
+        return LibraryClock.getSystemClock() if self._library == None else self._library.getClock()
+
+    def getLibrary(self):
+        """Returns the library the book is part of or None if the book was not added to a library"""
+        return self._library
+
+    def setLibrary(self, library):
+        """Sets the library the book is part of"""
+        self._library = library
+
+    def getAvailableCount(self):
+        """Returns the number of assets of this book that are available right away"""
+        return self._statusCounts[LibraryAsset.AVAILABLE]
+
+    def getLoanedDueDates(self):
+        """Returns the (library ID, due date) pairs of the loaded assets of this book that are on loan"""
+        return list(self._loanedDueDates.items())
+
+    def getStatusCounts(self):
+        """Returns a copy of the number of assets of this book in each status, indexed by status"""
+        return list(self._statusCounts)
+
+    def getStatusCount(self, status):
+        """Returns the number of assets of this book in the given status"""
+        return self._statusCounts[status]
+
+    def countAssetStatuses(self):
+        """
+        Counts the assets of this book in each status by going through all of them. Used to verify the status
+        counters, which are kept up to date without going through the assets
+        Returns:
+            the list of the number of assets in each status, indexed by status
+        """
+        with self._lock:
+            statusCounts = [0] * LibraryAsset.STATUS_COUNT
+            for libAsset in self.getAssets():
+                statusCounts[libAsset.getStatus()] += 1
+            return statusCounts
+
     def checkAvailability(self):
         """
         Checks the availability of the book by checking if there are any library assets for this book that are available
@@ -64,65 +461,105 @@ class Book:
             (false, LibraryAsset)   - all assets for this book are either loaned or reserved. 
                                       The first asset to be available is at the provided to be reserved by the user
         """
-        #find the next available asset. It could be available right away. If no asset is available right away
-        #the earliest one is obtained
-        nextAvailAsset = self.findNextAvailableAsset()
+        with self._lock:
+            #the status counter tells right away if an asset is available. If no asset is available right away
+            #the earliest one is obtained
+            if self._statusCounts[LibraryAsset.AVAILABLE] > 0:
+                return (True, None)
+
+            nextAvailAsset = self.findNextAvailableAsset()
+            return (False, None if nextAvailAsset == None else nextAvailAsset.getDueDate())
 
-        if nextAvailAsset.getStatus() == LibraryAsset.AVAILABLE:
-            return (True, None)
-        else:      
-            return (False, nextAvailAsset.getDueDate())
+    def getAsset(self, libID):
+        """Returns the library asset with the given ID, loading it from the asset source if needed, or None if the book has no such asset"""
+        asset = self._libAssetIndex.get(libID)
+        if asset == None and self._loadedAssetCount < self.getSourceAssetCount():
+            #the assets are loaded in order up to the page of the asset
+            position = self._assetSource.findAssetPosition(libID)
+            if position >= 0:
+                self.loadAssets(position + 1)
+                asset = self._libAssetIndex.get(libID)
+        return asset
 
     def findLibraryAsset(self, libID):
         """Finds the library asset with the given ID. If no asset is found the method throws an exception"""
-        for asset in self._libAssetList:
-            #check if the asset ID matches the given iD
-            if asset.getLibID() == libID:
-                #the asset with the given lib ID was found
-                return asset
+        asset = self.getAsset(libID)
+        if asset != None:
+            #the asset with the given lib ID was found
+            return asset
         
         #if the code got to this point no asset was found which should not happen
         raise InvalidTransaction(f"An asset with ID = {libID} was not found for book {self.getName()}")
     
     def findNextAvailableAsset(self):
-        """Finds the next available asset for this book"""
-        nextAvailAsset = None
-        for asset in self._libAssetList:
-            #check if the asset is available
-            if asset.getStatus() == LibraryAsset.AVAILABLE:
-                #an asset is available right away
-                return asset
-
-            #check if the current asset has an earlier due date than the previously found one
-            if nextAvailAsset == None or (nextAvailAsset.getDueDate() > asset.getDueDate() and 
-                nextAvailAsset.getStatus() != LibraryAsset.RESERVED):
-                nextAvailAsset = asset
-        
-        return nextAvailAsset
-    
-    def borrowBook(self):
+        """
+        Finds the next available asset for this book. An available asset is returned right away, otherwise
+        the loaned asset with the earliest due date is returned. Reserved assets are skipped. If no asset is
+        available or loaned the first asset of the book is returned
+        """
+        #outdated heap entries are discarded so the heap is modified even by this lookup
+        with self._lock:
+            #the pages of assets that are not loaded yet are loaded until an available asset is found. The loaned
+            #asset with the earliest due date could be in any page
+            while len(self._availableAssets) == 0 and self._statusCounts[LibraryAsset.AVAILABLE] > 0:
+                if not self.loadAssetPage():
+                    break
+            if len(self._availableAssets) == 0:
+                self.loadAssets()
+
+            #check if an asset is available right away
+            if len(self._availableAssets) > 0:
+                return self._availableAssets[-1]
+
+            #find the loaned asset with the earliest due date, discarding the outdated heap entries
+            while len(self._loanedHeap) > 0:
+                (dueDate, libID) = self._loanedHeap[0]
+                if self._loanedDueDates.get(libID) == dueDate:
+                    return self._libAssetIndex[libID]
+                heapq.heappop(self._loanedHeap)
+
+            #all assets are reserved or not available
+            if len(self._libAssetList) > 0:
+                return self._libAssetList[0]
+
+            return None
+
+    @MetricsRegistry.instrument("book_borrow")
+    def borrowBook(self, patronID = None):
         """
         Attempts to find an available asset and loans it to the user. If no book asset is available the method will
-        throw an exception
+        throw an exception. A patron whose hold is ready borrows the copy set aside for them
+        Arguments:
+            patronID  - the ID of the patron borrowing the book, optional
         Returns:
             library asset that is loaned to the library users. The ID of the asset needs to be used to return the asset
         """
-        #find the next available asset. 
-        libraryAsset = self.findNextAvailableAsset()
+        #finding the available asset and loaning it is a single step for other desks
+        with self._lock:
+            heldLibID = self._heldCopies.pop(patronID, None) if patronID != None else None
+            if heldLibID != None:
+                #the copy on the hold shelf is picked up by the patron it was kept for
+                del self._holdShelf[heldLibID]
+                libraryAsset = self.findLibraryAsset(heldLibID)
+            else:
+                #find the next available asset. 
+                libraryAsset = self.findNextAvailableAsset()
 
-        #check to make sure the book is available
-        if libraryAsset.getStatus() != LibraryAsset.AVAILABLE:
-            raise InvalidTransaction("The requested book is not available. You can check for availability first and reserve it.")
-        
-        #mark the asset as loaned
-        libraryAsset.setBorrowedOn(date.today())
-        libraryAsset.setStatus(LibraryAsset.LOANED)
+                #check to make sure the book is available. A book without copies is never available
+                if libraryAsset == None or libraryAsset.getStatus() != LibraryAsset.AVAILABLE:
+                    raise InvalidTransaction("The requested book is not available. You can check for availability first and reserve it.")
 
-        #set a default due date. This can be customized by derived classes
-        libraryAsset.setDueDate(date.today() + timedelta(weeks = 2))
+            #set the due date according to the maximum loan duration, which is customized by derived classes, before
+            #marking the asset as loaned so the library indexes the loan with its due date in a single update
+            today = self.getClock().today()
+            libraryAsset.setBorrowedOn(today)
+            libraryAsset.setReturnedOn(None)
+            libraryAsset.setDueDate(today + timedelta(days = self.getMaxBorrowDays()))
+            libraryAsset.setStatus(LibraryAsset.LOANED)
 
-        return libraryAsset
+            return libraryAsset
 
+    @MetricsRegistry.instrument("book_return")
     def returnBook(self, libID):
         """
         Returns a borrowed asset back to the library using the ID of the library asset. If the ID does not match an existing asset
@@ -135,29 +572,180 @@ class Book:
             days late       - the number of days the book was late
             late fees       - the late fees applicable if any
         """
-        #find the library asset being returned. If the ID is incorrect the transaction will be deemed invalid
-        libraryAsset = self.findLibraryAsset(libID)
-        libraryAsset.setReturnedOn(date.today())
-        
-        #obtain the loan data before reseting it to make the book available
-        loanDuration = libraryAsset.getLoanDuration()
-        latePeriod = libraryAsset.getLatePeriod()
+        with self._lock:
+            #find the library asset being returned. If the ID is incorrect the transaction will be deemed invalid
+            libraryAsset = self.findLibraryAsset(libID)
+            libraryAsset.setReturnedOn(self.getClock().today())
+
+            #obtain the loan data before reseting it to make the book available
+            loanDuration = libraryAsset.getLoanDuration()
+            latePeriod = libraryAsset.getLatePeriod()
 
-        #make the asset available
-        libraryAsset.setStatus(LibraryAsset.AVAILABLE)
+            #hand the asset to the next holder, unless it is already set aside for one, or make it available
+            if libID in self._holdShelf:
+                libraryAsset.setStatus(LibraryAsset.RESERVED)
+            elif self._holdQueue.getLength() > 0:
+                self.setAsideCopy(libraryAsset, self._holdQueue.popNextHolder())
+            else:
+                libraryAsset.setStatus(LibraryAsset.AVAILABLE)
 
-        #the base method does not calculate any late penalties. Derived classes must perform the calculation
-        #according to their specific business logic
-        return (loanDuration, latePeriod.days, 0.0)
+            #the base method does not calculate any late penalties. Derived classes must perform the calculation
+            #according to their specific business logic
+            return (loanDuration, latePeriod.days, 0.0)
+
+    @MetricsRegistry.instrument("book_reserve")
+    def reserveBook(self, patronID = None, tier = HoldQueue.STANDARD_TIER):
+        """
+        Places a hold on the book for a patron. An available copy is set aside for the patron right away,
+        otherwise the patron joins the hold queue and gets the first copy returned once the patrons ahead of them
+        are served
+        Arguments:
+            patronID  - the ID of the patron placing the hold. Patrons that do not identify themselves are
+                        given a new ID
+            tier      - the tier of the patron in the hold queue, one of the HoldQueue TIER constants
+        Returns:
+            the copy set aside for the patron or, when the patron has to wait, the copy expected to be returned first
+        """
+        if patronID == None:
+            patronID = HoldQueue.newAnonymousPatronID()
+
+        #finding the earliest asset and reserving it is a single step for other desks
+        with self._lock:
+            if patronID in self._heldCopies or self._holdQueue.contains(patronID):
+                raise InvalidTransaction(f"The patron {patronID} already has a hold on {self.getName()}")
+
+            #the patron would wait forever for a book without copies
+            if self.getAssetCount() == 0:
+                raise InvalidTransaction(f"The book {self.getName()} has no copies that can be reserved")
+
+            if len(self._availableAssets) > 0:
+                libraryAsset = self._availableAssets[-1]
+                self.setAsideCopy(libraryAsset, patronID)
+                return libraryAsset
+
+            self._holdQueue.addHold(patronID, tier)
+
+            #let the caller know which asset is expected first
+            return self.findNextAvailableAsset()
+
+    def setAsideCopy(self, libraryAsset, patronID):
+        """
+        Reserves a copy for a patron and keeps it on the hold shelf until the patron borrows it. Reserving the copy
+        clears the dates of its last loan so the copy is not reported late while it waits on the shelf
+        Arguments:
+            libraryAsset  - the copy to set aside
+            patronID      - the ID of the patron the copy is kept for
+        """
+        self._holdShelf[libraryAsset.getLibID()] = patronID
+        self._heldCopies[patronID] = libraryAsset.getLibID()
+        libraryAsset.setStatus(LibraryAsset.RESERVED)
+
+    def cancelHold(self, patronID):
+        """
+        Cancels the hold of a patron. A copy set aside for the patron goes to the next holder or becomes available
+        Arguments:
+            patronID  - the ID of the patron
+        Returns:
+            the copy that was set aside for the patron or None if the patron was still waiting
+        """
+        with self._lock:
+            if self._holdQueue.contains(patronID):
+                self._holdQueue.removeHold(patronID)
+                return None
+
+            heldLibID = self._heldCopies.pop(patronID, None)
+            if heldLibID == None:
+                raise InvalidTransaction(f"The patron {patronID} has no hold on {self.getName()}")
+
+            del self._holdShelf[heldLibID]
+            libraryAsset = self.findLibraryAsset(heldLibID)
+            if self._holdQueue.getLength() > 0:
+                self.setAsideCopy(libraryAsset, self._holdQueue.popNextHolder())
+            else:
+                libraryAsset.setStatus(LibraryAsset.AVAILABLE)
+            return libraryAsset
+
+    def getHolds(self):
+        """
+        Returns the holds on the book as plain values so they can be saved: the patrons whose copy is set aside
+        followed by the patrons waiting in the order they are served
+        Returns:
+            the list of (patron ID, tier, library ID) with the library ID of the copy set aside for the patron and
+            no tier, or the tier of a waiting patron and no library ID
+        """
+        with self._lock:
+            holds = [(patronID, None, heldLibID) for (patronID, heldLibID) in self._heldCopies.items()]
+            holds.extend((patronID, tier, None) for (patronID, tier) in self._holdQueue.getHolds())
+            return holds
+
+    def restoreHolds(self, holds):
+        """
+        Replaces the holds on the book with holds that were saved, for example when the book is loaded from storage.
+        Reserved copies that are not set aside for any patron are made available
+        Arguments:
+            holds  : list -- the (patron ID, tier, library ID) of the holds as returned by getHolds
+        """
+        with self._lock:
+            self._holdQueue = HoldQueue()
+            self._holdShelf = {}
+            self._heldCopies = {}
+            for (patronID, tier, heldLibID) in holds:
+                if heldLibID != None:
+                    self._holdShelf[heldLibID] = patronID
+                    self._heldCopies[patronID] = heldLibID
+                else:
+                    self._holdQueue.addHold(patronID, tier)
+
+            self.releaseStrandedCopies(self._libAssetList)
+
+    def releaseStrandedCopies(self, libAssets):
+        """
+        Makes the given reserved copies available when they are not on the hold shelf. A copy is only reserved for a
+        patron so a reserved copy without a patron, saved before the holds were, could never be borrowed again
+        Arguments:
+            libAssets  : list -- the assets to check
+        """
+        for libAsset in libAssets:
+            if libAsset.getStatus() == LibraryAsset.RESERVED and libAsset.getLibID() not in self._holdShelf:
+                libAsset.restoreState(LibraryAsset.AVAILABLE, None, None, None)
+
+    def getHoldCount(self):
+        """Returns the number of patrons waiting for a copy, not counting the patrons whose copy is set aside"""
+        return self._holdQueue.getLength()
+
+    def getHoldPosition(self, patronID):
+        """
+        Returns the position of a patron in the hold queue: 0 when a copy is set aside for the patron, 1 when the
+        patron gets the next copy returned and so on
+        """
+        with self._lock:
+            if patronID in self._heldCopies:
+                return 0
+            if not self._holdQueue.contains(patronID):
+                raise InvalidTransaction(f"The patron {patronID} has no hold on {self.getName()}")
+            return self._holdQueue.getPosition(patronID)
+
+    def estimateHoldDate(self, patronID):
+        """
+        Estimates the date a copy will be ready for a patron from the due dates of the copies on loan: the patrons
+        ahead are served by the copies in the order they are due and every copy serves one patron per loan period
+        Returns:
+            the estimated date or None if no copy is on loan, so no copy is expected back
+        """
+        with self._lock:
+            position = self.getHoldPosition(patronID)
+            today = self.getClock().today()
+            if position == 0:
+                return today
 
-    def reserveBook(self):
-        """Finds the earliest available asset that can be borrowed and reserves it"""
-        #find the next available asset. It could be available right away. If no asset is available right away
-        #the earliest one is obtained
-        nextAvailAsset = self.findNextAvailableAsset()
+            #the due dates of all the copies are needed
+            self.loadAssets()
 
-        #mark teh asset as reserved
-        nextAvailAsset.setStatus(LibraryAsset.RESERVED)
+            loanedCount = len(self._loanedDueDates)
+            if loanedCount == 0:
+                return None
 
-        #let the caller know what the reserved asset is
-        return nextAvailAsset
\ No newline at end of file
+            #only the copies on loan are looked at and only the earliest ones are sorted
+            (loanRounds, copyRank) = divmod(position - 1, loanedCount)
+            dueDate = heapq.nsmallest(copyRank + 1, self._loanedDueDates.values())[copyRank]
+            return max(dueDate, today) + timedelta(days = loanRounds * self.getMaxBorrowDays())
@@ -0,0 +1,238 @@
+"""
+Module that defines the BookSearchIndex class, an in-memory search engine over the names and authors
+of the books in a library
+
+Author: Prof. Magdin Stoica
+E-Mail: magdin.stoica@sheridancollege.ca
+Version 1.0 (Python)
+"""
+from bisect import bisect_left
+from collections import Counter
+import heapq
+import re
+import unicodedata
+
+class BookSearchIndex:
+    """
+    Tokenized inverted index of book names and authors. Every word of a name or author is a term and each term
+    has the list of entries it appears in. A query word matches a term that is equal to it, a term it is a
+    prefix of (found with a binary search of the sorted array of terms) or, when it does not begin any term, a term
+    that is spelled alike (found through the index of the character trigrams of the terms). Results are ranked
+    by how well each query word matches and words of the book name rank above words of the authors.
+
+    Entries are identified by keys given by the caller, usually the book itself, so the index can also hold
+    books that are not loaded yet.
+
+    The entries of a term are kept in a set so entries are added and removed in constant time however common the
+    term is. The sorted array of terms is not kept up to date while entries are added and removed: it is marked
+    stale and sorted again by the next search, so adding many entries sorts the terms only once.
+
+    Attributes:
+        _entryIDs      : dict -- the ID of the entry of each key
+        _entryKeys     : list -- the key of each entry ID, None for removed entries
+        _entryTerms    : list -- the (name terms, author terms) frozensets of each entry ID
+        _postings      : dict -- the set of entry IDs each term appears in
+        _sortedTerms   : list -- all the terms in sorted order, used for prefix matching
+        _termsSorted   : bool -- False when terms were added or removed since the terms were last sorted
+        _trigramTerms  : dict -- the set of terms each trigram appears in, used for fuzzy matching
+        _freeEntryIDs  : list -- the IDs of removed entries that can be reused
+
+    Version 1.0 (Python)
+    """
+
+    """constant for the pattern of the characters that make up a term"""
+    TERM_PATTERN = re.compile(r"\w+")
+
+    """constants for the score of a query word depending on how it matches a term"""
+    EXACT_MATCH_SCORE = 1.0
+    PREFIX_MATCH_SCORE = 0.75
+    FUZZY_MATCH_SCORE = 0.5
+
+    """constant for the weight of a match in the book name compared to a match in the authors"""
+    NAME_WEIGHT = 2.0
+
+    """constants limiting how many terms a query word can expand to so broad queries stay fast"""
+    MAX_PREFIX_TERMS = 64
+    MAX_FUZZY_TERMS = 8
+
+    """constant for the minimum trigram similarity of a term spelled alike"""
+    MIN_FUZZY_SIMILARITY = 0.3
+
+    """constant for the default number of results returned by a search"""
+    DEFAULT_RESULT_LIMIT = 10
+
+    def __init__(self):
+        """Initialize an empty index"""
+        self._entryIDs = {}
+        self._entryKeys = []
+        self._entryTerms = []
+        self._postings = {}
+        self._sortedTerms = []
+        self._termsSorted = True
+        self._trigramTerms = {}
+        self._freeEntryIDs = []
+
+    @staticmethod
+    def tokenize(text):
+        """Returns the terms of the given text: its words, not case sensitive and without accents"""
+        decomposed = unicodedata.normalize("NFKD", text.casefold())
+        return BookSearchIndex.TERM_PATTERN.findall("".join(character for character in decomposed
+                                                            if not unicodedata.combining(character)))
+
+    @staticmethod
+    def trigrams(term):
+        """Returns the set of character trigrams of a term. The term is padded so short terms have trigrams too"""
+        padded = f"  {term} "
+        return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+    def getEntryCount(self):
+        """Returns the number of entries in the index"""
+        return len(self._entryIDs)
+
+    def addEntry(self, key, bookName, authors):
+        """
+        Adds an entry to the index, replacing the entry with the same key if there is one
+        Arguments:
+            key       : object -- the key returned by searches that match the entry
+            bookName  : str    -- the name of the book
+            authors   : list   -- the names of the authors of the book
+        """
+        if key in self._entryIDs:
+            self.removeEntry(key)
+
+        nameTerms = frozenset(BookSearchIndex.tokenize(bookName))
+        authorTerms = frozenset(term for author in authors for term in BookSearchIndex.tokenize(author))
+
+        if len(self._freeEntryIDs) > 0:
+            entryID = self._freeEntryIDs.pop()
+            self._entryKeys[entryID] = key
+            self._entryTerms[entryID] = (nameTerms, authorTerms)
+        else:
+            entryID = len(self._entryKeys)
+            self._entryKeys.append(key)
+            self._entryTerms.append((nameTerms, authorTerms))
+        self._entryIDs[key] = entryID
+
+        for term in nameTerms | authorTerms:
+            entryList = self._postings.get(term)
+            if entryList == None:
+                #a new term is added to the trigram index and to the sorted terms by the next search
+                entryList = self._postings[term] = set()
+                self._termsSorted = False
+                for trigram in BookSearchIndex.trigrams(term):
+                    self._trigramTerms.setdefault(trigram, set()).add(term)
+            entryList.add(entryID)
+
+    def removeEntry(self, key):
+        """
+        Removes the entry with the given key from the index, if there is one
+        Arguments:
+            key  : object -- the key of the entry
+        """
+        entryID = self._entryIDs.pop(key, None)
+        if entryID == None:
+            return
+
+        (nameTerms, authorTerms) = self._entryTerms[entryID]
+        for term in nameTerms | authorTerms:
+            entryList = self._postings[term]
+            entryList.discard(entryID)
+            if len(entryList) == 0:
+                #the term is no longer used by any entry
+                del self._postings[term]
+                self._termsSorted = False
+                for trigram in BookSearchIndex.trigrams(term):
+                    trigramTerms = self._trigramTerms[trigram]
+                    trigramTerms.discard(term)
+                    if len(trigramTerms) == 0:
+                        del self._trigramTerms[trigram]
+
+        self._entryKeys[entryID] = None
+        self._entryTerms[entryID] = None
+        self._freeEntryIDs.append(entryID)
+
+    def sortTerms(self):
+        """Sorts the terms again if terms were added or removed since they were last sorted"""
+        if not self._termsSorted:
+            self._sortedTerms = sorted(self._postings)
+            self._termsSorted = True
+
+    def expandWord(self, word):
+        """
+        Finds the terms a query word matches
+        Arguments:
+            word  : str -- a word of the query
+        Returns:
+            dictionary of the score of each matching term
+        """
+        matches = {}
+
+        #the terms the word is a prefix of are contiguous in the sorted terms, starting with the word itself
+        position = bisect_left(self._sortedTerms, word)
+        end = min(position + BookSearchIndex.MAX_PREFIX_TERMS, len(self._sortedTerms))
+        while position < end and self._sortedTerms[position].startswith(word):
+            term = self._sortedTerms[position]
+            matches[term] = BookSearchIndex.EXACT_MATCH_SCORE if term == word else BookSearchIndex.PREFIX_MATCH_SCORE
+            position += 1
+
+        #a word that does not begin any term could be misspelled, look for terms that share most of its trigrams
+        if len(matches) == 0:
+            wordTrigrams = BookSearchIndex.trigrams(word)
+            sharedCounts = Counter()
+            for trigram in wordTrigrams:
+                sharedCounts.update(self._trigramTerms.get(trigram, ()))
+
+            candidates = []
+            for (term, shared) in sharedCounts.items():
+                #the Jaccard similarity of the trigram sets; the padded term has one more trigram than characters
+                similarity = shared / (len(wordTrigrams) + len(term) + 1 - shared)
+                if similarity >= BookSearchIndex.MIN_FUZZY_SIMILARITY:
+                    candidates.append((similarity, term))
+
+            for (similarity, term) in heapq.nlargest(BookSearchIndex.MAX_FUZZY_TERMS, candidates):
+                matches.setdefault(term, BookSearchIndex.FUZZY_MATCH_SCORE * similarity)
+
+        return matches
+
+    def search(self, query, limit = DEFAULT_RESULT_LIMIT):
+        """
+        Finds the entries that match every word of the query
+        Arguments:
+            query  : str -- the words to look for in the book names and authors
+            limit  : int -- the maximum number of results
+        Returns:
+            the keys of the best matching entries, best match first
+        """
+        words = list(dict.fromkeys(BookSearchIndex.tokenize(query)))
+        if len(words) == 0:
+            return []
+
+        self.sortTerms()
+        expansions = [self.expandWord(word) for word in words]
+        if any(len(matches) == 0 for matches in expansions):
+            return []
+
+        #score the entries of the word that matches the fewest entries, then check the other words only on those entries
+        expansions.sort(key = lambda matches: sum(len(self._postings[term]) for term in matches))
+        entryScores = {}
+        for (term, score) in expansions[0].items():
+            for entryID in self._postings[term]:
+                wordScore = score * BookSearchIndex.NAME_WEIGHT if term in self._entryTerms[entryID][0] else score
+                if wordScore > entryScores.get(entryID, 0.0):
+                    entryScores[entryID] = wordScore
+
+        scoredEntries = []
+        for (entryID, totalScore) in entryScores.items():
+            (nameTerms, authorTerms) = self._entryTerms[entryID]
+            for matches in expansions[1:]:
+                #an entry has few terms so they are looked up in the matches rather than the other way around
+                wordScore = max([matches.get(term, 0.0) * BookSearchIndex.NAME_WEIGHT for term in nameTerms] +
+                                [matches.get(term, 0.0) for term in authorTerms])
+                if wordScore == 0.0:
+                    break
+                totalScore += wordScore
+            else:
+                #shorter names are closer to the query when the scores are the same
+                scoredEntries.append((totalScore, -len(nameTerms), -entryID, entryID))
+
+        return [self._entryKeys[entry[3]] for entry in heapq.nlargest(limit, scoredEntries)]
@@ -0,0 +1,184 @@
+"""
+Module that defines the CatalogueImporter class used to load a book catalogue into the library
+from CSV or JSONL files
+
+Author: Prof. Magdin Stoica
+E-Mail: magdin.stoica@sheridancollege.ca
+Version 1.0 (Python)
+"""
+from LibraryModule import Library
+from ExceptionsModule import InvalidTransaction
+from itertools import islice
+import csv
+import json
+import sys
+import time
+
+class CatalogueImporter:
+    """
+    Imports books into a library by streaming the records of a catalogue file in small batches so that the memory
+    used by the import does not depend on the size of the file. Each record is registered through
+    Library.registerBook which rejects duplicate ISBNs and allocates the library IDs of all the copies of
+    the book as a single block. The license terms of the digital books of a batch are prefetched into the
+    license catalogue of the library with a single request, so the license provider is not called for each book.
+
+    CSV files must have a header with the columns name, isbn, authors, type and copies. Authors are separated
+    by semicolons. JSONL files contain one JSON object per line with the same keys where authors is a list.
+    The book type is either the library constant (1 or 2) or the text "paper" or "digital".
+
+    Attributes:
+        _library         : Library -- the library the books are imported into
+        _recordCount     : int   -- the number of records read from the catalogue files
+        _importedCount   : int   -- the number of books that were registered
+        _copyCount       : int   -- the number of library assets that were created
+        _rejectedCount   : int   -- the number of records that were rejected
+        _errors          : list  -- the first errors encountered, as (record number, message) tuples
+        _elapsedSeconds  : float -- the time spent importing
+
+    Version 1.0 (Python)
+    """
+
+    """constant for the maximum number of errors kept for the import report"""
+    MAX_REPORTED_ERRORS = 20
+
+    """constant for the number of records read together, whose license terms are prefetched together"""
+    PREFETCH_BATCH_SIZE = 500
+
+    """the text values accepted for the book type"""
+    BOOK_TYPE_NAMES = {"paper": Library.BOOK_TYPE_PAPER, "digital": Library.BOOK_TYPE_DIGITAL}
+
+    def __init__(self, library):
+        """
+        Initialize the importer for the given library
+        Arguments:
+            library  : Library -- the library the books are imported into
+        """
+        self._library = library
+        self._recordCount = 0
+        self._importedCount = 0
+        self._copyCount = 0
+        self._rejectedCount = 0
+        self._errors = []
+        self._elapsedSeconds = 0.0
+
+    def importFile(self, filePath):
+        """
+        Imports all the records of the given catalogue file. Files ending with .jsonl or .json are read as
+        JSON lines, all other files are read as CSV
+        Arguments:
+            filePath - the path of the catalogue file
+        """
+        with open(filePath, newline = "", encoding = "utf-8") as catalogueFile:
+            if filePath.endswith(".jsonl") or filePath.endswith(".json"):
+                self.importRecords(CatalogueImporter.readJsonlRecords(catalogueFile))
+            else:
+                self.importRecords(CatalogueImporter.readCsvRecords(catalogueFile))
+
+    def importRecords(self, records):
+        """
+        Registers the books described by the given records. Invalid records and duplicate ISBNs are
+        counted as rejected and the import continues with the next record
+        Arguments:
+            records - an iterable of dictionaries with the keys name, isbn, authors, type and copies
+        """
+        startTime = time.perf_counter()
+        records = iter(records)
+        try:
+            while True:
+                batch = list(islice(records, CatalogueImporter.PREFETCH_BATCH_SIZE))
+                if len(batch) == 0:
+                    break
+
+                #parse the whole batch first so the license terms of its digital books are fetched together
+                parsedRecords = []
+                for record in batch:
+                    try:
+                        parsedRecords.append(CatalogueImporter.parseRecord(record))
+                    except (ValueError, KeyError, TypeError) as err:
+                        parsedRecords.append(err)
+                self._library.getLicenseCatalogue().prefetch(
+                    parsedRecord[1] for parsedRecord in parsedRecords
+                    if not isinstance(parsedRecord, Exception) and parsedRecord[3] == Library.BOOK_TYPE_DIGITAL)
+
+                for parsedRecord in parsedRecords:
+                    self._recordCount += 1
+                    try:
+                        if isinstance(parsedRecord, Exception):
+                            raise parsedRecord
+                        (bookName, bookISBN, authors, bookType, nCopies) = parsedRecord
+                        self._library.registerBook(bookName, bookISBN, authors, bookType, nCopies)
+                        self._importedCount += 1
+                        self._copyCount += nCopies
+                    except (InvalidTransaction, ValueError, KeyError, TypeError) as err:
+                        self._rejectedCount += 1
+                        if len(self._errors) < CatalogueImporter.MAX_REPORTED_ERRORS:
+                            self._errors.append((self._recordCount, str(err)))
+        finally:
+            self._elapsedSeconds += time.perf_counter() - startTime
+
+    @staticmethod
+    def readCsvRecords(catalogueFile):
+        """Generates the records of a CSV catalogue file one row at a time"""
+        for row in csv.DictReader(catalogueFile):
+            authors = row.get("authors") or ""
+            row["authors"] = [author for author in authors.split(";") if len(author.strip()) > 0]
+            yield row
+
+    @staticmethod
+    def readJsonlRecords(catalogueFile):
+        """Generates the records of a JSONL catalogue file one line at a time, skipping empty lines"""
+        for line in catalogueFile:
+            if len(line.strip()) > 0:
+                yield json.loads(line)
+
+    @staticmethod
+    def parseRecord(record):
+        """
+        Validates a catalogue record and converts its values to the arguments of Library.registerBook
+        Returns:
+            (book name, ISBN, authors, book type, number of copies)
+        """
+        bookName = str(record["name"]).strip()
+        bookISBN = str(record["isbn"]).strip()
+        if len(bookName) == 0 or len(bookISBN) == 0:
+            raise ValueError("The book name and ISBN are required")
+
+        authors = [str(author).strip() for author in record.get("authors") or []]
+
+        bookType = record["type"]
+        if isinstance(bookType, str) and not bookType.strip().isdigit():
+            bookType = CatalogueImporter.BOOK_TYPE_NAMES.get(bookType.strip().lower())
+            if bookType == None:
+                raise ValueError(f"Unknown book type '{record['type']}'")
+        else:
+            bookType = int(bookType)
+
+        nCopies = int(record["copies"])
+
+        return (bookName, bookISBN, authors, bookType, nCopies)
+
+    def getRecordsPerSecond(self):
+        """Returns the import throughput in records per second"""
+        if self._elapsedSeconds == 0:
+            return 0.0
+        return self._recordCount / self._elapsedSeconds
+
+    def getReport(self):
+        """Returns a text report of the import with its throughput and the first errors encountered"""
+        lines = [f"Records read: {self._recordCount}",
+                 f"Books imported: {self._importedCount}",
+                 f"Copies created: {self._copyCount}",
+                 f"Records rejected: {self._rejectedCount}",
+                 f"Elapsed time: {self._elapsedSeconds:.3f} s",
+                 f"Throughput: {self.getRecordsPerSecond():,.0f} records/s"]
+        for (recordNumber, message) in self._errors:
+            lines.append(f"  record {recordNumber}: {message}")
+        return "\n".join(lines)
+
+
+if __name__ == "__main__":
+    #import the catalogue files given on the command line into a new library and report the throughput
+    importer = CatalogueImporter(Library())
+    for catalogueFilePath in sys.argv[1:]:
+        importer.importFile(catalogueFilePath)
+    print(importer.getReport())
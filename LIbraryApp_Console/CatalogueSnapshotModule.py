@@ -0,0 +1,521 @@
+"""
+Module that defines the CatalogueSnapshot class, a compact binary file holding the books and library
+assets of a library that is opened with mmap so the library can start without creating all its objects,
+and the SnapshotAssetSource class that loads the assets of a snapshot book on demand
+
+Author: Prof. Magdin Stoica
+E-Mail: magdin.stoica@sheridancollege.ca
+Version 1.0 (Python)
+"""
+from PaperBookModule import PaperBook
+from DigitalBookModule import DigitalBook
+from LibraryAssetModule import LibraryAsset
+from datetime import date
+import mmap
+import struct
+
+class CatalogueSnapshot:
+    """
+    Read-only binary snapshot of a library catalogue. The file is made of fixed-width records that are read
+    directly from the memory-mapped file, so opening a snapshot only reads its header no matter how large
+    the catalogue is. Books are created on demand when they are looked up and their assets when they are used.
+
+    File layout, all integers little-endian:
+        header          -- magic, format version, counts, next library ID and the offset of each section
+        book records    -- per book: name, ISBN and authors as (offset, length) in the string table,
+                           book type, license terms, index of the first asset record and number of assets
+        asset records   -- per asset: library ID, book index, status and the borrowed, returned and
+                           due dates as date ordinals (0 when there is no date). Assets of a book are contiguous
+        ISBN index      -- (key offset, key length, book index) sorted by normalized ISBN
+        name index      -- (key offset, key length, book index) sorted by normalized book name
+        libID index     -- (library ID, asset record index) sorted by library ID
+        hold records    -- per hold: book index, tier or -1 for a copy set aside, library ID of the copy set
+                           aside or 0, and the patron ID in the string table. Sorted by book index, the holds
+                           of a book are in the order returned by Book.getHolds
+        string table    -- the UTF-8 text of all strings
+
+    Snapshots of format version 1 have no hold records and are read as snapshots without holds.
+
+    Attributes:
+        _file        : file  -- the open snapshot file
+        _map         : mmap  -- the memory map of the snapshot file
+        _bookCount   : int   -- the number of books in the snapshot
+        _assetCount  : int   -- the number of assets in the snapshot
+        _nextLibID   : int   -- the next library ID to allocate when the snapshot was written
+        _holdCount   : int   -- the number of hold records in the snapshot
+        _booksOffset, _assetsOffset, _isbnIndexOffset, _nameIndexOffset, _libIDIndexOffset, _holdsOffset,
+        _stringsOffset
+                     : int   -- the offset of each section in the file
+
+    Version 1.0 (Python)
+    """
+
+    """constants identifying the file format"""
+    MAGIC = b"LIBSNAP\0"
+    FORMAT_VERSION = 2
+    FORMAT_VERSION_WITHOUT_HOLDS = 1
+
+    """constants representing the type of book stored in the snapshot"""
+    BOOK_TYPE_PAPER = 1
+    BOOK_TYPE_DIGITAL = 2
+
+    """separator used to store the list of authors as a single string"""
+    AUTHOR_SEPARATOR = "\x1f"
+
+    """record layouts"""
+    HEADER = struct.Struct("<8sIIQQqQQQQQQQQ")
+    HEADER_WITHOUT_HOLDS = struct.Struct("<8sIIQQqQQQQQQ")
+    BOOK_RECORD = struct.Struct("<IIIIIIBidQI")
+    ASSET_RECORD = struct.Struct("<qIBiii")
+    KEY_RECORD = struct.Struct("<III")
+    LIBID_RECORD = struct.Struct("<qQ")
+    HOLD_RECORD = struct.Struct("<IiqII")
+
+    """constant stored as the tier of a hold record for a copy set aside for the patron"""
+    HELD_COPY_TIER = -1
+
+    """offset of the status in an asset record, after the library ID and the book index"""
+    ASSET_STATUS_OFFSET = 12
+
+    def __init__(self, filePath):
+        """
+        Opens the snapshot file and maps it into memory
+        Arguments:
+            filePath  : str -- the path of the snapshot file
+        """
+        self._file = open(filePath, "rb")
+        self._map = mmap.mmap(self._file.fileno(), 0, access = mmap.ACCESS_READ)
+
+        (magic, formatVersion) = struct.unpack_from("<8sI", self._map, 0)
+        if magic != CatalogueSnapshot.MAGIC or formatVersion not in (CatalogueSnapshot.FORMAT_VERSION,
+                                                                     CatalogueSnapshot.FORMAT_VERSION_WITHOUT_HOLDS):
+            self.close()
+            raise ValueError(f"{filePath} is not a catalogue snapshot")
+
+        if formatVersion == CatalogueSnapshot.FORMAT_VERSION:
+            (magic, formatVersion, reserved, self._bookCount, self._assetCount, self._nextLibID,
+             self._booksOffset, self._assetsOffset, self._isbnIndexOffset, self._nameIndexOffset,
+             self._libIDIndexOffset, self._holdsOffset, self._holdCount,
+             self._stringsOffset) = CatalogueSnapshot.HEADER.unpack_from(self._map, 0)
+        else:
+            (magic, formatVersion, reserved, self._bookCount, self._assetCount, self._nextLibID,
+             self._booksOffset, self._assetsOffset, self._isbnIndexOffset, self._nameIndexOffset,
+             self._libIDIndexOffset, self._stringsOffset) = CatalogueSnapshot.HEADER_WITHOUT_HOLDS.unpack_from(self._map, 0)
+            (self._holdsOffset, self._holdCount) = (self._stringsOffset, 0)
+
+    def close(self):
+        """Closes the memory map and the snapshot file"""
+        self._map.close()
+        self._file.close()
+
+    def getBookCount(self):
+        """Returns the number of books in the snapshot"""
+        return self._bookCount
+
+    def getAssetCount(self):
+        """Returns the number of assets in the snapshot"""
+        return self._assetCount
+
+    def getNextLibID(self):
+        """Returns the next library ID to allocate when the snapshot was written"""
+        return self._nextLibID
+
+    def countAssetStatuses(self, firstAsset = 0, assetCount = None):
+        """
+        Returns the number of assets in each status, indexed by status. The status bytes of the asset records
+        are read with a single strided slice of the memory map instead of unpacking the records
+        Arguments:
+            firstAsset  : int -- the index of the first asset record to count
+            assetCount  : int -- the number of asset records to count, None for all the records after the first
+        """
+        assetCount = self._assetCount - firstAsset if assetCount == None else assetCount
+        statusOffset = self._assetsOffset + firstAsset * CatalogueSnapshot.ASSET_RECORD.size + CatalogueSnapshot.ASSET_STATUS_OFFSET
+        statuses = self._map[statusOffset:statusOffset + assetCount * CatalogueSnapshot.ASSET_RECORD.size:
+                             CatalogueSnapshot.ASSET_RECORD.size]
+        return [statuses.count(status) for status in range(LibraryAsset.STATUS_COUNT)]
+
+    def loadAssets(self, book, firstAsset, assetCount):
+        """
+        Creates the assets stored in the given range of asset records
+        Arguments:
+            book        : Book -- the book the assets are copies of
+            firstAsset  : int  -- the index of the first asset record
+            assetCount  : int  -- the number of asset records
+        Returns:
+            the list of assets, which are not added to the book
+        """
+        libAssets = []
+        for (libID, assetBookIndex, status, borrowedOn, returnedOn, dueDate) in CatalogueSnapshot.ASSET_RECORD.iter_unpack(
+                self._map[self._assetsOffset + firstAsset * CatalogueSnapshot.ASSET_RECORD.size:
+                          self._assetsOffset + (firstAsset + assetCount) * CatalogueSnapshot.ASSET_RECORD.size]):
+            libAsset = LibraryAsset(libID, book)
+            libAsset.restoreState(status, CatalogueSnapshot.toDate(borrowedOn), CatalogueSnapshot.toDate(returnedOn),
+                                  CatalogueSnapshot.toDate(dueDate))
+            libAssets.append(libAsset)
+        return libAssets
+
+    def readAssetRecords(self, firstAsset, assetCount):
+        """
+        Reads the given range of asset records without creating the assets
+        Arguments:
+            firstAsset  : int -- the index of the first asset record
+            assetCount  : int -- the number of asset records
+        Returns:
+            an iterator of (library ID, book index, status, borrowed on, returned on, due date) with the dates as
+            date ordinals, 0 when there is no date
+        """
+        return CatalogueSnapshot.ASSET_RECORD.iter_unpack(
+            self._map[self._assetsOffset + firstAsset * CatalogueSnapshot.ASSET_RECORD.size:
+                      self._assetsOffset + (firstAsset + assetCount) * CatalogueSnapshot.ASSET_RECORD.size])
+
+    def readLoanedDueDates(self):
+        """
+        Reads the assets of the snapshot that are on loan
+        Returns:
+            a generator of (library ID, book index, due date) of the loaned assets that have a due date
+        """
+        for (libID, bookIndex, status, borrowedOn, returnedOn, dueDate) in CatalogueSnapshot.ASSET_RECORD.iter_unpack(
+                self._map[self._assetsOffset:self._assetsOffset + self._assetCount * CatalogueSnapshot.ASSET_RECORD.size]):
+            if status == LibraryAsset.LOANED and dueDate != 0:
+                yield (libID, bookIndex, date.fromordinal(dueDate))
+
+    def readString(self, offset, length):
+        """Returns the string stored at the given offset of the string table"""
+        start = self._stringsOffset + offset
+        return self._map[start:start + length].decode("utf-8")
+
+    def searchKeyIndex(self, indexOffset, key):
+        """
+        Binary search of a key index for the given normalized key
+        Returns:
+            the index of the first book with the given key or -1 if no book has that key
+        """
+        keyBytes = key.encode("utf-8")
+        (low, high) = (0, self._bookCount)
+        while low < high:
+            middle = (low + high) // 2
+            (keyOffset, keyLength, bookIndex) = CatalogueSnapshot.KEY_RECORD.unpack_from(
+                self._map, indexOffset + middle * CatalogueSnapshot.KEY_RECORD.size)
+            start = self._stringsOffset + keyOffset
+            if self._map[start:start + keyLength] < keyBytes:
+                low = middle + 1
+            else:
+                high = middle
+
+        if low == self._bookCount:
+            return -1
+
+        (keyOffset, keyLength, bookIndex) = CatalogueSnapshot.KEY_RECORD.unpack_from(
+            self._map, indexOffset + low * CatalogueSnapshot.KEY_RECORD.size)
+        start = self._stringsOffset + keyOffset
+        return bookIndex if self._map[start:start + keyLength] == keyBytes else -1
+
+    def findBookIndexByISBN(self, isbnKey):
+        """Returns the index of the book with the given normalized ISBN or -1 if there is no such book"""
+        return self.searchKeyIndex(self._isbnIndexOffset, isbnKey)
+
+    def findBookIndexByName(self, nameKey):
+        """Returns the index of the first book with the given normalized name or -1 if there is no such book"""
+        return self.searchKeyIndex(self._nameIndexOffset, nameKey)
+
+    def findBookIndexByLibID(self, libID):
+        """Returns the index of the book that has the asset with the given library ID or -1 if there is no such asset"""
+        assetIndex = self.findAssetIndexByLibID(libID)
+        if assetIndex < 0:
+            return -1
+        return CatalogueSnapshot.ASSET_RECORD.unpack_from(
+            self._map, self._assetsOffset + assetIndex * CatalogueSnapshot.ASSET_RECORD.size)[1]
+
+    def findAssetIndexByLibID(self, libID):
+        """Returns the index of the record of the asset with the given library ID or -1 if there is no such asset"""
+        (low, high) = (0, self._assetCount)
+        while low < high:
+            middle = (low + high) // 2
+            (middleLibID, assetIndex) = CatalogueSnapshot.LIBID_RECORD.unpack_from(
+                self._map, self._libIDIndexOffset + middle * CatalogueSnapshot.LIBID_RECORD.size)
+            if middleLibID < libID:
+                low = middle + 1
+            elif middleLibID > libID:
+                high = middle
+            else:
+                return assetIndex
+        return -1
+
+    def readBookHolds(self, bookIndex):
+        """
+        Reads the holds on the book stored at the given index. The hold records are sorted by book index so the
+        holds of the book are found with a binary search
+        Returns:
+            the list of (patron ID, tier, library ID) in the format of Book.getHolds
+        """
+        (low, high) = (0, self._holdCount)
+        while low < high:
+            middle = (low + high) // 2
+            if CatalogueSnapshot.HOLD_RECORD.unpack_from(
+                    self._map, self._holdsOffset + middle * CatalogueSnapshot.HOLD_RECORD.size)[0] < bookIndex:
+                low = middle + 1
+            else:
+                high = middle
+
+        holds = []
+        while low < self._holdCount:
+            (holdBookIndex, tier, heldLibID, patronOffset, patronLength) = CatalogueSnapshot.HOLD_RECORD.unpack_from(
+                self._map, self._holdsOffset + low * CatalogueSnapshot.HOLD_RECORD.size)
+            if holdBookIndex != bookIndex:
+                break
+            patronID = self.readString(patronOffset, patronLength)
+            if tier == CatalogueSnapshot.HELD_COPY_TIER:
+                holds.append((patronID, None, heldLibID))
+            else:
+                holds.append((patronID, tier, None))
+            low += 1
+        return holds
+
+    @staticmethod
+    def toDate(ordinal):
+        """Converts a date ordinal stored in the snapshot back to a date"""
+        return None if ordinal == 0 else date.fromordinal(ordinal)
+
+    def readBookText(self, bookIndex):
+        """
+        Reads the name and authors of the book stored at the given index without creating the book
+        Returns:
+            (book name, list of authors)
+        """
+        (nameOffset, nameLength, isbnOffset, isbnLength, authorsOffset, authorsLength) = CatalogueSnapshot.BOOK_RECORD.unpack_from(
+            self._map, self._booksOffset + bookIndex * CatalogueSnapshot.BOOK_RECORD.size)[:6]
+
+        authors = [] if authorsLength == 0 else self.readString(authorsOffset, authorsLength).split(CatalogueSnapshot.AUTHOR_SEPARATOR)
+        return (self.readString(nameOffset, nameLength), authors)
+
+    def readBookRecord(self, bookIndex):
+        """
+        Reads the record of the book stored at the given index without creating the book
+        Returns:
+            (book name, ISBN, list of authors, book type, maximum borrow days, late penalty per day, index of the
+            first asset record, number of assets)
+        """
+        (nameOffset, nameLength, isbnOffset, isbnLength, authorsOffset, authorsLength, bookType,
+         maxBorrowDays, latePenaltyPerDay, firstAsset, assetCount) = CatalogueSnapshot.BOOK_RECORD.unpack_from(
+            self._map, self._booksOffset + bookIndex * CatalogueSnapshot.BOOK_RECORD.size)
+
+        authors = [] if authorsLength == 0 else self.readString(authorsOffset, authorsLength).split(CatalogueSnapshot.AUTHOR_SEPARATOR)
+        return (self.readString(nameOffset, nameLength), self.readString(isbnOffset, isbnLength), authors,
+                bookType, maxBorrowDays, latePenaltyPerDay, firstAsset, assetCount)
+
+    def readAssetBytes(self, firstAsset, assetCount):
+        """Returns the given range of asset records as they are stored in the file"""
+        return self._map[self._assetsOffset + firstAsset * CatalogueSnapshot.ASSET_RECORD.size:
+                         self._assetsOffset + (firstAsset + assetCount) * CatalogueSnapshot.ASSET_RECORD.size]
+
+    def loadBook(self, bookIndex):
+        """
+        Creates the book stored at the given index. The assets of the book are loaded by the book when they are
+        used, through a SnapshotAssetSource
+        Arguments:
+            bookIndex  : int -- the index of the book in the snapshot
+        Returns:
+            the book
+        """
+        (bookName, bookISBN, authors, bookType, maxBorrowDays, latePenaltyPerDay,
+         firstAsset, assetCount) = self.readBookRecord(bookIndex)
+
+        if bookType == CatalogueSnapshot.BOOK_TYPE_DIGITAL:
+            book = DigitalBook(bookName, bookISBN, (maxBorrowDays, latePenaltyPerDay))
+        else:
+            book = PaperBook(bookName, bookISBN)
+        for author in authors:
+            book.addAuthor(author)
+
+        book.setAssetSource(SnapshotAssetSource(self, firstAsset, assetCount))
+        book.restoreHolds(self.readBookHolds(bookIndex))
+        return book
+
+    @staticmethod
+    def write(filePath, books, nextLibID, normalizeISBN, normalizeName):
+        """
+        Writes a snapshot of the given books and their assets. A book of an open snapshot that was not loaded is
+        given as the pair (snapshot, book index) and is copied from the records of that snapshot without creating
+        the book or its assets. The assets of the other books that are not loaded are read without loading them
+        Arguments:
+            filePath       : str      -- the path of the snapshot file
+            books          : list     -- the books to write, Book objects or (CatalogueSnapshot, book index) pairs
+            nextLibID      : int      -- the next library ID to allocate
+            normalizeISBN  : function -- returns the key of an ISBN in the ISBN index
+            normalizeName  : function -- returns the key of a book name in the name index
+        """
+        strings = bytearray()
+        stringOffsets = {}
+
+        def addString(text):
+            #identical strings such as author names are stored once
+            offset = stringOffsets.get(text)
+            encoded = text.encode("utf-8")
+            if offset == None:
+                offset = len(strings)
+                stringOffsets[text] = offset
+                strings.extend(encoded)
+            return (offset, len(encoded))
+
+        bookRecords = bytearray()
+        assetRecords = bytearray()
+        isbnKeys = []
+        nameKeys = []
+        libIDs = []
+        holdRecords = bytearray()
+        holdCount = 0
+        assetIndex = 0
+        for (bookIndex, book) in enumerate(books):
+            if isinstance(book, tuple):
+                (sourceSnapshot, sourceIndex) = book
+                (bookName, bookISBN, authors, bookType, maxBorrowDays, latePenaltyPerDay,
+                 sourceFirstAsset, assetCount) = sourceSnapshot.readBookRecord(sourceIndex)
+                holds = sourceSnapshot.readBookHolds(sourceIndex)
+            else:
+                if isinstance(book, DigitalBook):
+                    bookType = CatalogueSnapshot.BOOK_TYPE_DIGITAL
+                    (maxBorrowDays, latePenaltyPerDay) = book.getLoanLicense()
+                else:
+                    bookType = CatalogueSnapshot.BOOK_TYPE_PAPER
+                    (maxBorrowDays, latePenaltyPerDay) = (0, 0.0)
+                (bookName, bookISBN, authors) = (book.getName(), book.getISBN(), book.getAuthors())
+                holds = book.getHolds()
+                assetStates = book.readAssetStates()
+                assetCount = len(assetStates)
+
+            bookRecords += CatalogueSnapshot.BOOK_RECORD.pack(
+                *addString(bookName), *addString(bookISBN), *addString(CatalogueSnapshot.AUTHOR_SEPARATOR.join(authors)),
+                bookType, maxBorrowDays, latePenaltyPerDay, assetIndex, assetCount)
+
+            isbnKeys.append((normalizeISBN(bookISBN).encode("utf-8"), bookIndex))
+            nameKeys.append((normalizeName(bookName).encode("utf-8"), bookIndex))
+
+            if isinstance(book, tuple) and sourceIndex == bookIndex:
+                #the asset records of a book that keeps its index are copied as they are
+                sourceRecords = sourceSnapshot.readAssetBytes(sourceFirstAsset, assetCount)
+                assetRecords += sourceRecords
+                for record in CatalogueSnapshot.ASSET_RECORD.iter_unpack(sourceRecords):
+                    libIDs.append((record[0], assetIndex))
+                    assetIndex += 1
+            else:
+                if isinstance(book, tuple):
+                    assetStates = [(libID, status, borrowedOn, returnedOn, dueDate)
+                                   for (libID, assetBookIndex, status, borrowedOn, returnedOn, dueDate)
+                                   in sourceSnapshot.readAssetRecords(sourceFirstAsset, assetCount)]
+                for (libID, status, borrowedOn, returnedOn, dueDate) in assetStates:
+                    assetRecords += CatalogueSnapshot.ASSET_RECORD.pack(libID, bookIndex, status, borrowedOn,
+                                                                        returnedOn, dueDate)
+                    libIDs.append((libID, assetIndex))
+                    assetIndex += 1
+
+            for (patronID, tier, heldLibID) in holds:
+                holdRecords += CatalogueSnapshot.HOLD_RECORD.pack(
+                    bookIndex, CatalogueSnapshot.HELD_COPY_TIER if heldLibID != None else tier,
+                    0 if heldLibID == None else heldLibID, *addString(patronID))
+                holdCount += 1
+
+        def keyIndex(keys):
+            #the keys are sorted as UTF-8 bytes which is the order used by the binary search
+            keys.sort()
+            index = bytearray()
+            for (keyBytes, bookIndex) in keys:
+                (offset, length) = addString(keyBytes.decode("utf-8"))
+                index += CatalogueSnapshot.KEY_RECORD.pack(offset, length, bookIndex)
+            return index
+
+        isbnIndex = keyIndex(isbnKeys)
+        nameIndex = keyIndex(nameKeys)
+
+        libIDs.sort()
+        libIDIndex = bytearray()
+        for (libID, libIDAssetIndex) in libIDs:
+            libIDIndex += CatalogueSnapshot.LIBID_RECORD.pack(libID, libIDAssetIndex)
+
+        #compute the offset of each section and write the file
+        booksOffset = CatalogueSnapshot.HEADER.size
+        assetsOffset = booksOffset + len(bookRecords)
+        isbnIndexOffset = assetsOffset + len(assetRecords)
+        nameIndexOffset = isbnIndexOffset + len(isbnIndex)
+        libIDIndexOffset = nameIndexOffset + len(nameIndex)
+        holdsOffset = libIDIndexOffset + len(libIDIndex)
+        stringsOffset = holdsOffset + len(holdRecords)
+
+        with open(filePath, "wb") as snapshotFile:
+            snapshotFile.write(CatalogueSnapshot.HEADER.pack(
+                CatalogueSnapshot.MAGIC, CatalogueSnapshot.FORMAT_VERSION, 0, len(books), assetIndex, nextLibID,
+                booksOffset, assetsOffset, isbnIndexOffset, nameIndexOffset, libIDIndexOffset, holdsOffset, holdCount,
+                stringsOffset))
+            for section in (bookRecords, assetRecords, isbnIndex, nameIndex, libIDIndex, holdRecords, strings):
+                snapshotFile.write(section)
+
+
+class SnapshotAssetSource:
+    """
+    The assets of one book of a catalogue snapshot. A book created from a snapshot loads its assets through its
+    asset source a page at a time, when they are first used, and can drop them and load them again as long as
+    none of them changed.
+
+    Attributes:
+        _snapshot    : CatalogueSnapshot -- the snapshot the assets are stored in
+        _firstAsset  : int -- the index of the record of the first asset of the book
+        _assetCount  : int -- the number of assets of the book in the snapshot
+
+    Version 1.0 (Python)
+    """
+
+    __slots__ = ("_snapshot", "_firstAsset", "_assetCount")
+
+    def __init__(self, snapshot, firstAsset, assetCount):
+        """
+        Initialize the asset source
+        Arguments:
+            snapshot    : CatalogueSnapshot -- the snapshot the assets are stored in
+            firstAsset  : int -- the index of the record of the first asset of the book
+            assetCount  : int -- the number of assets of the book
+        """
+        self._snapshot = snapshot
+        self._firstAsset = firstAsset
+        self._assetCount = assetCount
+
+    def getAssetCount(self):
+        """Returns the number of assets of the book in the snapshot"""
+        return self._assetCount
+
+    def countAssetStatuses(self):
+        """Returns the number of assets of the book in each status, indexed by status, without loading them"""
+        return self._snapshot.countAssetStatuses(self._firstAsset, self._assetCount)
+
+    def loadAssets(self, book, position, assetCount):
+        """
+        Creates the assets of the book starting at the given position
+        Arguments:
+            book        : Book -- the book the assets are copies of
+            position    : int  -- the position of the first asset among the assets of the book
+            assetCount  : int  -- the maximum number of assets to create
+        Returns:
+            the list of assets, which are not added to the book
+        """
+        assetCount = max(0, min(assetCount, self._assetCount - position))
+        return self._snapshot.loadAssets(book, self._firstAsset + position, assetCount)
+
+    def readAssetStates(self, position):
+        """
+        Reads the state of the assets of the book starting at the given position without creating the assets
+        Returns:
+            a generator of (library ID, status, borrowed on, returned on, due date) with the dates as date ordinals,
+            0 when there is no date
+        """
+        assetCount = max(0, self._assetCount - position)
+        for (libID, bookIndex, status, borrowedOn, returnedOn, dueDate) in self._snapshot.readAssetRecords(
+                self._firstAsset + position, assetCount):
+            yield (libID, status, borrowedOn, returnedOn, dueDate)
+
+    def findAssetPosition(self, libID):
+        """
+        Returns the position of the asset with the given library ID among the assets of the book or -1 if the
+        book has no such asset
+        """
+        assetIndex = self._snapshot.findAssetIndexByLibID(libID)
+        if self._firstAsset <= assetIndex < self._firstAsset + self._assetCount:
+            return assetIndex - self._firstAsset
+        return -1
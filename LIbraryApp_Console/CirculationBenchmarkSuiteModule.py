@@ -0,0 +1,249 @@
+"""
+Module that defines the CirculationBenchmarkSuite class that times the circulation hot paths on synthetic
+libraries of increasing size and compares the results with a stored baseline
+
+Author: Prof. Magdin Stoica
+E-Mail: magdin.stoica@sheridancollege.ca
+Version 1.0 (Python)
+"""
+from LibraryModule import Library
+from LibraryApplicationModule import LibraryApplication
+from contextlib import redirect_stdout
+import argparse
+import io
+import json
+import platform
+import random
+import sys
+import time
+
+class CirculationBenchmarkSuite:
+    """
+    Builds a synthetic library for each scale and times the operations a library desk performs most often.
+    Each operation is repeated until it has run for a minimum time and the best of several runs is kept, which
+    is the measure least disturbed by other processes. Results are in nanoseconds per operation.
+
+    The results are written as JSON so they can be kept as a baseline. A later run compared with the baseline
+    reports every operation that became slower than the baseline by more than the tolerance.
+
+    Attributes:
+        _scales      : tuple -- the (number of books, copies per book) of each synthetic library
+        _minSeconds  : float -- the minimum time each run of an operation lasts
+        _runCount    : int   -- the number of runs of each operation, the fastest is kept
+        _results     : dict  -- the nanoseconds per operation of each operation at each scale
+
+    Version 1.0 (Python)
+    """
+
+    """constant for the (number of books, copies per book) of the synthetic libraries. The copies per book are
+    traded against the number of books so no library holds more than a million assets"""
+    SCALES = ((1000, 1), (1000, 1000), (10000, 100), (100000, 10), (1000000, 1), (100, 10000))
+
+    """constant for the default minimum time in seconds each run of an operation lasts"""
+    DEFAULT_MIN_SECONDS = 0.2
+
+    """constant for the default number of runs of each operation"""
+    DEFAULT_RUN_COUNT = 3
+
+    """constant for the default fraction an operation can be slower than the baseline before it is a regression"""
+    DEFAULT_TOLERANCE = 0.25
+
+    """constant for the number of authors the synthetic books are spread over"""
+    AUTHOR_COUNT = 1000
+
+    """constant for the number of books the lookups are spread over"""
+    SAMPLE_SIZE = 1000
+
+    def __init__(self, scales = SCALES, minSeconds = DEFAULT_MIN_SECONDS, runCount = DEFAULT_RUN_COUNT):
+        """
+        Initialize the benchmark suite
+        Arguments:
+            scales      : tuple -- the (number of books, copies per book) of each synthetic library
+            minSeconds  : float -- the minimum time each run of an operation lasts
+            runCount    : int   -- the number of runs of each operation, the fastest is kept
+        """
+        self._scales = scales
+        self._minSeconds = minSeconds
+        self._runCount = runCount
+        self._results = {}
+
+    @staticmethod
+    def getScaleName(bookCount, copiesPerBook):
+        """Returns the name of a scale in the results"""
+        return f"{bookCount}x{copiesPerBook}"
+
+    @staticmethod
+    def buildLibrary(bookCount, copiesPerBook):
+        """
+        Creates a synthetic library of at least two books. Even books are paper books and odd books are digital books
+        Returns:
+            the library
+        """
+        library = Library()
+        for iBook in range(bookCount):
+            library.registerBook(f"Synthetic Book {iBook}", f"SYN-{iBook:07d}",
+                                 [f"Author {iBook % CirculationBenchmarkSuite.AUTHOR_COUNT}"],
+                                 Library.BOOK_TYPE_PAPER if iBook % 2 == 0 else Library.BOOK_TYPE_DIGITAL, copiesPerBook)
+        return library
+
+    def timeOperation(self, operation):
+        """
+        Times an operation, which is called with the number of the call so it can vary its arguments
+        Returns:
+            the nanoseconds per call of the fastest run
+        """
+        bestNanoseconds = None
+        minNanoseconds = self._minSeconds * 1e9
+        for iRun in range(self._runCount):
+            #the calls are made in batches that double in size so the clock is read rarely
+            (callCount, batchSize) = (0, 1)
+            startTime = time.perf_counter_ns()
+            while True:
+                for iCall in range(callCount, callCount + batchSize):
+                    operation(iCall)
+                callCount += batchSize
+                elapsedNanoseconds = time.perf_counter_ns() - startTime
+                if elapsedNanoseconds >= minNanoseconds:
+                    break
+                batchSize *= 2
+
+            runNanoseconds = elapsedNanoseconds / callCount
+            if bestNanoseconds == None or runNanoseconds < bestNanoseconds:
+                bestNanoseconds = runNanoseconds
+        return bestNanoseconds
+
+    def runScale(self, bookCount, copiesPerBook):
+        """
+        Times the hot paths on a synthetic library of the given size
+        Returns:
+            dictionary of the nanoseconds per operation of each operation
+        """
+        library = CirculationBenchmarkSuite.buildLibrary(bookCount, copiesPerBook)
+
+        #the lookups go to random books so they are not all served by the same cache lines
+        rand = random.Random(bookCount)
+        sample = [rand.randrange(bookCount) for iSample in range(CirculationBenchmarkSuite.SAMPLE_SIZE)]
+        names = [f"Synthetic Book {iBook}" for iBook in sample]
+        isbns = [f"SYN-{iBook:07d}" for iBook in sample]
+        paperBook = library.findBookByISBN("SYN-0000000")
+        digitalBook = library.findBookByISBN("SYN-0000001")
+        assetLibIDs = [libAsset.getLibID() for libAsset in paperBook.getAssets()]
+
+        def borrowReturn(book):
+            libAsset = library.borrowBook(book)
+            library.returnBook(book, libAsset.getLibID())
+
+        #a hold sets a copy aside and cancelling it releases the copy
+        def reserveRelease(iCall):
+            library.reserveBook(paperBook, "benchmark-patron")
+            library.cancelHold(paperBook, "benchmark-patron")
+
+        #half the copies of the displayed book are on loan. The inventory shows the summary and the first page of
+        #the loaned copies, which are found after the available ones
+        loanedAssets = [library.borrowBook(paperBook) for iCopy in range(copiesPerBook // 2)]
+        application = LibraryApplication()
+        def displayAssets(iCall):
+            with redirect_stdout(io.StringIO()) as output:
+                output.write(application.formatAssetSummary(paperBook))
+                application.displayBookAssets(paperBook, LibraryApplication.ASSET_FILTER_LOANED)
+
+        timings = {}
+        timings["findBookByName"] = self.timeOperation(lambda iCall: library.findBookByName(names[iCall % len(names)]))
+        timings["findBookByISBN"] = self.timeOperation(lambda iCall: library.findBookByISBN(isbns[iCall % len(isbns)]))
+        timings["findLibraryAsset"] = self.timeOperation(
+            lambda iCall: paperBook.findLibraryAsset(assetLibIDs[iCall % len(assetLibIDs)]))
+        timings["displayBookAssets"] = self.timeOperation(displayAssets)
+
+        for libAsset in loanedAssets:
+            library.returnBook(paperBook, libAsset.getLibID())
+        timings["borrowReturnPaperBook"] = self.timeOperation(lambda iCall: borrowReturn(paperBook))
+        timings["borrowReturnDigitalBook"] = self.timeOperation(lambda iCall: borrowReturn(digitalBook))
+        timings["reserveBook"] = self.timeOperation(reserveRelease)
+
+        return timings
+
+    def run(self, log = None):
+        """
+        Runs the benchmark at every scale
+        Arguments:
+            log  : file -- where the progress is written, None to run quietly
+        Returns:
+            the results as a dictionary that can be written as JSON
+        """
+        for (bookCount, copiesPerBook) in self._scales:
+            scaleName = CirculationBenchmarkSuite.getScaleName(bookCount, copiesPerBook)
+            if log != None:
+                print(f"Running {scaleName} ...", file = log, flush = True)
+            self._results[scaleName] = self.runScale(bookCount, copiesPerBook)
+
+        return {"python": platform.python_version(), "platform": platform.platform(),
+                "unit": "ns/op", "results": self._results}
+
+    @staticmethod
+    def compare(results, baseline, tolerance = DEFAULT_TOLERANCE):
+        """
+        Compares results with a baseline. Operations and scales that are not in both are skipped
+        Arguments:
+            results    : dict  -- the results of a run
+            baseline   : dict  -- the results of the baseline run
+            tolerance  : float -- the fraction an operation can be slower than the baseline
+        Returns:
+            list of (scale, operation, baseline ns/op, current ns/op) of the regressions
+        """
+        regressions = []
+        for (scaleName, timings) in results["results"].items():
+            baselineTimings = baseline["results"].get(scaleName, {})
+            for (operationName, nanoseconds) in timings.items():
+                baselineNanoseconds = baselineTimings.get(operationName)
+                if baselineNanoseconds != None and nanoseconds > baselineNanoseconds * (1 + tolerance):
+                    regressions.append((scaleName, operationName, baselineNanoseconds, nanoseconds))
+        return regressions
+
+    @staticmethod
+    def getReport(results, baseline = None):
+        """Returns the text of the report of the results, with the change from the baseline if one is given"""
+        lines = [f"{'Scale':<14} {'Operation':<24} {'ns/op':>14} {'Baseline':>14} {'Change':>8}"]
+        for (scaleName, timings) in results["results"].items():
+            baselineTimings = {} if baseline == None else baseline["results"].get(scaleName, {})
+            for (operationName, nanoseconds) in timings.items():
+                baselineNanoseconds = baselineTimings.get(operationName)
+                if baselineNanoseconds == None:
+                    lines.append(f"{scaleName:<14} {operationName:<24} {nanoseconds:>14,.0f} {'-':>14} {'-':>8}")
+                else:
+                    lines.append(f"{scaleName:<14} {operationName:<24} {nanoseconds:>14,.0f} {baselineNanoseconds:>14,.0f} "
+                                 f"{nanoseconds / baselineNanoseconds - 1:>+8.0%}")
+        return "\n".join(lines)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description = "Benchmark of the circulation hot paths")
+    parser.add_argument("--output", help = "the JSON file the results are written to")
+    parser.add_argument("--baseline", help = "the JSON results of a previous run to compare with")
+    parser.add_argument("--tolerance", type = float, default = CirculationBenchmarkSuite.DEFAULT_TOLERANCE,
+                        help = "the fraction an operation can be slower than the baseline before it is a regression")
+    parser.add_argument("--max-books", type = int, help = "skip the scales with more books")
+    parser.add_argument("--min-seconds", type = float, default = CirculationBenchmarkSuite.DEFAULT_MIN_SECONDS,
+                        help = "the minimum time each run of an operation lasts")
+    arguments = parser.parse_args()
+
+    scales = tuple(scale for scale in CirculationBenchmarkSuite.SCALES
+                   if arguments.max_books == None or scale[0] <= arguments.max_books)
+    results = CirculationBenchmarkSuite(scales, arguments.min_seconds).run(sys.stderr)
+
+    if arguments.output != None:
+        with open(arguments.output, "w") as resultsFile:
+            json.dump(results, resultsFile, indent = 2)
+
+    baseline = None
+    if arguments.baseline != None:
+        with open(arguments.baseline) as baselineFile:
+            baseline = json.load(baselineFile)
+    print(CirculationBenchmarkSuite.getReport(results, baseline))
+
+    #a regression fails the run so a deployment script can stop
+    if baseline != None:
+        regressions = CirculationBenchmarkSuite.compare(results, baseline, arguments.tolerance)
+        for (scaleName, operationName, baselineNanoseconds, nanoseconds) in regressions:
+            print(f"REGRESSION {scaleName} {operationName}: {baselineNanoseconds:,.0f} -> {nanoseconds:,.0f} ns/op")
+        if len(regressions) > 0:
+            sys.exit(1)
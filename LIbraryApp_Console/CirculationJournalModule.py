@@ -0,0 +1,428 @@
+"""
+Module that defines the CirculationJournal class, an append-only journal of the circulation events of
+a library used to rebuild the state of the library after the program stops or crashes
+
+Author: Prof. Magdin Stoica
+E-Mail: magdin.stoica@sheridancollege.ca
+Version 1.0 (Python)
+"""
+from LibraryModule import Library
+from PaperBookModule import PaperBook
+from DigitalBookModule import DigitalBook
+from LibraryAssetModule import LibraryAsset
+from CatalogueSnapshotModule import CatalogueSnapshot
+from datetime import date
+import os
+import struct
+import threading
+import zlib
+
+class CirculationJournal:
+    """
+    Append-only binary journal of the changes made to a library. Every borrow, return and reserve operation
+    appends the new state of the asset it changed, followed by all the holds on the book when it changed them,
+    and every registration appends the new book. The records hold complete states so replaying a record twice
+    gives the same result.
+
+    Durability uses group commit: a transaction appends its records and then waits until they are on disk.
+    The first waiting transaction writes and fsyncs everything appended so far, including the records of the
+    transactions that arrived while it was writing, so one fsync makes a whole group of transactions durable.
+
+    The journal lives in a directory next to a checkpoint, a catalogue snapshot of the whole library. A
+    checkpoint replaces the snapshot and empties the journal. On startup the library is opened from the
+    checkpoint and the journal is replayed on top of it.
+
+    Each record is stored as: payload length, record type, payload, CRC32 of type and payload. Replay stops at
+    the first incomplete or corrupt record, which can only be the tail of a write interrupted by a crash. The
+    tail is cut off after the replay so the records appended afterwards follow the last complete record.
+
+    Attributes:
+        _journalPath        : str        -- the path of the journal file
+        _checkpointPath     : str        -- the path of the checkpoint snapshot
+        _file               : file       -- the journal file opened for appending
+        _lock               : Condition  -- protects the pending records and signals completed flushes
+        _pending            : bytearray  -- the records appended but not written yet
+        _appendedSeq        : int        -- the sequence number of the last appended record
+        _durableSeq         : int        -- the sequence number of the last record known to be on disk
+        _isFlushing         : bool       -- True while a transaction is writing and syncing the journal
+        _recordsSinceCheckpoint : int    -- the number of records appended since the last checkpoint
+        _checkpointInterval : int        -- the number of records after which a checkpoint is due
+        _fsyncCount         : int        -- the number of fsync calls, to measure the group commit
+        _validLength        : int        -- the length of the complete records at the start of the journal file,
+                                            known once the records were read
+        _failure            : OSError    -- the error of a write or fsync that failed, None while the journal works.
+                                            Part of the failed group could be in the file, so the journal cannot
+                                            tell which records are durable and fails every later wait
+
+    Version 1.0 (Python)
+    """
+
+    """constants for the names of the files in the journal directory"""
+    JOURNAL_FILE_NAME = "circulation.journal"
+    CHECKPOINT_FILE_NAME = "checkpoint.snap"
+
+    """constant for the default number of records after which a checkpoint is due"""
+    DEFAULT_CHECKPOINT_INTERVAL = 100000
+
+    """constants representing the type of journal record"""
+    RECORD_ASSET_STATE = 1
+    RECORD_BOOK_REGISTERED = 2
+    RECORD_BOOK_AUTHORS = 3
+    RECORD_BOOK_HOLDS = 4
+
+    """constants representing the type of book in a registration record"""
+    BOOK_TYPE_PAPER = 1
+    BOOK_TYPE_DIGITAL = 2
+
+    """record layouts"""
+    RECORD_HEADER = struct.Struct("<IB")
+    RECORD_CRC = struct.Struct("<I")
+    ASSET_STATE = struct.Struct("<qBiii")
+    BOOK_REGISTERED = struct.Struct("<BidqI")
+
+    """separator used to store the name, ISBN and authors of a registered book, the ISBN and authors of a book
+    whose authors were changed and the ISBN and holds of a book whose holds were changed"""
+    TEXT_SEPARATOR = "\x1f"
+
+    def __init__(self, directory, checkpointInterval = DEFAULT_CHECKPOINT_INTERVAL):
+        """
+        Opens the journal in the given directory, creating the directory if needed
+        Arguments:
+            directory           : str -- the directory of the journal and checkpoint files
+            checkpointInterval  : int -- the number of records after which a checkpoint is due
+        """
+        os.makedirs(directory, exist_ok = True)
+        self._journalPath = os.path.join(directory, CirculationJournal.JOURNAL_FILE_NAME)
+        self._checkpointPath = os.path.join(directory, CirculationJournal.CHECKPOINT_FILE_NAME)
+        self._file = open(self._journalPath, "ab")
+        self._lock = threading.Condition()
+        self._pending = bytearray()
+        self._appendedSeq = 0
+        self._durableSeq = 0
+        self._isFlushing = False
+        self._recordsSinceCheckpoint = 0
+        self._checkpointInterval = checkpointInterval
+        self._fsyncCount = 0
+        self._validLength = None
+        self._failure = None
+
+    def close(self):
+        """Writes the pending records and closes the journal file"""
+        try:
+            self.flush()
+        finally:
+            self._file.close()
+
+    def getFsyncCount(self):
+        """Returns the number of fsync calls made by the journal"""
+        return self._fsyncCount
+
+    def isCheckpointDue(self):
+        """Returns True when enough records were appended since the last checkpoint"""
+        return self._recordsSinceCheckpoint >= self._checkpointInterval
+
+    @staticmethod
+    def encodeRecord(recordType, payload):
+        """Returns the bytes of a record with the given type and payload"""
+        header = CirculationJournal.RECORD_HEADER.pack(len(payload), recordType)
+        crc = zlib.crc32(payload, zlib.crc32(header[4:]))
+        return header + payload + CirculationJournal.RECORD_CRC.pack(crc)
+
+    @staticmethod
+    def toOrdinal(value):
+        """Converts a date to the integer stored in the journal, 0 when there is no date"""
+        return 0 if value == None else value.toordinal()
+
+    @staticmethod
+    def toDate(ordinal):
+        """Converts an integer stored in the journal back to a date"""
+        return None if ordinal == 0 else date.fromordinal(ordinal)
+
+    def append(self, records):
+        """
+        Appends the given encoded records to the journal without waiting for them to be written
+        Returns:
+            the sequence number to wait for to know the records are durable
+        """
+        with self._lock:
+            for record in records:
+                self._pending += record
+                self._appendedSeq += 1
+                self._recordsSinceCheckpoint += 1
+            return self._appendedSeq
+
+    def logAssetStates(self, libAssets):
+        """
+        Appends the current state of the given assets to the journal
+        Returns:
+            the sequence number to wait for to know the records are durable
+        """
+        return self.append([CirculationJournal.encodeRecord(CirculationJournal.RECORD_ASSET_STATE,
+                                CirculationJournal.ASSET_STATE.pack(libAsset.getLibID(), libAsset.getStatus(),
+                                    CirculationJournal.toOrdinal(libAsset.getBorrowedOn()),
+                                    CirculationJournal.toOrdinal(libAsset.getReturnedOn()),
+                                    CirculationJournal.toOrdinal(libAsset.getDueDate())))
+                            for libAsset in libAssets])
+
+    def logBookRegistered(self, book):
+        """
+        Appends a newly registered book to the journal. The assets of a newly registered book are available
+        and have consecutive library IDs
+        Returns:
+            the sequence number to wait for to know the record is durable
+        """
+        if isinstance(book, DigitalBook):
+            bookType = CirculationJournal.BOOK_TYPE_DIGITAL
+            (maxBorrowDays, latePenaltyPerDay) = book.getLoanLicense()
+        else:
+            bookType = CirculationJournal.BOOK_TYPE_PAPER
+            (maxBorrowDays, latePenaltyPerDay) = (0, 0.0)
+
+        bookAssets = book.getAssets()
+        firstLibID = bookAssets[0].getLibID() if len(bookAssets) > 0 else 0
+        text = CirculationJournal.TEXT_SEPARATOR.join([book.getName(), book.getISBN()] + list(book.getAuthors()))
+        payload = CirculationJournal.BOOK_REGISTERED.pack(bookType, maxBorrowDays, latePenaltyPerDay,
+                                                          firstLibID, len(bookAssets)) + text.encode("utf-8")
+
+        return self.append([CirculationJournal.encodeRecord(CirculationJournal.RECORD_BOOK_REGISTERED, payload)])
+
+    def logBookAuthors(self, book):
+        """
+        Appends the new authors of a book whose authors were changed after it was registered
+        Returns:
+            the sequence number to wait for to know the record is durable
+        """
+        text = CirculationJournal.TEXT_SEPARATOR.join([book.getISBN()] + list(book.getAuthors()))
+        return self.append([CirculationJournal.encodeRecord(CirculationJournal.RECORD_BOOK_AUTHORS, text.encode("utf-8"))])
+
+    def logBookHolds(self, book):
+        """
+        Appends all the holds on a book whose holds were changed. Each hold is stored as the patron ID, the tier of
+        a waiting patron and the library ID of the copy set aside for the patron, empty when there is none
+        Returns:
+            the sequence number to wait for to know the record is durable
+        """
+        fields = [book.getISBN()]
+        for (patronID, tier, heldLibID) in book.getHolds():
+            fields += [patronID, "" if tier == None else str(tier), "" if heldLibID == None else str(heldLibID)]
+        text = CirculationJournal.TEXT_SEPARATOR.join(fields)
+        return self.append([CirculationJournal.encodeRecord(CirculationJournal.RECORD_BOOK_HOLDS, text.encode("utf-8"))])
+
+    def waitDurable(self, seq):
+        """
+        Waits until the record with the given sequence number is on disk. If no other transaction is writing the
+        journal, this transaction writes all pending records, including the ones of other transactions, with a
+        single fsync. Raises OSError once a write or fsync of the journal failed, even for records written before
+        the failure, because the records of the failed group are not durable and a later group would be written
+        after them
+        Arguments:
+            seq  : int -- the sequence number returned when the records were appended
+        """
+        with self._lock:
+            while self._durableSeq < seq:
+                if self._failure != None:
+                    raise OSError(f"The circulation journal failed to write records: {self._failure}") from self._failure
+
+                if self._isFlushing:
+                    #another transaction is writing. Its flush or the next one will include these records
+                    self._lock.wait()
+                    continue
+
+                #become the transaction that writes the group of pending records
+                groupRecords = self._pending
+                groupSeq = self._appendedSeq
+                self._pending = bytearray()
+                self._isFlushing = True
+
+                self._lock.release()
+                try:
+                    self._file.write(groupRecords)
+                    self._file.flush()
+                    os.fsync(self._file.fileno())
+                except OSError as err:
+                    self._failure = err
+                    raise
+                finally:
+                    self._lock.acquire()
+                    self._isFlushing = False
+                    self._lock.notify_all()
+
+                self._fsyncCount += 1
+                self._durableSeq = groupSeq
+
+    def flush(self):
+        """Waits until all the records appended so far are durable"""
+        self.waitDurable(self._appendedSeq)
+
+    def checkpoint(self, library):
+        """
+        Writes a catalogue snapshot of the whole library as the new checkpoint and empties the journal. The
+        caller must make sure no circulation operation runs during the checkpoint
+        Arguments:
+            library  : Library -- the library to checkpoint
+        """
+        self.flush()
+
+        #the new snapshot is written next to the old one and replaces it only once it is complete
+        tempPath = self._checkpointPath + ".tmp"
+        savedBooks = library.saveSnapshot(tempPath)
+        with open(tempPath, "rb") as snapshotFile:
+            os.fsync(snapshotFile.fileno())
+        os.replace(tempPath, self._checkpointPath)
+
+        #the rename must be on disk before the journal is truncated, or a crash could leave the old checkpoint
+        #with an empty journal
+        CirculationJournal.syncDirectory(os.path.dirname(self._checkpointPath))
+
+        #the library reads the books it did not load from the new checkpoint, which has their current state. The
+        #mapping of the old checkpoint is closed once the desks reading it without a lock are done with it
+        library.switchSnapshot(CatalogueSnapshot(self._checkpointPath), savedBooks)
+
+        #the journal records are part of the checkpoint now. A crash before the truncation replays records that
+        #are already in the checkpoint which gives the same state
+        with self._lock:
+            self._file.truncate(0)
+            self._file.flush()
+            os.fsync(self._file.fileno())
+            self._recordsSinceCheckpoint = 0
+
+    @staticmethod
+    def syncDirectory(directory):
+        """Makes the changes to the entries of the given directory durable, such as a file renamed in it"""
+        directoryFD = os.open(directory, os.O_RDONLY)
+        try:
+            os.fsync(directoryFD)
+        finally:
+            os.close(directoryFD)
+
+    def readRecords(self):
+        """
+        Generates the (record type, payload) of all the complete records in the journal file. Once all the records
+        were generated the length of the complete records is kept so the tail after them can be cut off
+        """
+        with open(self._journalPath, "rb") as journalFile:
+            data = journalFile.read()
+
+        offset = 0
+        headerSize = CirculationJournal.RECORD_HEADER.size
+        crcSize = CirculationJournal.RECORD_CRC.size
+        while offset + headerSize <= len(data):
+            (payloadLength, recordType) = CirculationJournal.RECORD_HEADER.unpack_from(data, offset)
+            end = offset + headerSize + payloadLength + crcSize
+            if end > len(data):
+                break
+
+            payload = data[offset + headerSize:end - crcSize]
+            (crc,) = CirculationJournal.RECORD_CRC.unpack_from(data, end - crcSize)
+            if crc != zlib.crc32(payload, zlib.crc32(data[offset + 4:offset + headerSize])):
+                break
+
+            yield (recordType, payload)
+            offset = end
+
+        self._validLength = offset
+
+    def truncateTail(self):
+        """
+        Cuts off the incomplete or corrupt tail left by a crash after the complete records read by readRecords.
+        Records appended after the tail could never be replayed because replay stops at the tail
+        """
+        with self._lock:
+            if self._validLength == None or self._validLength >= os.path.getsize(self._journalPath):
+                return
+
+            self._file.truncate(self._validLength)
+            self._file.flush()
+            os.fsync(self._file.fileno())
+
+    def replay(self, library):
+        """
+        Applies the records of the journal to the given library
+        Arguments:
+            library  : Library -- the library opened from the checkpoint
+        Returns:
+            the number of records applied
+        """
+        recordCount = 0
+        changedBooks = set()
+        for (recordType, payload) in self.readRecords():
+            if recordType == CirculationJournal.RECORD_ASSET_STATE:
+                (libID, status, borrowedOn, returnedOn, dueDate) = CirculationJournal.ASSET_STATE.unpack(payload)
+                libAsset = library.findAssetByLibID(libID)
+                if libAsset != None:
+                    libAsset.restoreState(status, CirculationJournal.toDate(borrowedOn),
+                                          CirculationJournal.toDate(returnedOn), CirculationJournal.toDate(dueDate))
+                    changedBooks.add(libAsset.getBook())
+
+            elif recordType == CirculationJournal.RECORD_BOOK_REGISTERED:
+                (bookType, maxBorrowDays, latePenaltyPerDay, firstLibID, nCopies) = \
+                    CirculationJournal.BOOK_REGISTERED.unpack_from(payload)
+                text = payload[CirculationJournal.BOOK_REGISTERED.size:].decode("utf-8")
+                (bookName, bookISBN, *authors) = text.split(CirculationJournal.TEXT_SEPARATOR)
+
+                #the book could already be part of the checkpoint
+                if library.findBookByISBN(bookISBN) == None:
+                    if bookType == CirculationJournal.BOOK_TYPE_DIGITAL:
+                        book = DigitalBook(bookName, bookISBN, (maxBorrowDays, latePenaltyPerDay))
+                    else:
+                        book = PaperBook(bookName, bookISBN)
+
+                    for author in authors:
+                        book.addAuthor(author)
+
+                    for libID in range(firstLibID, firstLibID + nCopies):
+                        bookAsset = LibraryAsset(libID, book)
+                        bookAsset.setStatus(LibraryAsset.AVAILABLE)
+                        book.addAsset(bookAsset)
+
+                    library.addBook(book)
+                library.advanceLibraryIDs(firstLibID + nCopies)
+
+            elif recordType == CirculationJournal.RECORD_BOOK_AUTHORS:
+                (bookISBN, *authors) = payload.decode("utf-8").split(CirculationJournal.TEXT_SEPARATOR)
+                book = library.findBookByISBN(bookISBN)
+                if book != None:
+                    book.setAuthors(authors)
+
+            elif recordType == CirculationJournal.RECORD_BOOK_HOLDS:
+                (bookISBN, *fields) = payload.decode("utf-8").split(CirculationJournal.TEXT_SEPARATOR)
+                book = library.findBookByISBN(bookISBN)
+                if book != None:
+                    book.restoreHolds([(patronID, None if tier == "" else int(tier), None if heldLibID == "" else int(heldLibID))
+                                       for (patronID, tier, heldLibID) in zip(fields[0::3], fields[1::3], fields[2::3])])
+
+            recordCount += 1
+            self._recordsSinceCheckpoint += 1
+
+        #copies reserved by records written without the holds of their book have no holder
+        for book in changedBooks:
+            with book.getLock():
+                book.releaseStrandedCopies(book.getLoadedAssets())
+
+        #the following records are appended right after the last record that was replayed
+        self.truncateTail()
+        return recordCount
+
+    @staticmethod
+    def openLibrary(directory, checkpointInterval = DEFAULT_CHECKPOINT_INTERVAL):
+        """
+        Opens the library kept in the given journal directory: the library is opened from the checkpoint, the
+        journal is replayed and attached to the library so the following operations are journaled. A new
+        directory starts with the default books and an initial checkpoint
+        Arguments:
+            directory           : str -- the directory of the journal and checkpoint files
+            checkpointInterval  : int -- the number of records after which a checkpoint is due
+        Returns:
+            the library
+        """
+        journal = CirculationJournal(directory, checkpointInterval)
+
+        if os.path.exists(journal._checkpointPath):
+            library = Library(snapshot = CatalogueSnapshot(journal._checkpointPath))
+            journal.replay(library)
+        else:
+            library = Library()
+            journal.checkpoint(library)
+
+        library.setJournal(journal)
+        return library
@@ -0,0 +1,281 @@
+"""
+Module that defines the CirculationSimulator class that runs years of synthetic circulation traffic through
+the business logic of the library on a simulated calendar, and the EventScheduler class that drives it
+
+Author: Prof. Magdin Stoica
+E-Mail: magdin.stoica@sheridancollege.ca
+Version 1.0 (Python)
+"""
+from LibraryModule import Library
+from LibraryClockModule import SimulatedClock
+from datetime import date, timedelta
+from collections import deque
+import argparse
+import heapq
+import math
+import random
+
+class EventScheduler:
+    """
+    Priority queue of timed events. Events run in order of their time, events with the same time run in the
+    order they were scheduled.
+
+    Attributes:
+        _events    : list -- heap of (time, sequence number, action, arguments)
+        _sequence  : int  -- the sequence number of the next scheduled event
+        _now       : float -- the time of the event that is running or ran last
+
+    Version 1.0 (Python)
+    """
+
+    def __init__(self):
+        """Initialize a scheduler with no events at time 0"""
+        self._events = []
+        self._sequence = 0
+        self._now = 0.0
+
+    def getNow(self):
+        """Returns the time of the event that is running or ran last"""
+        return self._now
+
+    def schedule(self, eventTime, action, *arguments):
+        """
+        Schedules an action to run at the given time
+        Arguments:
+            eventTime  : float    -- the time the action runs at, not earlier than the current time
+            action     : function -- the action, called with the given arguments
+        """
+        heapq.heappush(self._events, (eventTime, self._sequence, action, arguments))
+        self._sequence += 1
+
+    def getPendingEvents(self):
+        """Returns the (time, sequence number, action, arguments) of the events that did not run yet, in no particular order"""
+        return self._events
+
+    def run(self, endTime):
+        """
+        Runs the events in order until there are no events left or the next event is after the end time
+        Returns:
+            the number of events that ran
+        """
+        eventCount = 0
+        while len(self._events) > 0 and self._events[0][0] <= endTime:
+            (self._now, sequence, action, arguments) = heapq.heappop(self._events)
+            action(*arguments)
+            eventCount += 1
+        return eventCount
+
+
+class CirculationSimulator:
+    """
+    Discrete-event simulation of the circulation of a library. Patrons ask for titles at random times, the
+    requests of a title arriving as a Poisson process. A patron borrows an available copy and keeps it a random
+    number of days. When no copy is available the patron either places a hold and waits for their turn in the
+    hold queue of the book or gives up. All loans, returns and reservations go through the Library and Book business
+    logic, which reads the date from a SimulatedClock that follows the time of the events.
+
+    Times are in days since the start date of the simulation.
+
+    Attributes:
+        _library         : Library        -- the library the traffic runs against
+        _clock           : SimulatedClock -- the clock of the library
+        _startDate       : date           -- the simulated date of time 0
+        _scheduler       : EventScheduler -- the scheduler of the simulation events
+        _random          : Random         -- the random number generator, seeded so runs can be repeated
+        _reserveProbability : float       -- the probability that a patron who finds no copy available reserves one
+        _simulatedDays   : float          -- the number of days simulated by the last run
+        _titles          : dict           -- the (requests per day, mean loan days) of each simulated book
+        _waitingPatrons  : dict           -- the deque of (patron ID, arrival time) of the patrons holding each book,
+                                             in the order of the hold queue of the book
+        _patronCount     : int            -- the number of patrons that arrived, used to give them IDs
+        _statistics      : dict           -- the TitleStatistics of each simulated book
+
+    Version 1.0 (Python)
+    """
+
+    """constant for the default probability that a patron who finds no copy available reserves one"""
+    DEFAULT_RESERVE_PROBABILITY = 0.7
+
+    def __init__(self, startDate = date(2024, 1, 1), seed = 0, reserveProbability = DEFAULT_RESERVE_PROBABILITY):
+        """
+        Initialize the simulator with an empty library
+        Arguments:
+            startDate           : date  -- the simulated date the simulation starts at
+            seed                : int   -- the seed of the random number generator
+            reserveProbability  : float -- the probability that a patron who finds no copy available reserves one
+        """
+        self._startDate = startDate
+        self._clock = SimulatedClock(startDate)
+        self._library = Library(clock = self._clock)
+        self._scheduler = EventScheduler()
+        self._random = random.Random(seed)
+        self._reserveProbability = reserveProbability
+        self._titles = {}
+        self._waitingPatrons = {}
+        self._statistics = {}
+        self._simulatedDays = 0.0
+        self._patronCount = 0
+
+    def getLibrary(self):
+        """Returns the simulated library"""
+        return self._library
+
+    def addTitle(self, bookName, bookISBN, bookType, nCopies, requestsPerDay, meanLoanDays):
+        """
+        Registers a book in the simulated library and generates requests for it
+        Arguments:
+            bookName        : str   -- the name of the book
+            bookISBN        : str   -- the ISBN of the book
+            bookType        : int   -- the type of book, one of the Library.BOOK_TYPE constants
+            nCopies         : int   -- the number of copies of the book
+            requestsPerDay  : float -- the average number of patrons asking for the book each day
+            meanLoanDays    : float -- the average number of days a patron keeps the book
+        Returns:
+            the book
+        """
+        book = self._library.registerBook(bookName, bookISBN, [], bookType, nCopies)
+        self._titles[book] = (requestsPerDay, meanLoanDays)
+        self._waitingPatrons[book] = deque()
+        self._statistics[book] = TitleStatistics(nCopies)
+        self._scheduler.schedule(self._random.expovariate(requestsPerDay), self.onPatronArrives, book)
+        return book
+
+    def advanceClock(self):
+        """Moves the clock of the library to the day of the current event"""
+        self._clock.setToday(self._startDate + timedelta(days = math.floor(self._scheduler.getNow())))
+
+    def lendCopy(self, book, requestTime, patronID = None):
+        """
+        Lends a copy of the book to a patron who asked for it at the given time and schedules its return. A patron
+        holding the book borrows the copy set aside for them
+        """
+        libAsset = self._library.borrowBook(book, patronID)
+        statistics = self._statistics[book]
+        statistics.loanCount += 1
+        statistics.totalWaitDays += self._scheduler.getNow() - requestTime
+        statistics.maxWaitDays = max(statistics.maxWaitDays, self._scheduler.getNow() - requestTime)
+
+        #the patron keeps the book for a random period and could return it late
+        loanDays = self._random.expovariate(1.0 / self._titles[book][1])
+        self._scheduler.schedule(self._scheduler.getNow() + loanDays, self.onCopyReturned, book, libAsset.getLibID(), loanDays)
+
+    def onPatronArrives(self, book):
+        """A patron asks for the book: they borrow a copy, reserve one or give up"""
+        self.advanceClock()
+        statistics = self._statistics[book]
+        statistics.requestCount += 1
+        self._patronCount += 1
+        patronID = f"patron-{self._patronCount}"
+
+        #copies are only available when no patron is waiting, returned copies go to the holders first
+        if book.getAvailableCount() > 0:
+            self.lendCopy(book, self._scheduler.getNow())
+        elif self._random.random() < self._reserveProbability:
+            self._library.reserveBook(book, patronID)
+            statistics.reservationCount += 1
+            self._waitingPatrons[book].append((patronID, self._scheduler.getNow()))
+        else:
+            statistics.lostRequestCount += 1
+
+        #the next patron asking for the book
+        self._scheduler.schedule(self._scheduler.getNow() + self._random.expovariate(self._titles[book][0]),
+                                 self.onPatronArrives, book)
+
+    def onCopyReturned(self, book, libID, loanDays):
+        """A patron returns a copy of the book, which goes to the first waiting patron if there is one"""
+        self.advanceClock()
+        (loanDuration, daysLate, lateFees) = self._library.returnBook(book, libID)
+        statistics = self._statistics[book]
+        statistics.loanedDays += loanDays
+        statistics.totalLateFees += lateFees
+        if daysLate > 0:
+            statistics.lateReturnCount += 1
+
+        #the book set the returned copy aside for the first holder, who picks it up
+        waitingPatrons = self._waitingPatrons[book]
+        if len(waitingPatrons) > 0:
+            (patronID, requestTime) = waitingPatrons.popleft()
+            self.lendCopy(book, requestTime, patronID)
+
+    def run(self, days):
+        """
+        Runs the simulation for the given number of days
+        Returns:
+            the number of events that ran
+        """
+        eventCount = self._scheduler.run(days)
+
+        #the loans still running at the end count towards the utilization until the end
+        endTime = max(days, self._scheduler.getNow())
+        for (eventTime, sequence, action, arguments) in self._scheduler.getPendingEvents():
+            if action == self.onCopyReturned:
+                (book, libID, loanDays) = arguments
+                self._statistics[book].loanedDays += max(0.0, loanDays - (eventTime - endTime))
+        self._simulatedDays = days
+        return eventCount
+
+    def getReport(self):
+        """Returns the text of the report of the utilization, wait times and late fees of each title"""
+        lines = [f"{'Title':<30} {'Copies':>6} {'Requests':>9} {'Loans':>8} {'Lost':>6} {'Util':>6} "
+                 f"{'Avg wait':>9} {'Max wait':>9} {'Late':>6} {'Fees':>10}"]
+        for (book, statistics) in self._statistics.items():
+            utilization = statistics.loanedDays / (statistics.copyCount * self._simulatedDays) if statistics.copyCount > 0 else 0.0
+            averageWait = statistics.totalWaitDays / statistics.loanCount if statistics.loanCount > 0 else 0.0
+            lines.append(f"{book.getName()[:30]:<30} {statistics.copyCount:>6} {statistics.requestCount:>9} "
+                         f"{statistics.loanCount:>8} {statistics.lostRequestCount:>6} {utilization:>6.0%} "
+                         f"{averageWait:>8.1f}d {statistics.maxWaitDays:>8.1f}d {statistics.lateReturnCount:>6} "
+                         f"{statistics.totalLateFees:>10,.2f}")
+        return "\n".join(lines)
+
+
+class TitleStatistics:
+    """
+    The statistics the simulator gathers for one title
+
+    Attributes:
+        copyCount         : int   -- the number of copies of the title
+        requestCount      : int   -- the number of patrons who asked for the title
+        loanCount         : int   -- the number of loans
+        reservationCount  : int   -- the number of patrons who reserved a copy
+        lostRequestCount  : int   -- the number of patrons who gave up because no copy was available
+        loanedDays        : float -- the total number of days copies were on loan
+        totalWaitDays     : float -- the total number of days patrons waited for a copy
+        maxWaitDays       : float -- the longest wait for a copy
+        lateReturnCount   : int   -- the number of copies returned late
+        totalLateFees     : float -- the total late fees
+
+    Version 1.0 (Python)
+    """
+
+    __slots__ = ("copyCount", "requestCount", "loanCount", "reservationCount", "lostRequestCount", "loanedDays",
+                 "totalWaitDays", "maxWaitDays", "lateReturnCount", "totalLateFees")
+
+    def __init__(self, copyCount):
+        """Initialize the statistics of a title with the given number of copies"""
+        self.copyCount = copyCount
+        self.requestCount = 0
+        self.loanCount = 0
+        self.reservationCount = 0
+        self.lostRequestCount = 0
+        self.loanedDays = 0.0
+        self.totalWaitDays = 0.0
+        self.maxWaitDays = 0.0
+        self.lateReturnCount = 0
+        self.totalLateFees = 0.0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description = "Circulation simulator for capacity planning")
+    parser.add_argument("--years", type = float, default = 5.0, help = "the number of simulated years")
+    parser.add_argument("--titles", type = int, default = 20, help = "the number of simulated titles")
+    parser.add_argument("--seed", type = int, default = 0)
+    arguments = parser.parse_args()
+
+    #titles with increasing demand and a number of copies that does not keep up with it
+    simulator = CirculationSimulator(seed = arguments.seed)
+    for iTitle in range(arguments.titles):
+        simulator.addTitle(f"Simulated Title {iTitle}", f"SIM-{iTitle}",
+                           Library.BOOK_TYPE_PAPER if iTitle % 2 == 0 else Library.BOOK_TYPE_DIGITAL,
+                           nCopies = 2 + iTitle % 5, requestsPerDay = 0.015 * (1 + iTitle), meanLoanDays = 21)
+    simulator.run(arguments.years * 365)
+    print(simulator.getReport())
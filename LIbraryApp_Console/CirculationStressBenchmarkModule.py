@@ -0,0 +1,128 @@
+"""
+Module that defines the CirculationStressBenchmark class that checks the circulation operations are safe
+when many desks use the library at the same time and measures how the throughput scales with the desks
+
+Author: Prof. Magdin Stoica
+E-Mail: magdin.stoica@sheridancollege.ca
+Version 1.0 (Python)
+"""
+from LibraryModule import Library
+from LibraryAssetModule import LibraryAsset
+from ExceptionsModule import InvalidTransaction
+import random
+import sys
+import threading
+import time
+
+class CirculationStressBenchmark:
+    """
+    Runs desk threads that borrow, return and reserve a few popular books as fast as they can. Every desk
+    claims each asset it borrows in a shared ownership table; an asset claimed by two desks at once is a double
+    loan. At the end of each run the assets on loan must be exactly the assets the desks are holding.
+
+    Attributes:
+        _bookCount       : int   -- the number of books in the library
+        _copiesPerBook   : int   -- the number of copies of each book
+        _operationsPerDesk : int -- the number of operations performed by each desk
+
+    Version 1.0 (Python)
+    """
+
+    """constant for the number of desks used by the runs of the benchmark"""
+    DESK_COUNTS = (1, 2, 4, 8, 16)
+
+    """constant for the percentage of operations that are reservations"""
+    RESERVE_PERCENT = 5
+
+    def __init__(self, bookCount = 4, copiesPerBook = 50, operationsPerDesk = 20000):
+        """
+        Initialize the benchmark
+        Arguments:
+            bookCount          : int -- the number of books in the library
+            copiesPerBook      : int -- the number of copies of each book
+            operationsPerDesk  : int -- the number of operations performed by each desk
+        """
+        self._bookCount = bookCount
+        self._copiesPerBook = copiesPerBook
+        self._operationsPerDesk = operationsPerDesk
+
+    def runDesks(self, deskCount):
+        """
+        Runs the given number of desk threads against a new library
+        Arguments:
+            deskCount  : int -- the number of desk threads
+        Returns:
+            (operations per second, number of double loans, True if the final state is consistent)
+        """
+        library = Library()
+        books = [library.registerBook(f"Stress Book {iBook}", f"STRESS-{iBook}", [],
+                                      Library.BOOK_TYPE_PAPER if iBook % 2 == 0 else Library.BOOK_TYPE_DIGITAL,
+                                      self._copiesPerBook)
+                 for iBook in range(self._bookCount)]
+
+        owners = {}
+        doubleLoans = []
+        heldAssets = [[] for iDesk in range(deskCount)]
+        startBarrier = threading.Barrier(deskCount + 1)
+
+        def desk(iDesk):
+            rand = random.Random(iDesk)
+            held = heldAssets[iDesk]
+            startBarrier.wait()
+            for iOperation in range(self._operationsPerDesk):
+                book = books[rand.randrange(len(books))]
+                try:
+                    if rand.randrange(100) < CirculationStressBenchmark.RESERVE_PERCENT:
+                        #the desk places a hold and cancels it, which sets a copy aside and releases it
+                        library.reserveBook(book, f"desk-{iDesk}")
+                        library.cancelHold(book, f"desk-{iDesk}")
+                    elif len(held) > 0 and rand.random() < 0.5:
+                        libAsset = held.pop(rand.randrange(len(held)))
+                        del owners[libAsset.getLibID()]
+                        library.returnAsset(libAsset.getLibID())
+                    else:
+                        libAsset = library.borrowBook(book)
+                        #setdefault is atomic so a second desk holding the same asset is always noticed
+                        if owners.setdefault(libAsset.getLibID(), iDesk) != iDesk:
+                            doubleLoans.append(libAsset.getLibID())
+                        held.append(libAsset)
+                except InvalidTransaction:
+                    #all the copies of the book are out
+                    pass
+
+        desks = [threading.Thread(target = desk, args = (iDesk,)) for iDesk in range(deskCount)]
+        for deskThread in desks:
+            deskThread.start()
+        startBarrier.wait()
+        startTime = time.perf_counter()
+        for deskThread in desks:
+            deskThread.join()
+        elapsedSeconds = time.perf_counter() - startTime
+
+        #the assets on loan must be exactly the ones the desks are holding
+        loanedIDs = set(libAsset.getLibID() for book in books for libAsset in book.getAssets()
+                        if libAsset.getStatus() == LibraryAsset.LOANED)
+        heldIDs = set(libAsset.getLibID() for held in heldAssets for libAsset in held)
+        availableConsistent = all(book.getAvailableCount() == sum(1 for libAsset in book.getAssets() if libAsset.isAvailable())
+                                  for book in books)
+
+        return (deskCount * self._operationsPerDesk / elapsedSeconds, len(doubleLoans),
+                loanedIDs == heldIDs and availableConsistent)
+
+    def getReport(self):
+        """Runs the benchmark for each number of desks and returns the text of the report"""
+        lines = [f"{'Desks':>5} {'Ops/s':>12} {'Scaling':>8} {'Double loans':>13} {'Consistent':>11}"]
+        singleDeskThroughput = None
+        for deskCount in CirculationStressBenchmark.DESK_COUNTS:
+            (throughput, doubleLoanCount, isConsistent) = self.runDesks(deskCount)
+            if singleDeskThroughput == None:
+                singleDeskThroughput = throughput
+            lines.append(f"{deskCount:>5} {throughput:>12,.0f} {throughput / singleDeskThroughput:>7.2f}x "
+                         f"{doubleLoanCount:>13} {str(isConsistent):>11}")
+        return "\n".join(lines)
+
+
+if __name__ == "__main__":
+    #the number of operations per desk can be given on the command line
+    operationsPerDesk = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    print(CirculationStressBenchmark(operationsPerDesk = operationsPerDesk).getReport())
@@ -6,8 +6,7 @@ E-Mail: magdin.stoica@sheridancollege.ca
 Version 1.0 (Python)
 """
 from BookModule import Book
-import random
-from datetime import date, timedelta
+from LicenseCatalogueModule import LicenseCatalogue
 
 class DigitalBook(Book):
     """
@@ -17,13 +16,25 @@ class DigitalBook(Book):
 
     Attributes:
         _maxBorrowDays      : int  -- the maximum loan duration for this book calculated based
-                                   on particular license agreements (randomly generated)
+                                   on particular license agreements (read from the license catalogue)
         _latePenaltyPerDay  : float -- the late penalty per day for this book 
 
     Version 1.0 (Python)
     """
 
-    def __init__(self, bookName, bookISBN):
+    #the field variables specific to digital books are declared as slots like the ones of the base class
+    __slots__ = ("_maxBorrowDays", "_latePenaltyPerDay")
+
+    def __init__(self, bookName, bookISBN, loanLicense = None):
+        """
+        Initialize the digital book with the terms of its license agreement
+        Arguments:
+            bookName     : str   -- the book name, required parameter
+            bookISBN     : str   -- the book ISBN, required parameter
+            loanLicense  : tuple -- the (maximum loan duration in days, late penalty per day) of the license, for
+                                    example when the book is loaded from storage. By default the terms are read
+                                    from the default license catalogue
+        """
         Book.__init__(self, bookName, bookISBN)
 
         #define the field variables associated witha digital book
@@ -32,32 +43,48 @@ class DigitalBook(Book):
 
         #calculate the values for maximum loand duration and maximum renews according to the
         #license agreement for this digital book
-        self.determineLoanLicense()
+        if loanLicense == None:
+            self.determineLoanLicense(LicenseCatalogue.getDefaultCatalogue())
+        else:
+            self.setLoanLicense(*loanLicense)
 
-    def determineLoanLicense(self):
+    def determineLoanLicense(self, licenseCatalogue):
         """
-        Detrmines the values for maximum loan duration and maximum renews according to the
-        license agreement for this digital book using randomly generated values according 
-        the following business logic:
-        The maximum loan duration in weeks is generated randomly to be number between 2 and 8 
-        The late penalty is betwen 0.1 and 0.5         
+        Detrmines the values for maximum loan duration and late penalty according to the
+        license agreement for this digital book. The terms are read from the license catalogue, which
+        only asks the license provider when it does not have them in memory. The book keeps the terms
+        so loans and returns never wait for the catalogue
+        Arguments:
+            licenseCatalogue  : LicenseCatalogue -- the catalogue of the license terms of digital books
         """
-        self._maxBorrowDays = random.randint(2*7, 8*7)
-        self._latePenaltyPerDay = 0.1 + random.random()* 0.4
+        (self._maxBorrowDays, self._latePenaltyPerDay) = licenseCatalogue.getTerms(self._bookISBN)
 
-    def borrowBook(self):
+    def getLoanLicense(self):
         """
-        Overrides the base implementation to use the deadline and renewal conditions for paper books
+        Returns the terms of the license agreement for this digital book
         Returns:
-            library asset that is loaned to the library users. The ID of the asset needs to be used to return the asset
+            (maximum loan duration in days, late penalty per day)
+        """
+        return (self._maxBorrowDays, self._latePenaltyPerDay)
+
+    def setLoanLicense(self, maxBorrowDays, latePenaltyPerDay):
+        """
+        Sets the terms of the license agreement for this digital book, for example when the book is
+        loaded from storage
+        Arguments:
+            maxBorrowDays      : int   -- the maximum loan duration in days
+            latePenaltyPerDay  : float -- the late penalty per day
         """
-        #call the base implementation to borrow the book
-        libAsset = Book.borrowBook(self)
+        self._maxBorrowDays = maxBorrowDays
+        self._latePenaltyPerDay = latePenaltyPerDay
 
-        #adjust the due date according to the policy for paper books
-        libAsset.setDueDate(date.today() + timedelta(days = self._maxBorrowDays))
+    def getMaxBorrowDays(self):
+        """Overrides the base implementation to use the maximum loan duration of the license agreement"""
+        return self._maxBorrowDays
 
-        return libAsset
+    def getLatePenaltyPerDay(self):
+        """Returns the late penalty per day determined by the license agreement for this digital book"""
+        return self._latePenaltyPerDay
 
     def returnBook(self, libID):
         """
@@ -72,7 +99,8 @@ class DigitalBook(Book):
             days late       - the number of days the book was late
             late fees       - the late fees applicable if any
         """
-        #call the base implementation to borrow the book
-        (loanDuration, daysLate, lateFees) = Book.returnBook(self, libID)
+        with self._lock:
+            #call the base implementation to borrow the book
+            (loanDuration, daysLate, lateFees) = Book.returnBook(self, libID)
 
-        return (loanDuration, daysLate, daysLate * self._latePenaltyPerDay)
\ No newline at end of file
+            return (loanDuration, daysLate, daysLate * self.getLatePenaltyPerDay())
@@ -0,0 +1,213 @@
+"""
+Module that defines the DueDateIndex class, the index of the loaned assets of a library ordered by due date
+
+Author: Prof. Magdin Stoica
+E-Mail: magdin.stoica@sheridancollege.ca
+Version 1.0 (Python)
+"""
+from bisect import bisect_left, bisect_right
+
+class DueDateIndex:
+    """
+    Sorted collection of (due date, library ID) entries, one per loaned asset. The entries are kept in a list
+    of sorted buckets of bounded size together with the last entry of each bucket. An entry is found with a
+    binary search of the bucket maximums followed by a binary search of one bucket, and it is inserted or removed
+    by moving the entries of that bucket only, so the index stays fast with millions of loans. Range queries
+    find their first entry the same way and then walk the buckets in order.
+
+    The index is updated on every loan and return, which happen far more often than the queries, so the changes
+    are not applied to the buckets right away. Each change only records the new due date of the asset, and the
+    changes are applied to the buckets before the next query or once too many are pending. A loan that is returned
+    before the next query never reaches the buckets.
+
+    Attributes:
+        _buckets     : list -- the sorted lists of entries, each entry is greater than the entries of the
+                               previous buckets
+        _bucketMaxes : list -- the last entry of each bucket
+        _length      : int  -- the number of entries in the buckets
+        _pending     : dict -- the changes not applied to the buckets: for each library ID, the due date of its
+                               entry in the buckets and its latest due date, None when there is no entry
+
+    Version 1.0 (Python)
+    """
+
+    """constant for the number of entries a bucket is filled with. A bucket is split in two once it holds
+    twice as many"""
+    BUCKET_SIZE = 1000
+
+    """constant for the number of assets with pending changes after which the changes are applied without
+    waiting for a query"""
+    PENDING_LIMIT = 100000
+
+    def __init__(self):
+        """Initialize an empty index"""
+        self._buckets = []
+        self._bucketMaxes = []
+        self._length = 0
+        self._pending = {}
+
+    @staticmethod
+    def fromSortedEntries(entries):
+        """
+        Creates an index filled with entries that are already sorted, by cutting them into buckets
+        Arguments:
+            entries  : iterable -- the (due date, library ID) entries in increasing order, without duplicates
+        Returns:
+            the DueDateIndex
+        """
+        dueDateIndex = DueDateIndex()
+        bucket = []
+        for entry in entries:
+            bucket.append(entry)
+            if len(bucket) == DueDateIndex.BUCKET_SIZE:
+                dueDateIndex._buckets.append(bucket)
+                bucket = []
+        if len(bucket) > 0:
+            dueDateIndex._buckets.append(bucket)
+
+        dueDateIndex._bucketMaxes = [bucket[-1] for bucket in dueDateIndex._buckets]
+        dueDateIndex._length = sum(len(bucket) for bucket in dueDateIndex._buckets)
+        return dueDateIndex
+
+    def getLength(self):
+        """Returns the number of entries in the index"""
+        self.applyPending()
+        return self._length
+
+    def update(self, libID, previousDueDate, dueDate):
+        """
+        Records that the due date of an asset changed, to be applied to the buckets before the next query
+        Arguments:
+            libID            : int  -- the library ID of the asset
+            previousDueDate  : date -- the due date the asset was indexed with, None if it was not indexed
+            dueDate          : date -- the new due date of the asset, None to remove the asset from the index
+        """
+        change = self._pending.get(libID)
+        if change == None:
+            self._pending[libID] = (previousDueDate, dueDate)
+            if len(self._pending) > DueDateIndex.PENDING_LIMIT:
+                self.applyPending()
+        else:
+            #the entry in the buckets is the one before the first pending change
+            self._pending[libID] = (change[0], dueDate)
+
+    def add(self, dueDate, libID):
+        """
+        Adds the entry of a loaned asset. An entry that is already in the index is not added again
+        Arguments:
+            dueDate  : date -- the due date of the asset
+            libID    : int  -- the library ID of the asset
+        """
+        self.update(libID, None, dueDate)
+
+    def remove(self, dueDate, libID):
+        """
+        Removes the entry of an asset. An entry that is not in the index is ignored
+        Arguments:
+            dueDate  : date -- the due date of the asset when its entry was added
+            libID    : int  -- the library ID of the asset
+        """
+        self.update(libID, dueDate, None)
+
+    def applyPending(self):
+        """Applies the pending changes to the buckets"""
+        if len(self._pending) == 0:
+            return
+
+        pending = self._pending
+        self._pending = {}
+        for (libID, (previousDueDate, dueDate)) in pending.items():
+            if previousDueDate != dueDate:
+                if previousDueDate != None:
+                    self.removeEntry(previousDueDate, libID)
+                if dueDate != None:
+                    self.insertEntry(dueDate, libID)
+
+    def insertEntry(self, dueDate, libID):
+        """Inserts an entry in its bucket. An entry that is already in the bucket is not inserted again"""
+        entry = (dueDate, libID)
+        if len(self._buckets) == 0:
+            self._buckets.append([entry])
+            self._bucketMaxes.append(entry)
+            self._length = 1
+            return
+
+        #entries greater than all others go to the last bucket
+        iBucket = bisect_left(self._bucketMaxes, entry)
+        if iBucket == len(self._buckets):
+            iBucket -= 1
+        bucket = self._buckets[iBucket]
+        position = bisect_left(bucket, entry)
+        if position < len(bucket) and bucket[position] == entry:
+            return
+
+        bucket.insert(position, entry)
+        self._bucketMaxes[iBucket] = bucket[-1]
+        self._length += 1
+
+        #split a full bucket so inserting and removing never move more than a bucket of entries
+        if len(bucket) > 2 * DueDateIndex.BUCKET_SIZE:
+            self._buckets.insert(iBucket + 1, bucket[DueDateIndex.BUCKET_SIZE:])
+            del bucket[DueDateIndex.BUCKET_SIZE:]
+            self._bucketMaxes.insert(iBucket, bucket[-1])
+
+    def removeEntry(self, dueDate, libID):
+        """Removes an entry from its bucket. An entry that is not in the bucket is ignored"""
+        entry = (dueDate, libID)
+        iBucket = bisect_left(self._bucketMaxes, entry)
+        if iBucket == len(self._buckets):
+            return
+
+        bucket = self._buckets[iBucket]
+        position = bisect_left(bucket, entry)
+        if position == len(bucket) or bucket[position] != entry:
+            return
+
+        del bucket[position]
+        self._length -= 1
+        if len(bucket) == 0:
+            del self._buckets[iBucket]
+            del self._bucketMaxes[iBucket]
+        else:
+            self._bucketMaxes[iBucket] = bucket[-1]
+
+    def findRange(self, startDate = None, endDate = None, limit = None):
+        """
+        Finds the entries with a due date in the given range, in order of due date
+        Arguments:
+            startDate  : date -- the earliest due date, None for no lower bound
+            endDate    : date -- the latest due date, inclusive, None for no upper bound
+            limit      : int  -- the maximum number of entries, None for all of them
+        Returns:
+            the list of (due date, library ID) entries
+        """
+        self.applyPending()
+        entries = []
+        if limit != None and limit <= 0:
+            return entries
+
+        #the first entry not before the start date, found by the same binary searches as an insertion
+        if startDate == None:
+            (iBucket, position) = (0, 0)
+        else:
+            iBucket = bisect_left(self._bucketMaxes, (startDate,))
+            position = 0 if iBucket == len(self._buckets) else bisect_left(self._buckets[iBucket], (startDate,))
+
+        while iBucket < len(self._buckets):
+            bucket = self._buckets[iBucket]
+
+            #the end of the range is in this bucket when the bucket ends after it
+            if endDate == None or bucket[-1][0] <= endDate:
+                bucketEnd = len(bucket)
+            else:
+                bucketEnd = bisect_right(bucket, (endDate, float("inf")), position)
+
+            if limit != None:
+                bucketEnd = min(bucketEnd, position + limit - len(entries))
+            entries.extend(bucket[position:bucketEnd])
+            if bucketEnd < len(bucket) or (limit != None and len(entries) >= limit):
+                break
+
+            (iBucket, position) = (iBucket + 1, 0)
+
+        return entries
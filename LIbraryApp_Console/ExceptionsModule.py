@@ -12,4 +12,8 @@ class OperationCancel(Exception):
 
 class InvalidTransaction(Exception):
      """Exception class used when an invalid trasaction is performed"""
+     pass
+
+class DuplicateBook(InvalidTransaction):
+     """Exception class used when a book is registered with the ISBN of a book that is already in the library"""
      pass
\ No newline at end of file
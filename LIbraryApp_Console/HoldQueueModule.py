@@ -0,0 +1,90 @@
+"""
+Module that defines the HoldQueue class, the queue of the patrons waiting for a copy of a book
+
+Author: Prof. Magdin Stoica
+E-Mail: magdin.stoica@sheridancollege.ca
+Version 1.0 (Python)
+"""
+from collections import deque
+import uuid
+
+class HoldQueue:
+    """
+    Queue of the patrons holding a book. Patrons are served by tier, tier 0 first, and in the order they placed
+    their hold within a tier. Each tier is a deque so the next holder is found and removed in constant time.
+
+    Attributes:
+        _tiers       : list -- the deque of patron IDs of each tier
+        _patronTiers : dict -- the tier of each patron in the queue
+
+    Version 1.0 (Python)
+    """
+
+    """constants for the patron tiers, patrons of a lower tier are served first"""
+    PRIORITY_TIER = 0
+    STANDARD_TIER = 1
+    TIER_COUNT = 2
+
+    def __init__(self):
+        """Initialize an empty queue"""
+        self._tiers = [deque() for iTier in range(HoldQueue.TIER_COUNT)]
+        self._patronTiers = {}
+
+    @staticmethod
+    def newAnonymousPatronID():
+        """
+        Returns a new patron ID for a patron that did not identify themselves. The holds are saved with the library
+        so the ID is random rather than counted from the start of the program, which would give the ID of a
+        patron whose hold was restored
+        """
+        return f"anonymous-{uuid.uuid4().hex}"
+
+    def getLength(self):
+        """Returns the number of patrons in the queue"""
+        return len(self._patronTiers)
+
+    def contains(self, patronID):
+        """Returns True if the patron is in the queue"""
+        return patronID in self._patronTiers
+
+    def addHold(self, patronID, tier = STANDARD_TIER):
+        """
+        Adds a patron at the end of their tier
+        Arguments:
+            patronID  : str -- the ID of the patron
+            tier      : int -- the tier of the patron, one of the TIER constants
+        """
+        if not 0 <= tier < HoldQueue.TIER_COUNT:
+            raise ValueError(f"The patron tier {tier} is not supported")
+        self._tiers[tier].append(patronID)
+        self._patronTiers[patronID] = tier
+
+    def removeHold(self, patronID):
+        """Removes a patron from the queue. The patron must be in the queue"""
+        self._tiers[self._patronTiers.pop(patronID)].remove(patronID)
+
+    def popNextHolder(self):
+        """
+        Removes the patron to be served next from the queue
+        Returns:
+            the ID of the patron or None if the queue is empty
+        """
+        for tierPatrons in self._tiers:
+            if len(tierPatrons) > 0:
+                patronID = tierPatrons.popleft()
+                del self._patronTiers[patronID]
+                return patronID
+        return None
+
+    def getHolds(self):
+        """Returns the (patron ID, tier) of the patrons in the queue in the order they are served"""
+        return [(patronID, tier) for (tier, tierPatrons) in enumerate(self._tiers) for patronID in tierPatrons]
+
+    def getPosition(self, patronID):
+        """
+        Returns the position of a patron in the queue, 1 for the patron served next. The patron must be in the
+        queue. Only the patrons of the same tier are scanned, the other tiers are counted by their length
+        """
+        tier = self._patronTiers[patronID]
+        patronsAhead = sum(len(self._tiers[higherTier]) for higherTier in range(tier))
+        return patronsAhead + self._tiers[tier].index(patronID) + 1
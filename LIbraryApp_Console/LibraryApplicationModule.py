@@ -10,6 +10,11 @@ from ExceptionsModule import OperationCancel
 from BookModule import Book
 from LibraryAssetModule import LibraryAsset
 from ExceptionsModule import InvalidTransaction
+from SQLiteStorageModule import SQLiteLibraryStorage
+from CatalogueSnapshotModule import CatalogueSnapshot
+from CirculationJournalModule import CirculationJournal
+from MetricsRegistryModule import MetricsRegistry
+import sys
 
 class LibraryApplication:
     """
@@ -18,7 +23,12 @@ class LibraryApplication:
     functions on a given book: checking status, borrowing and returning a book
     
     Attributes:
-        _library : Library  -- the library object that holds the books and all library assets
+        _library     : Library  -- the library object that holds the books and all library assets
+        _storagePath : str      -- the path of the database file the library is saved to or None to
+                                   keep the library in memory only
+        _snapshotPath: str      -- the path of the catalogue snapshot the books are loaded from or None
+        _journalDirectory : str -- the directory of the circulation journal the library is recovered from
+                                   and recorded in or None
     
     Author: Magdin Stoica
     Version 1.0 (Python)
@@ -30,7 +40,8 @@ class LibraryApplication:
     #create the MAIN MENU options
     SELECT_BOOK_OPTION = 1
     REGISTER_BOOK_OPTION = 2
-    EXIT_APPLICATION_OPTION = 3
+    RETURN_ASSET_OPTION = 3
+    EXIT_APPLICATION_OPTION = 4
 
     #crate the BOOK MENU option
     CHECK_STATUS_OPTION = 1
@@ -38,12 +49,31 @@ class LibraryApplication:
     RETURN_OPTION = 3
     DISPLAY_BOOK_ASSETS = 4
     EXIT_BOOK_MENU_OPTION = 5
+
+    #create the filters of the library asset inventory
+    ASSET_FILTER_ALL = "all"
+    ASSET_FILTER_AVAILABLE = "available"
+    ASSET_FILTER_LOANED = "loaned"
+    ASSET_FILTER_RESERVED = "reserved"
+    ASSET_FILTER_LATE = "late"
+
+    #the number of library assets displayed at once by the library asset inventory
+    ASSET_PAGE_SIZE = 50
+
+    #the text of the asset statuses
+    ASSET_STATUS_TEXT = {LibraryAsset.NOT_AVAILABLE: "not available", LibraryAsset.AVAILABLE: "available",
+                         LibraryAsset.LOANED: "loaned", LibraryAsset.RESERVED: "reserved"}
     
-    def __init__(self):
+    def __init__(self, storagePath = None, snapshotPath = None, journalDirectory = None):
         """Initialize the field variables of the library object,"""        
         
         #the library this application allows the user to use and manage
         self._library = None
+
+        #the database file the library is saved to and the snapshot the books are loaded from, if any
+        self._storagePath = storagePath
+        self._snapshotPath = snapshotPath
+        self._journalDirectory = journalDirectory
     
 
     def run(self):
@@ -55,7 +85,13 @@ class LibraryApplication:
         try:
             #create the library object that will be used throughout the application
             #NOTE: Why is it better to create it here rather than in the app constructor?
-            self._library = Library()
+            if self._journalDirectory != None:
+                #the library is recovered from its last checkpoint and journal
+                self._library = CirculationJournal.openLibrary(self._journalDirectory)
+            else:
+                storage = None if self._storagePath == None else SQLiteLibraryStorage(self._storagePath)
+                snapshot = None if self._snapshotPath == None else CatalogueSnapshot(self._snapshotPath)
+                self._library = Library(storage, snapshot)
 
             #open the library for business
             self.open()
@@ -80,11 +116,13 @@ class LibraryApplication:
                     self.manageBook(book)
             elif selectedOption == LibraryApplication.REGISTER_BOOK_OPTION:
                 self.onRegisterBook()
+            elif selectedOption == LibraryApplication.RETURN_ASSET_OPTION:
+                self.onReturnAsset()
             elif selectedOption == LibraryApplication.EXIT_APPLICATION_OPTION:
                 #the application is shutting down
                 return
             else:
-                #go again when the user choose 3 instead of 1 or 2
+                #go again when the user chose an option that is not in the menu
                 print('Please enter a valid menu option', "\n")
 
 
@@ -97,7 +135,7 @@ class LibraryApplication:
         """
         while True:
             try:
-                return int(input('\nMain Menu\n\n1: Select Book\n2: Register Book\n3: Exit\n\nEnter a choice: ')) 
+                return int(input('\nMain Menu\n\n1: Select Book\n2: Register Book\n3: Return Book\n4: Exit\n\nEnter a choice: ')) 
             except ValueError:
                 #if the user enters "abc" instead of a number
                 print("Please enter a valid menu option.", "\n")
@@ -118,6 +156,7 @@ class LibraryApplication:
                 print("Please enter a valid menu option.", "\n")
         
 
+    @MetricsRegistry.instrument("app_register_book")
     def onRegisterBook(self):
         """Registers a new book into the library. The user is prompted for all book information including the type of book to register.
         The method obtains all neccessary information and requries the library to register a book given the 
@@ -126,6 +165,7 @@ class LibraryApplication:
         """
         print("Exercise: implement the intractivity and business logic necessary for adding a new book")
 
+    @MetricsRegistry.instrument("app_select_book")
     def onSelectBook(self):
         """Select a book by prompting the user for the book information and remembering which book was selected.
         Prompt the user for performing library services information such borrow and return operations
@@ -142,6 +182,11 @@ class LibraryApplication:
             #try to obtain the book required by the user from the library using the book name
             if len(bookName) > 0:
                 book = self._library.findBookByName(bookName)
+                if book != None:
+                    return book
+
+                #the name does not match exactly, suggest the books whose name or authors are closest to it
+                book = self.promptForSuggestedBook(self._library.searchBooks(bookName))
                 if book != None:
                     return book
                 else:
@@ -155,6 +200,35 @@ class LibraryApplication:
                 else:
                     print('The book was not found. Please select another book.')                
 
+    def promptForSuggestedBook(self, books):
+        """
+        Displays the books suggested by a search and allows the user to pick one of them
+        Arguments:
+            books - the suggested books, best match first
+        Returns:
+            the book picked by the user or None if there are no suggestions or the user picked none
+        """
+        if len(books) == 0:
+            return None
+
+        print('\nDid you mean:')
+        for (bookNumber, book) in enumerate(books, 1):
+            print(f'{bookNumber}: {book.getName()} by {", ".join(book.getAuthors())} (ISBN {book.getISBN()})')
+
+        while True:
+            choice = input('Enter the number of the book or press [ENTER] to search again: ')
+            if len(choice) == 0:
+                return None
+
+            try:
+                bookNumber = int(choice)
+                if 1 <= bookNumber <= len(books):
+                    return books[bookNumber - 1]
+            except ValueError:
+                #if the user enters "abc" instead of a number
+                pass
+            print('Please enter one of the displayed numbers.')
+
     def manageBook(self, book):
         """Manage the book by allowing the user to execute operations on the given book
         Arguments:
@@ -205,6 +279,14 @@ class LibraryApplication:
         
         return bookISBN
 
+    def promptForPatronID(self):
+        """
+        Prompts the user to enter the ID of the patron, which is optional
+        Returns:
+            - the patron ID or an empty string if the patron did not identify themselves
+        """
+        return input('Please enter the patron ID or press [ENTER] to skip: ')
+
     def promptForBookAuthors(self):
         """Prompts the user to enter the authors of the book and allows the user to cancel by pressing ENTER"""
         print("Exercise: implement the intractivity necessary to prompt and obtain a list of authors")
@@ -226,6 +308,7 @@ class LibraryApplication:
         """
         print( "Exercise: implement the intractivity necessary to prompt and obtain the number of copies for the book being registered")
 
+    @MetricsRegistry.instrument("app_check_book_status")
     def onCheckBookStatus(self, book: Book):
         """
         Prints the status of the given book
@@ -239,8 +322,34 @@ class LibraryApplication:
             print(f"{book.getName()} is not currently available. The book will be available on {nextAvailDate}. Would you like to reserve it?")
             userConf = input()
             if userConf.lower() == "yes":
-                book.reserveBook()
+                self.onReserveBook(book)
+
+        #patrons waiting for the book are served in turn as copies are returned
+        if book.getHoldCount() > 0:
+            print(f"{book.getHoldCount()} patron(s) are waiting for {book.getName()}.")
+
+    def onReserveBook(self, book):
+        """
+        Places a hold on the given book for a patron and tells them their position in the hold queue and when
+        the book is expected to be ready for them
+        Arguments:
+            book - the book the library user would like to reserve
+        """
+        patronID = self.promptForPatronID()
+        try:
+            self._library.reserveBook(book, patronID if len(patronID) > 0 else None)
+            if len(patronID) > 0:
+                position = book.getHoldPosition(patronID)
+                if position == 0:
+                    print(f"A copy of {book.getName()} is set aside for {patronID}.")
+                else:
+                    print(f"{patronID} is number {position} in the hold queue. The book is expected to be ready on "
+                          f"{book.estimateHoldDate(patronID)}.")
+        except InvalidTransaction as err:
+            #the patron already has a hold on the book
+            print(err, "\n")
 
+    @MetricsRegistry.instrument("app_borrow_book")
     def onBorrowBook(self, book:Book):
         """
         Confirms the operation and performs the loan operation. Handles any errors related to incorrect 
@@ -249,12 +358,15 @@ class LibraryApplication:
             book - the book the library user would like to borrow
         """
         try:
-            libAsset = book.borrowBook()
+            #a patron whose hold is ready picks up the copy set aside for them
+            patronID = self.promptForPatronID() if book.getHoldCount() > 0 or book.getAvailableCount() == 0 else ""
+            libAsset = self._library.borrowBook(book, patronID if len(patronID) > 0 else None)
             print(f"The loan for'{book.getName()}' is confirmed.\nThe book is due on {libAsset.getDueDate()}. Please use ID {libAsset.getLibID()} when returning the book.")
         except InvalidTransaction as err:
             #the book could not be borrowed. The reason is in the exception object
             print(err, "\n")
 
+    @MetricsRegistry.instrument("app_return_book")
     def onReturnBook(self, book):
         """
         Obtains necessary information, confirms the operation and performs the return operation. 
@@ -271,7 +383,7 @@ class LibraryApplication:
                     libId = int(inputAmount)
                 
                     #return the book asset using the ID provided by the user and check for late fees
-                    (loanDuration, daysLate, lateFees) = book.returnBook(libId)
+                    (loanDuration, daysLate, lateFees) = self._library.returnBook(book, libId)
                     print(f"The book '{book.getName()}' was loaned for {loanDuration.days} days and was returned successfully.")
 
                     if daysLate > 0:
@@ -288,6 +400,38 @@ class LibraryApplication:
                 #the book could not be returned. The reason is in the exception object
                 print(err, "\n")      
 
+    @MetricsRegistry.instrument("app_return_asset")
+    def onReturnAsset(self):
+        """
+        Obtains the library ID of the asset being returned and returns it without requiring the user to
+        select the book first. Handles any errors related to incorrect information
+        """
+        while True:
+            try:
+                inputID = input('Please enter the library ID of the book you are returning or type [ENTER] to exit: ')
+
+                if len(inputID) > 0:
+                    libId = int(inputID)
+
+                    #the library finds the book the asset belongs to and checks for late fees
+                    (book, loanDuration, daysLate, lateFees) = self._library.returnAsset(libId)
+                    print(f"The book '{book.getName()}' was loaned for {loanDuration.days} days and was returned successfully.")
+
+                    if daysLate > 0:
+                        print(f"The book was late by {daysLate}. Please pay ${lateFees} at the cashier.")
+
+                #the return was completed or user entered nothing so break from the infinite loop
+                return
+
+            except ValueError:
+                #the user must have entered and invalid (e.g. "abc") ID
+                print('Invalid entry. Please enter the library ID for the book you are returning.', "\n")
+
+            except InvalidTransaction as err:
+                #the book could not be returned. The reason is in the exception object
+                print(err, "\n")
+
+    @MetricsRegistry.instrument("app_display_book_assets")
     def onDisplayBookAssets(self, book: Book):
         """
         Displays all the library assets that correspond to the given book and their information such
@@ -295,21 +439,97 @@ class LibraryApplication:
         Arguments:
             book - the book the librarian would like to see the details of
         """
-        print(f"\n============== Library Asset Inventory ==================\n")
-        print(f"Book Name: {book.getName()}")
-        print(f"Author(s): {book.getAuthors()}")
-        print(f"ISBN: {book.getISBN()}\n")
-        
-        print("Library Assets:")
+        #a book with a single page of assets is displayed right away
+        sys.stdout.write(self.formatAssetSummary(book))
+        if book.getAssetCount() <= LibraryApplication.ASSET_PAGE_SIZE:
+            self.displayBookAssets(book)
+            return
+
+        #large inventories are displayed a page at a time and can be narrowed down to the assets of interest
+        assetFilter = self.promptForAssetFilter()
+        pageNumber = 0
+        while self.displayBookAssets(book, assetFilter, pageNumber):
+            if input("Press [ENTER] for the next page or Q to stop: ").strip().lower() == "q":
+                return
+            pageNumber += 1
+
+    def promptForAssetFilter(self):
+        """
+        Prompts the user for the assets of the inventory to display
+        Returns:
+            one of the ASSET_FILTER constants
+        """
+        assetFilters = (LibraryApplication.ASSET_FILTER_ALL, LibraryApplication.ASSET_FILTER_AVAILABLE,
+                        LibraryApplication.ASSET_FILTER_LOANED, LibraryApplication.ASSET_FILTER_RESERVED,
+                        LibraryApplication.ASSET_FILTER_LATE)
+        while True:
+            assetFilter = input(f"Display which assets ({', '.join(assetFilters)}) [all]: ").strip().lower()
+            if len(assetFilter) == 0:
+                return LibraryApplication.ASSET_FILTER_ALL
+            if assetFilter in assetFilters:
+                return assetFilter
+            print("Please enter one of the displayed filters.")
+
+    def formatAssetSummary(self, book):
+        """
+        Returns the header of the library asset inventory of the given book. The number of assets in each status
+        comes from the counters of the book so the header does not go through the assets
+        """
+        statusCounts = book.getStatusCounts()
+        return (f"\n============== Library Asset Inventory ==================\n\n"
+                f"Book Name: {book.getName()}\n"
+                f"Author(s): {', '.join(book.getAuthors())}\n"
+                f"ISBN: {book.getISBN()}\n\n"
+                f"Copies: {book.getAssetCount()}, available: {statusCounts[LibraryAsset.AVAILABLE]}, "
+                f"loaned: {statusCounts[LibraryAsset.LOANED]}, reserved: {statusCounts[LibraryAsset.RESERVED]}, "
+                f"not available: {statusCounts[LibraryAsset.NOT_AVAILABLE]}, holds: {book.getHoldCount()}\n\n")
+
+    def displayBookAssets(self, book, assetFilter = ASSET_FILTER_ALL, pageNumber = 0, pageSize = ASSET_PAGE_SIZE):
+        """
+        Displays a page of the library assets of the given book that match the filter. The page is written
+        at once instead of printing each asset
+        Arguments:
+            book        - the book whose assets are displayed
+            assetFilter - one of the ASSET_FILTER constants
+            pageNumber  - the number of the page starting at 0
+            pageSize    - the number of assets in a page
+        Returns:
+            True if there are more assets after the page
+        """
+        #the date is read once for the whole page
+        today = book.getClock().today()
+        lines = ["Library Assets:"]
+        (matchCount, firstMatch) = (0, pageNumber * pageSize)
         for libAsset in book.getAssets():
-            if libAsset.getStatus() == LibraryAsset.AVAILABLE:
-                print(f"\033[92m{libAsset.getLibID()}: available\033[0m")
+            status = libAsset.getStatus()
+            daysLate = 0 if status == LibraryAsset.AVAILABLE else libAsset.getLatePeriod(today).days
+            isLate = daysLate > 0
+            if assetFilter == LibraryApplication.ASSET_FILTER_AVAILABLE and status != LibraryAsset.AVAILABLE or \
+               assetFilter == LibraryApplication.ASSET_FILTER_LOANED and status != LibraryAsset.LOANED or \
+               assetFilter == LibraryApplication.ASSET_FILTER_RESERVED and status != LibraryAsset.RESERVED or \
+               assetFilter == LibraryApplication.ASSET_FILTER_LATE and not isLate:
+                continue
+
+            #the assets before the page are only counted
+            matchCount += 1
+            if matchCount <= firstMatch:
+                continue
+            if matchCount > firstMatch + pageSize:
+                break
+
+            if status == LibraryAsset.AVAILABLE:
+                lines.append(f"\033[92m{libAsset.getLibID()}: available\033[0m")
+            elif isLate:
+                lines.append(f"\033[91m{libAsset.getLibID()}: LATE, borrowed on {libAsset.getBorrowedOn()} "
+                             f"due on {libAsset.getDueDate()} on loan for {libAsset.getLoanDuration(today).days} day(s), "
+                             f"late for {daysLate} day(s)\033[0m")
             else:
-                if libAsset.getLatePeriod().days > 0:
-                    print(f"\033[91m{libAsset.getLibID()}: LATE, borrowed on {libAsset.getBorrowedOn()}",
-                      f"due on {libAsset.getDueDate()} on loan for {libAsset.getLoanDuration().days} day(s), ",
-                      f"late for {libAsset.getLatePeriod().days} day(s)\033[0m")                        
-                else:
-                    print(f"\033[93m{libAsset.getLibID()}: {libAsset.getStatus()}, borrowed on {libAsset.getBorrowedOn()}",
-                        f"due on {libAsset.getDueDate()} on loan for {libAsset.getLoanDuration().days} days\033[0m")
+                lines.append(f"\033[93m{libAsset.getLibID()}: {LibraryApplication.ASSET_STATUS_TEXT[status]}, "
+                             f"borrowed on {libAsset.getBorrowedOn()} due on {libAsset.getDueDate()} "
+                             f"on loan for {libAsset.getLoanDuration(today).days} days\033[0m")
+
+        if matchCount == 0:
+            lines.append("No library assets match the filter.")
+        sys.stdout.write("\n".join(lines) + "\n")
+        return matchCount > firstMatch + pageSize
 
@@ -6,7 +6,7 @@ E-Mail: magdin.stoica@sheridancollege.ca
 Version 1.0 (Python)
 """
 from ExceptionsModule import InvalidTransaction
-from datetime import date, timedelta
+from datetime import timedelta
 
 class LibraryAsset:
     """
@@ -25,6 +25,10 @@ class LibraryAsset:
     Version 1.0 (Python)
     """
 
+    #the field variables are declared as slots so assets do not carry a per-instance dictionary. There are
+    #millions of assets in a large library and the dictionaries would dominate the memory used by the program
+    __slots__ = ("_libID", "_book", "_status", "_borrowedOn", "_returnedOn", "_dueDate")
+
     #these are class variables which are not specific to an instance, they are not field variables
     #they are shared by all instances and are accessible using the name of the class with the DOT notation
     
@@ -34,6 +38,9 @@ class LibraryAsset:
     LOANED = 2
     RESERVED = 3
 
+    """constant for the number of asset statuses, used to size the status counters"""
+    STATUS_COUNT = 4
+
 
     def __init__(self, libID, book):
         """
@@ -58,19 +65,29 @@ class LibraryAsset:
         upon borrowing"""
         return self._libID
 
+    def getBook(self):
+        """Returns the book this library asset is a copy of"""
+        return self._book
+
     def getStatus(self):
         """Returns the status of the asset, whether it is available, on loan or reserved"""
         return self._status
 
     def setStatus(self, newStatus):
         """Modifies the status of the library asset to a new value"""
+        self._book.onAssetChanging(self)
+        previousStatus = self._status
         self._status = newStatus
 
-        if self._status == LibraryAsset.AVAILABLE:
+        #a copy that is available or set aside for a holder is not on loan so it keeps no loan dates
+        if self._status == LibraryAsset.AVAILABLE or self._status == LibraryAsset.RESERVED:
             self._borrowedOn = None
             self._returnedOn = None
             self._dueDate = None
 
+        #let the book know so it can keep track of its available and loaned assets
+        self._book.onAssetChanged(self, previousStatus)
+
 
     def getBorrowedOn(self):
         """Returns the date the asset was borrowed on or null if the asset is not borrowed"""
@@ -78,6 +95,7 @@ class LibraryAsset:
 
     def setBorrowedOn(self, borrowedDate):
         """Sets the date the asset was borrowed to the given date"""
+        self._book.onAssetChanging(self)
         self._borrowedOn = borrowedDate
 
     def getReturnedOn(self):
@@ -86,6 +104,7 @@ class LibraryAsset:
 
     def setReturnedOn(self, returnedDate):
         """Sets the returned date to the given date"""
+        self._book.onAssetChanging(self)
         self._returnedOn = returnedDate
 
     def  getDueDate(self):
@@ -93,20 +112,58 @@ class LibraryAsset:
         return self._dueDate
 
     def setDueDate(self, newDueDate):
+        """Sets the due-date the asset must be returned on"""
+        self._book.onAssetChanging(self)
         self._dueDate = newDueDate
 
-    def getLoanDuration(self):
-        """Returns the duration of the loan if the book has been returned"""
+        #let the book know so it can keep track of the earliest due date
+        self._book.onAssetChanged(self, self._status)
+
+    def restoreState(self, status, borrowedOn, returnedOn, dueDate):
+        """
+        Restores the status and loan dates of the asset, for example when the asset is loaded from storage. Restoring
+        the state is not a change of the asset so the read snapshots of the library do not save its previous state
+        Arguments:
+            status      : int  -- the status of the asset
+            borrowedOn  : date -- the date the asset was borrowed on or None
+            returnedOn  : date -- the date the asset was returned on or None
+            dueDate     : date -- the date the asset is due or None
+        """
+        previousStatus = self._status
+        self._status = status
+        self._borrowedOn = borrowedOn
+        self._returnedOn = returnedOn
+        self._dueDate = dueDate
+
+        #let the book know so it can keep track of its available and loaned assets
+        self._book.onAssetChanged(self, previousStatus)
+
+    def getLoanDuration(self, today = None):
+        """
+        Returns the duration of the loan if the book has been returned
+        Arguments:
+            today  : date -- the current date, optional. Callers going through many assets read the clock once
+        """
         if self._borrowedOn == None:
             return timedelta()
 
-        dateToCompare = date.today() if self._returnedOn == None else self._returnedOn
+        if self._returnedOn != None:
+            dateToCompare = self._returnedOn
+        else:
+            dateToCompare = self._book.getClock().today() if today == None else today
 
         return dateToCompare - self._borrowedOn
 
-    def getLatePeriod(self):
-        """Returns the late period if the book has been returned"""
-        dateToCompare = date.today() if self._returnedOn == None else self._returnedOn
+    def getLatePeriod(self, today = None):
+        """
+        Returns the late period if the book has been returned
+        Arguments:
+            today  : date -- the current date, optional. Callers going through many assets read the clock once
+        """
+        if self._returnedOn != None:
+            dateToCompare = self._returnedOn
+        else:
+            dateToCompare = self._book.getClock().today() if today == None else today
 
         if self._dueDate == None or dateToCompare < self._dueDate:
             return timedelta()
@@ -0,0 +1,67 @@
+"""
+Module that defines the LibraryClock class, the source of the current date for the library, and the
+SimulatedClock class whose date is set by a simulation
+
+Author: Prof. Magdin Stoica
+E-Mail: magdin.stoica@sheridancollege.ca
+Version 1.0 (Python)
+"""
+from datetime import date, timedelta
+
+class LibraryClock:
+    """
+    Provides the current date to the library. Loans, returns and late periods use the clock of the library
+    instead of asking the system for the date so they can run on a simulated calendar.
+
+    Attributes:
+        - the system clock has no attributes, it reads the date of the computer
+
+    Version 1.0 (Python)
+    """
+
+    """the clock that reads the date of the computer, used by libraries that are not given a clock"""
+    _systemClock = None
+
+    @staticmethod
+    def getSystemClock():
+        """Returns the clock that reads the date of the computer"""
+        return LibraryClock._systemClock
+
+    def today(self):
+        """Returns the current date"""
+        return date.today()
+
+
+class SimulatedClock(LibraryClock):
+    """
+    Clock whose date only changes when it is set or advanced, used to run the library business logic
+    on a simulated calendar
+
+    Attributes:
+        _today : date -- the current simulated date
+
+    Version 1.0 (Python)
+    """
+
+    def __init__(self, startDate):
+        """
+        Initialize the clock
+        Arguments:
+            startDate  : date -- the simulated date the clock starts at
+        """
+        self._today = startDate
+
+    def today(self):
+        """Returns the current simulated date"""
+        return self._today
+
+    def setToday(self, today):
+        """Sets the current simulated date"""
+        self._today = today
+
+    def advance(self, days):
+        """Moves the simulated date forward by the given number of days"""
+        self._today += timedelta(days = days)
+
+
+LibraryClock._systemClock = LibraryClock()
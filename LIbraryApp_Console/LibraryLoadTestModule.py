@@ -0,0 +1,125 @@
+"""
+Module that defines the LibraryLoadTest class, a local load test client for the LibraryService that
+reports the latency percentiles of the requests
+
+Author: Prof. Magdin Stoica
+E-Mail: magdin.stoica@sheridancollege.ca
+Version 1.0 (Python)
+"""
+from LibraryModule import Library
+from LibraryServiceModule import LibraryService
+import argparse
+import asyncio
+import json
+import random
+import time
+
+class LibraryLoadTest:
+    """
+    Simulates self-checkout kiosks against a LibraryService. Each kiosk keeps one connection open and sends
+    its requests one after the other: it checks the status of a random book, borrows it and returns the
+    borrowed asset. The latency of every request is recorded and the percentiles are reported.
+
+    Attributes:
+        _host             : str  -- the address of the service
+        _port             : int  -- the port of the service
+        _kioskCount       : int  -- the number of concurrent kiosks
+        _requestsPerKiosk : int  -- the number of requests sent by each kiosk
+        _isbns            : list -- the ISBNs of the books the kiosks use
+        _latencies        : list -- the latency of each request in seconds
+        _statusCounts     : dict -- the number of responses for each HTTP status
+
+    Version 1.0 (Python)
+    """
+
+    def __init__(self, host, port, kioskCount, requestsPerKiosk, isbns):
+        """Initialize the load test"""
+        self._host = host
+        self._port = port
+        self._kioskCount = kioskCount
+        self._requestsPerKiosk = requestsPerKiosk
+        self._isbns = isbns
+        self._latencies = []
+        self._statusCounts = {}
+
+    async def sendRequest(self, reader, writer, method, path):
+        """Sends one request on an open connection and returns the status and JSON response"""
+        startTime = time.perf_counter()
+        writer.write(f"{method} {path} HTTP/1.1\r\nHost: {self._host}\r\nContent-Length: 0\r\n\r\n".encode("ascii"))
+        await writer.drain()
+
+        headerBytes = await reader.readuntil(b"\r\n\r\n")
+        lines = headerBytes.decode("latin-1").split("\r\n")
+        status = int(lines[0].split(" ")[1])
+        contentLength = 0
+        for line in lines[1:]:
+            if line.lower().startswith("content-length:"):
+                contentLength = int(line.split(":", 1)[1])
+        response = json.loads(await reader.readexactly(contentLength))
+
+        self._latencies.append(time.perf_counter() - startTime)
+        self._statusCounts[status] = self._statusCounts.get(status, 0) + 1
+        return (status, response)
+
+    async def runKiosk(self, iKiosk):
+        """Sends the requests of one kiosk"""
+        rand = random.Random(iKiosk)
+        (reader, writer) = await asyncio.open_connection(self._host, self._port)
+        try:
+            requestCount = 0
+            while requestCount < self._requestsPerKiosk:
+                isbn = rand.choice(self._isbns)
+                await self.sendRequest(reader, writer, "GET", f"/books/{isbn}/status")
+                (status, response) = await self.sendRequest(reader, writer, "POST", f"/books/{isbn}/borrow")
+                requestCount += 2
+                if status == 200:
+                    await self.sendRequest(reader, writer, "POST", f"/assets/{response['libID']}/return")
+                    requestCount += 1
+        finally:
+            writer.close()
+
+    async def run(self):
+        """
+        Runs all the kiosks concurrently
+        Returns:
+            the text of the load test report
+        """
+        startTime = time.perf_counter()
+        await asyncio.gather(*(self.runKiosk(iKiosk) for iKiosk in range(self._kioskCount)))
+        elapsedSeconds = time.perf_counter() - startTime
+
+        latencies = sorted(self._latencies)
+        def percentile(fraction):
+            return latencies[min(len(latencies) - 1, int(fraction * len(latencies)))] * 1000
+
+        return "\n".join([f"Kiosks: {self._kioskCount}",
+                          f"Requests: {len(latencies):,} in {elapsedSeconds:.2f} s ({len(latencies) / elapsedSeconds:,.0f} requests/s)",
+                          f"Latency p50: {percentile(0.50):.2f} ms",
+                          f"Latency p99: {percentile(0.99):.2f} ms",
+                          f"Latency max: {latencies[-1] * 1000:.2f} ms",
+                          f"Responses by status: {dict(sorted(self._statusCounts.items()))}"])
+
+
+async def runLocalLoadTest(kioskCount, requestsPerKiosk, port):
+    """Starts a service on a library with test books in this process and runs the load test against it"""
+    library = Library()
+    isbns = [library.registerBook(f"Load Test Book {iBook}", f"LOAD-{iBook}", [],
+                                  Library.BOOK_TYPE_PAPER if iBook % 2 == 0 else Library.BOOK_TYPE_DIGITAL, 50).getISBN()
+             for iBook in range(100)]
+
+    serviceTask = asyncio.create_task(LibraryService(library).serve("127.0.0.1", port))
+    await asyncio.sleep(0.2)
+    try:
+        print(await LibraryLoadTest("127.0.0.1", port, kioskCount, requestsPerKiosk, isbns).run())
+    finally:
+        serviceTask.cancel()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description = "Load test of the library HTTP/JSON service")
+    parser.add_argument("--kiosks", type = int, default = 1000)
+    parser.add_argument("--requests", type = int, default = 30, help = "the number of requests per kiosk")
+    parser.add_argument("--port", type = int, default = LibraryService.DEFAULT_PORT + 1)
+    arguments = parser.parse_args()
+
+    asyncio.run(runLocalLoadTest(arguments.kiosks, arguments.requests, arguments.port))
@@ -9,13 +9,61 @@ from BookModule import Book
 from PaperBookModule import PaperBook
 from DigitalBookModule import DigitalBook
 from LibraryAssetModule import LibraryAsset
+from ExceptionsModule import InvalidTransaction, DuplicateBook
+from CatalogueSnapshotModule import CatalogueSnapshot, SnapshotAssetSource
+from BookSearchIndexModule import BookSearchIndex
+from TransactionResultModule import TransactionResult
+from MetricsRegistryModule import MetricsRegistry
+from LibraryClockModule import LibraryClock
+from HoldQueueModule import HoldQueue
+from DueDateIndexModule import DueDateIndex
+from LicenseCatalogueModule import LicenseCatalogue
+from ReadSnapshotModule import ReadSnapshot
+from contextlib import contextmanager, ExitStack
+from collections import OrderedDict
+from datetime import timedelta
+import threading
+import unicodedata
 
 class Library:
     """
     Represents a collection of books in a library and provides business logic for library services
 
     Attributes:
-        _bookList : list -- the list of books managed by the library
+        _bookList      : list -- the list of books managed by the library
+        _booksByISBN   : dict -- index of the books in the library by normalized ISBN
+        _booksByName   : dict -- index of the books in the library by normalized book name. Several books
+                                 can share a name so each entry is the list of books with that name
+        _booksByAuthor : dict -- index of the books in the library by normalized author name. Each entry is the
+                                 list of books of the author in the order they were added to the library
+        _assetsByLibID : dict -- index of all the library assets of all books by library ID
+        _searchIndex   : BookSearchIndex -- search index of the names and authors of the books
+        _storage       : SQLiteLibraryStorage -- the storage the library is persisted to or None if the
+                                 library only lives in memory
+        _snapshot      : CatalogueSnapshot -- the snapshot the books are loaded from on demand or None
+        _snapshotBooksLoaded : dict -- the book loaded from each index of the snapshot that was already loaded
+        _snapshotBooksIndexed : bool -- True once the snapshot books that are not loaded were added to the
+                                 search index and to the snapshot author index
+        _snapshotBooksByAuthor : dict -- the indexes of the snapshot books of each normalized author name
+        _journal       : CirculationJournal -- the journal the changes are recorded in or None
+        _clock         : LibraryClock -- the clock that gives the current date to the circulation operations
+        _statusCounts  : list -- the number of assets of the library in each status, indexed by status. The
+                                 assets of the snapshot books that are not loaded yet are counted too
+        _dueDateIndex  : DueDateIndex -- index of the loaned assets of the library by due date
+        _snapshotDueDatesIndexed : bool -- True once the loaned assets of the snapshot books that are not loaded
+                                 were added to the due date index
+        _circulationStatsLock : Lock -- serializes the updates of the status counters and of the due date index.
+                                 Books update them while they hold their own lock so the lock of the library
+                                 cannot be used
+        _assetCache    : OrderedDict -- the snapshot books with assets in memory that did not change, least
+                                 recently used first. Their assets are dropped when there are too many of them
+        _assetCacheSize : int -- the number of snapshot books that can keep their assets in memory
+        _assetCacheLock : Lock -- serializes the updates of the asset cache
+        _licenseCatalogue : LicenseCatalogue -- the catalogue the license terms of new digital books are read from
+        _readSnapshots : tuple -- the open read snapshots of the library. The tuple is replaced when a snapshot is
+                                 opened or closed so the desks go through it without locking
+        _lock          : RLock -- serializes the changes to the collection of books and the book indexes.
+                                 Circulation operations only lock the book they are performed on
 
     Version 1.0 (Python)   
    """
@@ -30,17 +78,86 @@ class Library:
     """constant for the initial starting point for library asset IDs"""
     DEFAULT_LIBID_START = 100
 
-    def __init__(self):
-        """Initialize the field variables of the library collection object"""
+    """constants representing the circulation operations processed by processTransactions"""
+    TRANSACTION_BORROW = "borrow"
+    TRANSACTION_RETURN = "return"
+    TRANSACTION_RESERVE = "reserve"
+
+    """constant for the default number of circulation commands processed together"""
+    TRANSACTION_CHUNK_SIZE = 1024
+
+    """constant for the default number of books in a page of the books of an author"""
+    AUTHOR_PAGE_SIZE = 20
+
+    """constant for the default number of snapshot books that can keep their unchanged assets in memory"""
+    ASSET_CACHE_SIZE = 10000
+
+    def __init__(self, storage = None, snapshot = None, clock = None, assetCacheSize = ASSET_CACHE_SIZE,
+                 licenseCatalogue = None):
+        """
+        Initialize the field variables of the library collection object
+        Parameters:
+            storage  - the storage the books are loaded from and saved to, optional. Without storage
+                       the library only lives in memory
+            snapshot - the catalogue snapshot the books are loaded from when they are first looked up, optional
+            clock    - the clock that gives the current date, optional. Without a clock the library uses the
+                       date of the computer
+            assetCacheSize - the number of snapshot books that can keep their unchanged assets in memory
+            licenseCatalogue - the catalogue the license terms of new digital books are read from, optional. Without
+                       a catalogue the library uses the default license catalogue
+        """
         
         #create the list of books in the library collection
         self._bookList = []
+        self._lock = threading.RLock()
+        self._clock = LibraryClock.getSystemClock() if clock == None else clock
+        self._licenseCatalogue = LicenseCatalogue.getDefaultCatalogue() if licenseCatalogue == None else licenseCatalogue
+
+        #create the indexes used to find books without going through the whole list of books
+        self._booksByISBN = {}
+        self._booksByName = {}
+        self._booksByAuthor = {}
+        self._assetsByLibID = {}
+        self._searchIndex = BookSearchIndex()
+
+        #count the assets in each status as they change so the totals never require a pass over the assets
+        self._statusCounts = [0] * LibraryAsset.STATUS_COUNT
+        self._dueDateIndex = DueDateIndex()
+        self._circulationStatsLock = threading.Lock()
+
+        #the assets of the snapshot books are loaded when they are used and dropped when they are not used
+        self._assetCache = OrderedDict()
+        self._assetCacheSize = max(1, assetCacheSize)
+        self._assetCacheLock = threading.Lock()
+
+        #reports read the assets through snapshots that the assets save their state to before they change
+        self._readSnapshots = ()
 
         #define the starting point for the IDs given to library assets
         self._libIDGeneratorSeed = Library.DEFAULT_LIBID_START
 
-        #create default books that are part of the library inventory
-        self.createDefaultBooks()
+        #load the books saved by previous runs of the application
+        self._storage = storage
+        if self._storage != None:
+            for book in self._storage.loadBooks():
+                self.addBook(book)
+
+        #books in the snapshot are only loaded when they are looked up
+        self._snapshot = snapshot
+        self._snapshotBooksLoaded = {}
+        self._snapshotBooksIndexed = False
+        self._snapshotBooksByAuthor = {}
+        self._snapshotDueDatesIndexed = False
+        if self._snapshot != None:
+            self.advanceLibraryIDs(self._snapshot.getNextLibID())
+            self.addStatusCounts(self._snapshot.countAssetStatuses(), 1)
+
+        #the journal is set once the library is recovered
+        self._journal = None
+
+        #create default books that are part of the library inventory when the library is empty
+        if len(self._bookList) == 0 and self._snapshot == None:
+            self.createDefaultBooks()
 
     def createDefaultBooks(self):
         """
@@ -48,38 +165,414 @@ class Library:
         even if no books are registered. New books can be registered by the user through the registration
         menu
         """
-        #create a paper book
-        demoPaperBook = PaperBook("Lord of the Rings", "978-0261102385")
-        demoPaperBook.getAuthors().append("J.R.R. Tolkien")
+        #another process sharing the storage could register the default books first, in which case they are
+        #loaded from the storage when they are looked up
+        try:
+            #create a paper book with five library assets
+            self.registerBook("Lord of the Rings", "978-0261102385", ["J.R.R. Tolkien"], Library.BOOK_TYPE_PAPER, 5)
+
+            #create a digital book with five library assets
+            self.registerBook("Harry Potter", "978-1408898659", ["J.K. Rowling"], Library.BOOK_TYPE_DIGITAL, 5)
+        except DuplicateBook:
+            pass
+
+    @staticmethod
+    def normalizeISBN(isbn):
+        """
+        Returns the key used to index a book by its ISBN. Hyphens and spaces are ignored and the check
+        digit X is not case sensitive so "978-0261102385" and "9780261102385" refer to the same book
+        """
+        return isbn.replace("-", "").replace(" ", "").upper()
+
+    @staticmethod
+    def normalizeName(bookName):
+        """
+        Returns the key used to index a book by its name. The name is not case sensitive and extra spaces
+        between or around the words are ignored
+        """
+        return " ".join(bookName.split()).casefold()
+
+    @staticmethod
+    def normalizeAuthor(author):
+        """
+        Returns the key used to index a book by one of its authors. The name is not case sensitive, extra spaces
+        are ignored and accents are removed so "Gabriel García Márquez" and "gabriel garcia marquez" refer to
+        the same author
+        """
+        decomposed = unicodedata.normalize("NFKD", " ".join(author.split()).casefold())
+        return "".join(character for character in decomposed if not unicodedata.combining(character))
+
+    def getClock(self):
+        """Returns the clock that gives the current date to the circulation operations"""
+        return self._clock
+
+    def getLicenseCatalogue(self):
+        """Returns the catalogue the license terms of new digital books are read from"""
+        return self._licenseCatalogue
+
+    def getLock(self):
+        """Returns the lock that serializes the changes to the collection of books and the book indexes"""
+        return self._lock
+
+    def addBook(self, book):
+        """
+        Adds the given book to the library collection and indexes it by name and ISBN
+        Parameters:
+            book - the book to add to the library
+        """
+        with self._lock:
+            self._bookList.append(book)
+            self._booksByISBN[Library.normalizeISBN(book.getISBN())] = book
+
+            #when two books share a name the first one registered is the one found by name
+            self._booksByName.setdefault(Library.normalizeName(book.getName()), []).append(book)
+            self._searchIndex.addEntry(book, book.getName(), book.getAuthors())
+            for authorKey in {Library.normalizeAuthor(author) for author in book.getAuthors()}:
+                self._booksByAuthor.setdefault(authorKey, []).append(book)
+
+            #index the copies of the book so they can be returned using only their library ID
+            with book.getLock():
+                book.setLibrary(self)
+                self.addStatusCounts(book.getStatusCounts(), 1)
+                with self._circulationStatsLock:
+                    for (libID, dueDate) in book.getLoanedDueDates():
+                        self._dueDateIndex.add(dueDate, libID)
+
+                #the assets that are not loaded are indexed when the book loads them
+                for libAsset in book.getLoadedAssets():
+                    self.onAssetAdded(libAsset)
+
+    def removeBook(self, book):
+        """
+        Removes the given book from the library collection and from the book indexes
+        Parameters:
+            book - the book to remove from the library
+        """
+        with self._lock:
+            self._bookList.remove(book)
+
+            isbnKey = Library.normalizeISBN(book.getISBN())
+            if self._booksByISBN.get(isbnKey) is book:
+                del self._booksByISBN[isbnKey]
+
+            #other books with the same name remain in the index
+            nameKey = Library.normalizeName(book.getName())
+            namedBooks = self._booksByName.get(nameKey, [])
+            if book in namedBooks:
+                namedBooks.remove(book)
+                if len(namedBooks) == 0:
+                    del self._booksByName[nameKey]
+            self._searchIndex.removeEntry(book)
+            self.unindexAuthors(book, book.getAuthors())
+
+            #the copies of the book are no longer part of the library inventory
+            for libAsset in book.getAssets():
+                if self._assetsByLibID.get(libAsset.getLibID()) is libAsset:
+                    del self._assetsByLibID[libAsset.getLibID()]
+            with book.getLock():
+                self.addStatusCounts(book.getStatusCounts(), -1)
+                with self._circulationStatsLock:
+                    for (libID, dueDate) in book.getLoanedDueDates():
+                        self._dueDateIndex.remove(dueDate, libID)
+                book.setLibrary(None)
+
+    def unindexAuthors(self, book, authors):
+        """
+        Removes the given book from the author index entries of the given authors
+        Parameters:
+            book    - the book to remove from the author index
+            authors - the authors the book is indexed by
+        """
+        for authorKey in {Library.normalizeAuthor(author) for author in authors}:
+            authorBooks = self._booksByAuthor.get(authorKey, [])
+            if book in authorBooks:
+                authorBooks.remove(book)
+                if len(authorBooks) == 0:
+                    del self._booksByAuthor[authorKey]
+
+    def onAuthorsChanged(self, book, previousAuthors):
+        """
+        Updates the author and search indexes after the authors of one of the books in the library were changed
+        and saves the new authors. Called by the book while it holds the lock of the library
+        Parameters:
+            book            - the book whose authors were changed
+            previousAuthors - the authors of the book before the change
+        """
+        with self._lock:
+            self.unindexAuthors(book, previousAuthors)
+            for authorKey in {Library.normalizeAuthor(author) for author in book.getAuthors()}:
+                self._booksByAuthor.setdefault(authorKey, []).append(book)
+            self._searchIndex.addEntry(book, book.getName(), book.getAuthors())
+
+            if self._storage != None:
+                self._storage.saveAuthors(book)
+
+            if self._journal != None:
+                self._journal.waitDurable(self._journal.logBookAuthors(book))
+
+    def onAssetAdded(self, libAsset):
+        """
+        Indexes a library asset that was added to one of the books in the library
+        Parameters:
+            libAsset - the library asset that was added
+        """
+        self._assetsByLibID[libAsset.getLibID()] = libAsset
+
+    def onAssetsLoaded(self, book, libAssets):
+        """
+        Indexes the assets a snapshot book loaded when they were first used and drops the assets of the snapshot
+        books used least recently when too many books have their assets in memory. Called by the book while it
+        holds its own lock
+        Parameters:
+            book      - the book that loaded the assets
+            libAssets - the assets that were loaded
+        """
+        with self._circulationStatsLock:
+            for libAsset in libAssets:
+                self._assetsByLibID[libAsset.getLibID()] = libAsset
+                if libAsset.getStatus() == LibraryAsset.LOANED and libAsset.getDueDate() != None:
+                    self._dueDateIndex.add(libAsset.getDueDate(), libAsset.getLibID())
+
+        if book.hasUnchangedAssets():
+            self.touchLoadedBook(book)
+        self.evictLoadedBooks(book)
+
+    def touchLoadedBook(self, book):
+        """Marks a snapshot book whose unchanged assets are in memory as the most recently used"""
+        if len(book.getLoadedAssets()) > 0:
+            with self._assetCacheLock:
+                self._assetCache[book] = None
+                self._assetCache.move_to_end(book)
+
+    def evictLoadedBooks(self, usedBook):
+        """
+        Drops the assets of the snapshot books used least recently until no more books than the size of the cache
+        have their assets in memory. The assets are loaded again from the snapshot when they are used. Books whose
+        assets changed keep them and leave the cache, books that are in use are skipped
+        Parameters:
+            usedBook - the book that is in use by the caller and must keep its assets
+        """
+        with self._assetCacheLock:
+            candidateCount = len(self._assetCache) - self._assetCacheSize
+
+        while candidateCount > 0:
+            candidateCount -= 1
+            with self._assetCacheLock:
+                if len(self._assetCache) <= self._assetCacheSize:
+                    return
+                (book, ignored) = self._assetCache.popitem(last = False)
+
+            if book is usedBook or not book.hasUnchangedAssets():
+                continue
+
+            #the lock is only tried so a desk using the book is never waited for while another book is locked
+            if not book.getLock().acquire(blocking = False):
+                with self._assetCacheLock:
+                    self._assetCache[book] = None
+                continue
+            try:
+                libAssets = book.unloadAssets()
+            finally:
+                book.getLock().release()
+
+            for libAsset in libAssets:
+                if self._assetsByLibID.get(libAsset.getLibID()) is libAsset:
+                    del self._assetsByLibID[libAsset.getLibID()]
+
+    def onAssetChanged(self, libID, previousStatus, status, previousDueDate, dueDate):
+        """
+        Updates the status counters and the due date index after an asset of one of the books in the library
+        changed its status or its due date. Called by the book while it holds its own lock
+        Parameters:
+            libID           - the library ID of the asset
+            previousStatus  - the status of the asset before the change, None for an asset that was just added
+            status          - the status of the asset after the change
+            previousDueDate - the due date the asset was indexed with, None if it was not on loan
+            dueDate         - the due date of the asset after the change, None if it is not on loan
+        """
+        with self._circulationStatsLock:
+            if status != previousStatus:
+                if previousStatus != None:
+                    self._statusCounts[previousStatus] -= 1
+                self._statusCounts[status] += 1
+
+            if dueDate != previousDueDate:
+                self._dueDateIndex.update(libID, previousDueDate, dueDate)
+
+    def onAssetChanging(self, libAsset):
+        """
+        Saves the state of an asset that is about to change in the open read snapshots. Called by the book of the
+        asset, which is locked
+        Parameters:
+            libAsset - the asset that is about to change
+        """
+        for readSnapshot in self._readSnapshots:
+            readSnapshot.preserveAssetState(libAsset)
+
+    def openReadSnapshot(self):
+        """
+        Opens a read snapshot of the books and assets of the library. Opening the snapshot waits for the operations
+        in progress so it does not see half of an operation, afterwards the desks are not blocked by the snapshot.
+        The books of the catalogue snapshot that are not loaded are not loaded by the read snapshot.
+        The snapshot must be closed when it is no longer used because the assets save their state for it as long as
+        it is open
+        Returns:
+            the ReadSnapshot
+        """
+        #the books of the catalogue snapshot that are not loaded cannot change while the library is locked and the
+        #read snapshot reads them from the catalogue snapshot, so only the loaded books are locked
+        with self._lock, ExitStack() as bookLocks:
+            self.loadNewStorageBooks()
+            books = list(self._bookList)
+            for book in books:
+                bookLocks.enter_context(book.getLock())
+
+            readSnapshot = ReadSnapshot(self, books, self._libIDGeneratorSeed, self._snapshot, self._snapshotBooksLoaded)
+            self._readSnapshots = self._readSnapshots + (readSnapshot,)
+        return readSnapshot
+
+    def closeReadSnapshot(self, readSnapshot):
+        """
+        Closes a read snapshot so the assets stop saving their state for it
+        Parameters:
+            readSnapshot - the snapshot opened by openReadSnapshot
+        """
+        with self._lock:
+            self._readSnapshots = tuple(openSnapshot for openSnapshot in self._readSnapshots if openSnapshot is not readSnapshot)
+
+    @contextmanager
+    def readSnapshot(self):
+        """Opens a read snapshot for the with block and closes it at the end of the block"""
+        readSnapshot = self.openReadSnapshot()
+        try:
+            yield readSnapshot
+        finally:
+            self.closeReadSnapshot(readSnapshot)
+
+    def addStatusCounts(self, statusCounts, sign):
+        """
+        Adds the asset counts of a book to the status counters of the library, or subtracts them
+        Parameters:
+            statusCounts - the number of assets in each status, indexed by status
+            sign         - 1 to add the counts, -1 to subtract them
+        """
+        with self._circulationStatsLock:
+            for (status, count) in enumerate(statusCounts):
+                self._statusCounts[status] += sign * count
+
+    def getStatusCounts(self):
+        """Returns a copy of the number of assets of the library in each status, indexed by status"""
+        with self._circulationStatsLock:
+            return list(self._statusCounts)
+
+    def getStatusCount(self, status):
+        """Returns the number of assets of the library in the given status"""
+        return self._statusCounts[status]
+
+    def checkStatusCounts(self):
+        """
+        Verifies the status counters of the library and of its books against a full recount of the assets. The
+        books are locked during the check so no counter changes while it is compared with the recount. The assets
+        of the snapshot books that are not loaded are recounted from the snapshot without loading the books
+        Returns:
+            the list of (book, counters, recount) of the books whose counters do not match, with None instead of
+            the book for the counters of the library. The list is empty when all counters are correct
+        """
+        discrepancies = []
+        with self._lock, ExitStack() as bookLocks:
+            self.loadNewStorageBooks()
+            books = list(self._bookList)
+            for book in books:
+                bookLocks.enter_context(book.getLock())
 
-        #add five library assets for this book
-        for iAsset in range(5):
-            #create the asset corresponding to this book
-            demoBookAsset = LibraryAsset(self.determineLibraryID(), demoPaperBook)
-            demoBookAsset.setStatus(LibraryAsset.AVAILABLE)
+            libraryRecount = [0] * LibraryAsset.STATUS_COUNT
+            for book in books:
+                (statusCounts, recount) = (book.getStatusCounts(), book.countAssetStatuses())
+                if statusCounts != recount:
+                    discrepancies.append((book, statusCounts, recount))
+                for (status, count) in enumerate(recount):
+                    libraryRecount[status] += count
 
-            #add the asset to the book
-            demoPaperBook.getAssets().append(demoBookAsset)
+            if self._snapshot != None:
+                for bookIndex in range(self._snapshot.getBookCount()):
+                    if bookIndex not in self._snapshotBooksLoaded:
+                        (firstAsset, assetCount) = self._snapshot.readBookRecord(bookIndex)[6:]
+                        for (status, count) in enumerate(self._snapshot.countAssetStatuses(firstAsset, assetCount)):
+                            libraryRecount[status] += count
 
-        #add the book to the library
-        self._bookList.append(demoPaperBook)
+            statusCounts = self.getStatusCounts()
+            if statusCounts != libraryRecount:
+                discrepancies.append((None, statusCounts, libraryRecount))
 
-        #create a digital book
-        demoDigitalBook = DigitalBook("Harry Potter", "978-1408898659")
-        demoDigitalBook.getAuthors().append("J.K. Rowling")
+        return discrepancies
 
-        #add five library assets for this book
-        for iAsset in range(5):
-            #create the asset corresponding to this book
-            demoBookAsset = LibraryAsset(self.determineLibraryID(), demoDigitalBook)
-            demoBookAsset.setStatus(LibraryAsset.AVAILABLE)
+    def indexSnapshotDueDates(self):
+        """
+        Adds the loaned assets of the snapshot books that are not loaded to the due date index. This is done once,
+        the first time the due dates are queried, so opening a snapshot does not read all its assets
+        """
+        with self._lock:
+            if self._snapshot == None or self._snapshotDueDatesIndexed:
+                return
 
-            #add the asset to the book
-            demoDigitalBook.getAssets().append(demoBookAsset)
+            #the loaded assets indexed themselves and could have changed since the snapshot was written
+            with self._circulationStatsLock:
+                for (libID, bookIndex, dueDate) in self._snapshot.readLoanedDueDates():
+                    book = self._snapshotBooksLoaded.get(bookIndex)
+                    if book == None or not book.isAssetLoaded(libID):
+                        self._dueDateIndex.add(dueDate, libID)
+            self._snapshotDueDatesIndexed = True
 
-        #add the book to the library
-        self._bookList.append(demoDigitalBook)
+    def findDueDateEntries(self, startDate = None, endDate = None, limit = None):
+        """
+        Reads the entries of the due date index in the given range without looking up the assets
+        Parameters:
+            startDate - the earliest due date, None for no lower bound
+            endDate   - the latest due date, inclusive, None for no upper bound
+            limit     - the maximum number of entries, None for all of them
+        Returns:
+            the list of (due date, library ID) of the assets on loan in order of due date
+        """
+        self.indexSnapshotDueDates()
+        with self._circulationStatsLock:
+            return self._dueDateIndex.findRange(startDate, endDate, limit)
 
+    def findAssetsDue(self, startDate = None, endDate = None, limit = None):
+        """
+        Finds the assets on loan with a due date in the given range using the due date index, so only the
+        assets in the range are looked at
+        Parameters:
+            startDate - the earliest due date, None for no lower bound
+            endDate   - the latest due date, inclusive, None for no upper bound
+            limit     - the maximum number of assets, None for all of them. With no lower bound the assets
+                        due first are returned
+        Returns:
+            the list of library assets in order of due date. Assets returned while the list is gathered are left out
+        """
+        entries = self.findDueDateEntries(startDate, endDate, limit)
+
+        #the assets are looked up once the index is released because it could load books from the snapshot
+        dueAssets = []
+        for (dueDate, libID) in entries:
+            libAsset = self.findAssetByLibID(libID)
+            if libAsset != None and libAsset.getStatus() == LibraryAsset.LOANED and libAsset.getDueDate() == dueDate:
+                dueAssets.append(libAsset)
+        return dueAssets
+
+    def findOverdueAssets(self, minDaysLate = 1, limit = None, reportDate = None):
+        """
+        Finds the assets on loan that are late by at least the given number of days
+        Parameters:
+            minDaysLate - the minimum number of days the assets are late
+            limit       - the maximum number of assets, None for all of them. The assets late the longest are returned first
+            reportDate  - the date the late periods are calculated for, today by default
+        Returns:
+            the list of library assets in order of due date
+        """
+        reportDate = self._clock.today() if reportDate == None else reportDate
+        return self.findAssetsDue(None, reportDate - timedelta(days = minDaysLate), limit)
+
+    @MetricsRegistry.instrument("find_book_by_name")
     def findBookByName(self, bookName):
         """
         Returns the book with the given name or null if no book with that name can be found
@@ -88,15 +581,27 @@ class Library:
         Return:
             the book object with the given name
         """ 
-        #go through all the books in the list until one is found with the given book name
-        for book in self._bookList:
-            if book.getName() == bookName:
-                return book
-        
-        #if the program got here it means there was no book with the given book name
-        return None
+        #the name index has no entry if there is no book with the given book name
+        nameKey = Library.normalizeName(bookName)
+        namedBooks = self._booksByName.get(nameKey)
+        if namedBooks != None:
+            if namedBooks[0].hasUnchangedAssets():
+                self.touchLoadedBook(namedBooks[0])
+            return namedBooks[0]
 
+        #the book could be in the snapshot and not loaded yet
+        book = None
+        if self._snapshot != None:
+            book = self.loadSnapshotBook(self._snapshot.findBookIndexByName(nameKey))
 
+        #the book could have been registered by another process sharing the storage
+        if book == None and self._storage != None:
+            book = self.loadStorageBook(self._storage.findBookByName(nameKey))
+
+        return book
+
+
+    @MetricsRegistry.instrument("find_book_by_isbn")
     def findBookByISBN(self, isbn):
         """
         Returns the book with the given ISBN or null if no book with that ISBN can be found
@@ -105,22 +610,597 @@ class Library:
         Return:
             the book object with the given ISBN
         """ 
-        #go through all the books in the list until one is found with the given book ISBN
-        for book in self._bookList:
-            if book.getISBN() == isbn:
-                return book
-        
-        #if the program got here it means there was no book with the given book ISBN
-        return None   
+        #the ISBN index returns None if there is no book with the given book ISBN
+        isbnKey = Library.normalizeISBN(isbn)
+        book = self._booksByISBN.get(isbnKey)
+        if book != None:
+            if book.hasUnchangedAssets():
+                self.touchLoadedBook(book)
+
+        #the book could be in the snapshot and not loaded yet
+        elif self._snapshot != None:
+            book = self.loadSnapshotBook(self._snapshot.findBookIndexByISBN(isbnKey))
+
+        #the book could have been registered by another process sharing the storage
+        if book == None and self._storage != None:
+            book = self.loadStorageBook(self._storage.findBookByISBN(isbnKey))
+
+        return book
+
+    def searchBooks(self, query, limit = BookSearchIndex.DEFAULT_RESULT_LIMIT):
+        """
+        Finds the books whose name or authors match the words of the query. Words can be the beginning of a
+        word of the name or authors and can be misspelled
+        Parameters:
+            query - the words to look for
+            limit - the maximum number of books to return
+        Return:
+            the list of matching books, best match first
+        """
+        with self._lock:
+            self.indexSnapshotBooks()
+            self.loadNewStorageBooks()
+
+            #books are keys of the search index once loaded and snapshot indexes before
+            books = []
+            for key in self._searchIndex.search(query, limit):
+                books.append(key if isinstance(key, Book) else self.loadSnapshotBook(key))
+            return books
+
+    def indexSnapshotBooks(self):
+        """
+        Adds the snapshot books that are not loaded yet to the search index and to the snapshot author index. The
+        snapshot is only read the first time the library is searched or the books of an author are looked up
+        """
+        with self._lock:
+            if self._snapshot == None or self._snapshotBooksIndexed:
+                return
+
+            for bookIndex in range(self._snapshot.getBookCount()):
+                (bookName, authors) = self._snapshot.readBookText(bookIndex)
+                for authorKey in {Library.normalizeAuthor(author) for author in authors}:
+                    self._snapshotBooksByAuthor.setdefault(authorKey, []).append(bookIndex)
+                if bookIndex not in self._snapshotBooksLoaded:
+                    self._searchIndex.addEntry(bookIndex, bookName, authors)
+            self._snapshotBooksIndexed = True
+
+    def findBooksByAuthor(self, author, pageNumber = 0, pageSize = AUTHOR_PAGE_SIZE):
+        """
+        Returns one page of the books of the given author
+        Parameters:
+            author     - the name of the author, not case sensitive and with or without accents
+            pageNumber - the number of the page to return, starting with 0
+            pageSize   - the number of books in a page
+        Return:
+            the list of books in the page, empty when the page is past the last book of the author
+        """
+        authorKey = Library.normalizeAuthor(author)
+        with self._lock:
+            self.loadNewStorageBooks()
+
+            #the books of the author that are in the snapshot are loaded so they are part of the author index
+            if self._snapshot != None:
+                self.indexSnapshotBooks()
+                for bookIndex in self._snapshotBooksByAuthor.get(authorKey, []):
+                    self.loadSnapshotBook(bookIndex)
+
+            authorBooks = self._booksByAuthor.get(authorKey, [])
+            return authorBooks[pageNumber * pageSize:(pageNumber + 1) * pageSize]
+
+    def countBooksByAuthor(self, author):
+        """Returns the number of books of the given author, used to display the number of pages"""
+        authorKey = Library.normalizeAuthor(author)
+        with self._lock:
+            self.loadNewStorageBooks()
+            bookCount = len(self._booksByAuthor.get(authorKey, []))
+
+            #the snapshot books of the author that are not loaded are counted without loading them
+            if self._snapshot != None:
+                self.indexSnapshotBooks()
+                for bookIndex in self._snapshotBooksByAuthor.get(authorKey, []):
+                    if bookIndex not in self._snapshotBooksLoaded:
+                        bookCount += 1
+            return bookCount
+
+    def findAssetByLibID(self, libID):
+        """
+        Returns the library asset with the given library ID or null if no asset has that ID
+        Parameters:
+            libID - the library ID of the asset
+        Return:
+            the library asset with the given ID
+        """
+        libAsset = self._assetsByLibID.get(libID)
+
+        #the asset could belong to a book in the snapshot that is not loaded yet or did not load the asset yet
+        if libAsset == None and self._snapshot != None:
+            bookIndex = self._snapshot.findBookIndexByLibID(libID)
+            book = self.loadSnapshotBook(bookIndex)
+            if book != None:
+                libAsset = book.getAsset(libID)
+
+        #the asset could belong to a book registered by another process sharing the storage
+        if libAsset == None and self._storage != None:
+            book = self.loadStorageBook(self._storage.findBookByLibID(libID))
+            if book != None:
+                libAsset = book.getAsset(libID)
+
+        return libAsset
+
+    def findBookByLibID(self, libID):
+        """
+        Returns the book that has the asset with the given library ID or null if no asset has that ID. The asset
+        itself is not loaded when its book is in the snapshot
+        Parameters:
+            libID - the library ID of the asset
+        """
+        libAsset = self._assetsByLibID.get(libID)
+        if libAsset != None:
+            return libAsset.getBook()
+
+        book = None
+        if self._snapshot != None:
+            book = self.loadSnapshotBook(self._snapshot.findBookIndexByLibID(libID))
+        if book == None and self._storage != None:
+            book = self.loadStorageBook(self._storage.findBookByLibID(libID))
+        return book
+
+    def loadSnapshotBook(self, bookIndex):
+        """
+        Loads the book at the given index of the snapshot and adds it to the library, unless it was loaded before
+        Parameters:
+            bookIndex - the index of the book in the snapshot, -1 if the book was not found in the snapshot
+        Returns:
+            the book, loaded now or before, or None if the index is -1 or the book was removed from the library
+        """
+        #two desks looking up the same book must not both load it. The desk that finds the book loaded by the
+        #other desk after waiting for the lock returns that book
+        with self._lock:
+            if bookIndex < 0:
+                return None
+
+            book = self._snapshotBooksLoaded.get(bookIndex)
+            if book != None:
+                return book if book.getLibrary() is self else None
+
+            book = self._snapshot.loadBook(bookIndex)
+            self._snapshotBooksLoaded[bookIndex] = book
+
+            #the book replaces the snapshot entry in the search index and its assets, which the counters
+            #already include, are counted again when it is added
+            self._searchIndex.removeEntry(bookIndex)
+            self.addStatusCounts(book.getStatusCounts(), -1)
+            self.addBook(book)
+            return book
+
+    def loadStorageBook(self, book):
+        """
+        Adds a book that was loaded from the storage because another process registered it after this library
+        loaded its books, unless the book was added in the meantime
+        Parameters:
+            book - the book loaded from the storage, None if the storage has no such book
+        Returns:
+            the book of the library with the ISBN of the given book or None if no book was given
+        """
+        if book == None:
+            return None
+
+        with self._lock:
+            loadedBook = self._booksByISBN.get(Library.normalizeISBN(book.getISBN()))
+            if loadedBook != None:
+                #the version the storage recorded for the book just loaded could be newer than the loaded book
+                self._storage.invalidateBook(loadedBook.getISBN())
+                return loadedBook
+
+            self.addBook(book)
+            return book
+
+    def loadNewStorageBooks(self):
+        """
+        Adds the books registered by other processes sharing the storage since this library loaded its books, so
+        the whole catalogue is searched and reported on
+        """
+        if self._storage == None:
+            return
+
+        with self._lock:
+            for book in self._storage.loadNewBooks(lambda isbn: Library.normalizeISBN(isbn) in self._booksByISBN):
+                self.loadStorageBook(book)
+
+    def getBooks(self):
+        """
+        Returns all the books of the library, loading the books of the snapshot that were not looked up yet.
+        Used by reports that need the whole catalogue
+        """
+        with self._lock:
+            if self._snapshot != None:
+                for bookIndex in range(self._snapshot.getBookCount()):
+                    self.loadSnapshotBook(bookIndex)
+            self.loadNewStorageBooks()
+
+            return self._bookList
+
+    def saveSnapshot(self, filePath):
+        """
+        Writes a catalogue snapshot of all the books of the library and the current state of their assets. The
+        snapshot books that are not loaded are copied from the snapshot without loading them and keep their index
+        Parameters:
+            filePath - the path of the snapshot file
+        Returns:
+            the list of the books written, in the format of CatalogueSnapshot.write, to give to switchSnapshot
+        """
+        with self._lock:
+            self.loadNewStorageBooks()
+
+            snapshotBooks = []
+            savedBooks = []
+            if self._snapshot != None:
+                for bookIndex in range(self._snapshot.getBookCount()):
+                    book = self._snapshotBooksLoaded.get(bookIndex)
+                    if book == None:
+                        savedBooks.append((self._snapshot, bookIndex))
+                    else:
+                        snapshotBooks.append(book)
+                        if book.getLibrary() is self:
+                            savedBooks.append(book)
+
+            #the books that are not in the snapshot follow the snapshot books
+            snapshotBooks = set(snapshotBooks)
+            savedBooks.extend(book for book in self._bookList if book not in snapshotBooks)
+
+            CatalogueSnapshot.write(filePath, savedBooks, self._libIDGeneratorSeed,
+                                    Library.normalizeISBN, Library.normalizeName)
+            return savedBooks
+
+    def switchSnapshot(self, snapshot, savedBooks):
+        """
+        Makes the library load its books from a snapshot it saved, such as a new checkpoint, instead of the snapshot
+        it was opened with. The library stops referencing the previous snapshot, which is closed once no desk reads
+        it anymore
+        Parameters:
+            snapshot   - the snapshot written by saveSnapshot
+            savedBooks - the list of books returned by saveSnapshot
+        """
+        with self._lock:
+            previousIndexes = {book: bookIndex for (bookIndex, book) in self._snapshotBooksLoaded.items()}
+            bookIndexes = {}
+            movedBooks = []
+            snapshotBooksLoaded = {}
+            for (bookIndex, book) in enumerate(savedBooks):
+                if isinstance(book, tuple):
+                    bookIndexes[book[1]] = bookIndex
+                    if book[1] != bookIndex:
+                        movedBooks.append((book[1], bookIndex))
+                    continue
+
+                snapshotBooksLoaded[bookIndex] = book
+                if book in previousIndexes:
+                    bookIndexes[previousIndexes[book]] = bookIndex
+
+                #the assets of the asset source are the first assets of the book in the new snapshot
+                if book.getSourceAssetCount() > 0:
+                    firstAsset = snapshot.readBookRecord(bookIndex)[6]
+                    book.moveAssetSource(SnapshotAssetSource(snapshot, firstAsset, book.getSourceAssetCount()))
+
+            #the books that are not loaded keep their index unless a loaded snapshot book before them was removed
+            if self._snapshotBooksIndexed:
+                for (previousIndex, bookIndex) in movedBooks:
+                    self._searchIndex.removeEntry(previousIndex)
+                for (previousIndex, bookIndex) in movedBooks:
+                    self._searchIndex.addEntry(bookIndex, *snapshot.readBookText(bookIndex))
+            previousBookCount = 0 if self._snapshot == None else self._snapshot.getBookCount()
+            if len(movedBooks) > 0 or len(bookIndexes) < previousBookCount:
+                self._snapshotBooksByAuthor = {authorKey: [bookIndexes[bookIndex] for bookIndex in authorBooks
+                                                           if bookIndex in bookIndexes]
+                                               for (authorKey, authorBooks) in self._snapshotBooksByAuthor.items()}
+
+            self._snapshot = snapshot
+            self._snapshotBooksLoaded = snapshotBooksLoaded
+
+    def returnAsset(self, libID):
+        """
+        Returns a borrowed asset back to the library using only the library ID of the asset. The book the asset
+        belongs to is found through the asset index and applies its own business logic for late fees. If the ID
+        does not match an existing asset the method will throw an exception
+        Parameters:
+            libID - the ID of the library item being returned
+        Returns:
+            book            - the book the returned asset is a copy of
+            loan duration   - the duration of the loan as a timedelta object
+            days late       - the number of days the book was late
+            late fees       - the late fees applicable if any
+        """
+        libAsset = self.findAssetByLibID(libID)
+        if libAsset == None:
+            raise InvalidTransaction(f"An asset with ID = {libID} was not found in the library")
+
+        #the book (paper or digital) calculates the late fees according to its own policy
+        book = libAsset.getBook()
+        (loanDuration, daysLate, lateFees) = self.returnBook(book, libID)
+
+        return (book, loanDuration, daysLate, lateFees)
+
+    def isPersistent(self):
+        """Returns True if the changes of the library are saved to storage or recorded in a journal"""
+        return self._storage != None or self._journal != None
+
+    def hasBlockingLookups(self):
+        """
+        Returns True if the operations of the library can wait for the disk: the library is persistent or looking
+        up a book can load it from the catalogue snapshot
+        """
+        return self.isPersistent() or self._snapshot != None
+
+    def setJournal(self, journal):
+        """
+        Sets the journal the following changes of the library are recorded in
+        Parameters:
+            journal - the circulation journal
+        """
+        self._journal = journal
+
+    def checkpoint(self, onlyIfDue = False):
+        """
+        Writes a checkpoint of the library to its journal, which empties the journal. The books are locked
+        during the checkpoint so it contains no half-completed operation
+        Parameters:
+            onlyIfDue - True to skip the checkpoint if it is no longer due once the books are locked
+        """
+        if self._journal == None:
+            return
+
+        #the snapshot books that are not loaded cannot change while the library is locked
+        with self._lock, ExitStack() as bookLocks:
+            for book in self._bookList:
+                bookLocks.enter_context(book.getLock())
+
+            #another desk could have completed the checkpoint while the books were being locked
+            if not onlyIfDue or self._journal.isCheckpointDue():
+                self._journal.checkpoint(self)
+
+    @contextmanager
+    def circulationTransaction(self, book, waitDurable = True):
+        """
+        Runs a circulation operation on the given book as a single transaction of the library storage. The with
+        block receives a list to which it adds the assets changed by the operation so they can be saved and
+        recorded in the journal. The holds on the book are recorded too when the operation changed them. The
+        transaction completes once the journal records are durable
+        Parameters:
+            book        - the book the operation is performed on
+            waitDurable - False to return without waiting for the journal records, in which case the caller
+                          must call flushJournal before reporting the results of the operation
+        """
+        #the book stays locked until the changes are recorded so the journal has the changes of each
+        #asset in the order they were made
+        with book.getLock():
+            previousHolds = None if self._journal == None else book.getHolds()
+            if self._storage == None:
+                changedAssets = []
+                yield changedAssets
+            else:
+                with self._storage.circulationTransaction(book) as changedAssets:
+                    yield changedAssets
+
+            if self._journal != None:
+                journalSeq = self._journal.logAssetStates(changedAssets)
+                if book.getHolds() != previousHolds:
+                    journalSeq = self._journal.logBookHolds(book)
+
+        #other desks can use the book while the journal records are written together with theirs
+        if self._journal != None and waitDurable:
+            self._journal.waitDurable(journalSeq)
+            if self._journal.isCheckpointDue():
+                self.checkpoint(onlyIfDue = True)
+
+    def flushJournal(self):
+        """Waits until all the changes recorded in the journal are durable"""
+        if self._journal != None:
+            self._journal.flush()
+            if self._journal.isCheckpointDue():
+                self.checkpoint(onlyIfDue = True)
+
+    def processTransactions(self, commands, chunkSize = None):
+        """
+        Processes a stream of circulation commands such as the scans of a kiosk or of a return-sorting machine.
+        The commands are processed in chunks: the commands of a chunk are grouped by book so each book is looked
+        up and locked once per chunk, and the journal records of the whole chunk are made durable together.
+        Commands on the same book are processed in the order they were received. Failed commands do not raise
+        exceptions, their result holds the error instead. Once the lookups and the journal are shared by the chunk,
+        the throughput is limited by the work done for each asset that changes: every field set on the asset
+        notifies the book and the library, which update the free list, the heap of loaned assets and the counters
+        Parameters:
+            commands  - an iterable of (operation, key) tuples where the operation is TRANSACTION_BORROW or
+                        TRANSACTION_RESERVE with the ISBN of the book as key, or TRANSACTION_RETURN with the
+                        library ID of the asset as key
+            chunkSize - the number of commands processed together
+        Returns:
+            a generator of TransactionResult objects, one per command in the order of the commands
+        """
+        chunkSize = Library.TRANSACTION_CHUNK_SIZE if chunkSize == None else chunkSize
+        chunk = []
+        for command in commands:
+            chunk.append(command)
+            if len(chunk) == chunkSize:
+                yield from self.processTransactionChunk(chunk)
+                chunk = []
+
+        if len(chunk) > 0:
+            yield from self.processTransactionChunk(chunk)
+
+    def processTransactionChunk(self, chunk):
+        """
+        Processes a chunk of circulation commands grouped by book
+        Parameters:
+            chunk - the list of (operation, key) commands
+        Returns:
+            the list of TransactionResult objects in the order of the commands
+        """
+        results = [None] * len(chunk)
+
+        #find the book of every command, looking up each ISBN once
+        commandsByBook = {}
+        booksByISBN = {}
+        for (iCommand, command) in enumerate(chunk):
+            (operation, key) = command
+            if operation == Library.TRANSACTION_RETURN:
+                libAsset = self.findAssetByLibID(key)
+                book = None if libAsset == None else libAsset.getBook()
+                if book == None:
+                    results[iCommand] = TransactionResult(command, error = f"An asset with ID = {key} was not found in the library")
+                    continue
+            elif operation == Library.TRANSACTION_BORROW or operation == Library.TRANSACTION_RESERVE:
+                book = booksByISBN.get(key)
+                if book == None:
+                    book = self.findBookByISBN(key)
+                    if book == None:
+                        results[iCommand] = TransactionResult(command, error = f"A book with ISBN = {key} was not found in the library")
+                        continue
+                    booksByISBN[key] = book
+            else:
+                results[iCommand] = TransactionResult(command, error = f"The operation {operation} is not supported")
+                continue
+
+            commandsByBook.setdefault(book, []).append(iCommand)
+
+        #perform the commands of each book in a single transaction
+        for (book, bookCommands) in commandsByBook.items():
+            with self.circulationTransaction(book, waitDurable = False) as changedAssets:
+                for iCommand in bookCommands:
+                    command = chunk[iCommand]
+                    (operation, key) = command
+                    try:
+                        if operation == Library.TRANSACTION_BORROW:
+                            libAsset = book.borrowBook()
+                            changedAssets.append(libAsset)
+                            results[iCommand] = TransactionResult(command, libID = libAsset.getLibID(),
+                                                                  dueDate = libAsset.getDueDate())
+                        elif operation == Library.TRANSACTION_RESERVE:
+                            libAsset = book.reserveBook()
+                            changedAssets.append(libAsset)
+                            results[iCommand] = TransactionResult(command, libID = libAsset.getLibID(),
+                                                                  dueDate = libAsset.getDueDate())
+                        else:
+                            (loanDuration, daysLate, lateFees) = book.returnBook(key)
+                            changedAssets.append(book.findLibraryAsset(key))
+                            results[iCommand] = TransactionResult(command, libID = key, loanDuration = loanDuration,
+                                                                  daysLate = daysLate, lateFees = lateFees)
+                    except InvalidTransaction as err:
+                        results[iCommand] = TransactionResult(command, error = str(err))
+
+        #the results are only reported once the changes of the whole chunk are durable
+        self.flushJournal()
+
+        return results
+
+    def borrowBook(self, book, patronID = None):
+        """
+        Loans an available asset of the given book to the user and saves the change
+        Parameters:
+            book     - the book the library user would like to borrow
+            patronID - the ID of the patron, optional. A patron whose hold is ready gets the copy set aside for them
+        Returns:
+            library asset that is loaned to the library user
+        """
+        with self.circulationTransaction(book) as changedAssets:
+            libAsset = book.borrowBook(patronID)
+            changedAssets.append(libAsset)
+
+        return libAsset
+
+    def returnBook(self, book, libID):
+        """
+        Returns a borrowed asset of the given book back to the library and saves the change
+        Parameters:
+            book  - the book the asset is a copy of
+            libID - the ID of the library item being returned
+        Returns:
+            loan duration   - the duration of the loan as a timedelta object
+            days late       - the number of days the book was late
+            late fees       - the late fees applicable if any
+        """
+        with self.circulationTransaction(book) as changedAssets:
+            returnResult = book.returnBook(libID)
+            changedAssets.append(book.findLibraryAsset(libID))
+
+        return returnResult
+
+    def reserveBook(self, book, patronID = None, tier = HoldQueue.STANDARD_TIER):
+        """
+        Places a hold on the given book for a patron and saves the copy set aside for them, if any
+        Parameters:
+            book     - the book the library user would like to reserve
+            patronID - the ID of the patron placing the hold, optional
+            tier     - the tier of the patron in the hold queue
+        Returns:
+            the copy set aside for the patron or the copy expected to be returned first
+        """
+        with self.circulationTransaction(book) as changedAssets:
+            libAsset = book.reserveBook(patronID, tier)
+            if libAsset != None:
+                changedAssets.append(libAsset)
+
+        return libAsset
+
+    def cancelHold(self, book, patronID):
+        """
+        Cancels the hold of a patron on the given book and saves the change of the copy set aside for them, if any
+        Parameters:
+            book     - the book the patron is holding
+            patronID - the ID of the patron
+        """
+        with self.circulationTransaction(book) as changedAssets:
+            libAsset = book.cancelHold(patronID)
+            if libAsset != None:
+                changedAssets.append(libAsset)
+
+    def getOverdueReport(self, reportDate = None):
+        """
+        Calculates the late days and projected late fees of all the assets on loan in the library. The report reads
+        a read snapshot of the library so it is consistent without stopping the desks
+        Parameters:
+            reportDate - the date the late periods are calculated for, today by default
+        Returns:
+            the OverdueReport for the library
+        """
+        #the report requires NumPy which is only imported when a report is requested
+        from OverdueReportModule import OverdueReport
+
+        with self.readSnapshot() as readSnapshot:
+            return OverdueReport(self, reportDate, readSnapshot)
 
     def determineLibraryID(self):
         """Determine the a new library ID prompting the user until they enter the correct information
         
            The method will raise an AssertError if the user chooses to terminate.
         """   
-        libId = self._libIDGeneratorSeed
-        self._libIDGeneratorSeed += 1   
-        return libId
+        return self.allocateLibraryIDs(1)
+
+    def allocateLibraryIDs(self, count):
+        """
+        Allocates a block of consecutive library IDs at once, which is cheaper than determining the
+        IDs one by one when many copies are registered
+        Parameters:
+            count - the number of library IDs to allocate
+        Returns:
+            the first ID of the block. The block contains the IDs firstID to firstID + count - 1
+        """
+        #the storage allocates the IDs when the library is shared with other processes
+        if self._storage != None:
+            return self._storage.allocateLibraryIDs(count, Library.DEFAULT_LIBID_START)
+
+        with self._lock:
+            firstLibID = self._libIDGeneratorSeed
+            self._libIDGeneratorSeed += count
+            return firstLibID
+
+    def advanceLibraryIDs(self, nextLibID):
+        """
+        Makes sure the library IDs allocated from now on are not lower than the given ID, for example when
+        books with known library IDs are recovered
+        Parameters:
+            nextLibID - the lowest library ID that can be allocated next
+        """
+        self._libIDGeneratorSeed = max(self._libIDGeneratorSeed, nextLibID)
 
     def registerBook(self, bookName, bookISBN, authors, bookType, nCopies):
         """
@@ -134,6 +1214,44 @@ class Library:
         Returns:
             The book that was registered
         """
-        assert(False, "Exercise: implement the business logic for creating and adding a new book")
+        #checking the ISBN and adding the book is a single step for other desks registering books
+        with self._lock:
+            #a book can only be registered once, additional copies are part of the same book
+            if self.findBookByISBN(bookISBN) != None:
+                raise DuplicateBook(f"A book with ISBN = {bookISBN} is already registered in the library")
+
+            if nCopies < 0:
+                raise InvalidTransaction(f"The number of copies cannot be negative: {nCopies}")
+
+            #create the book according to its type
+            if bookType == Library.BOOK_TYPE_PAPER:
+                book = PaperBook(bookName, bookISBN)
+            elif bookType == Library.BOOK_TYPE_DIGITAL:
+                book = DigitalBook(bookName, bookISBN, self._licenseCatalogue.getTerms(bookISBN))
+            else:
+                raise InvalidTransaction(f"The book type {bookType} is not supported by the library")
+
+            for author in authors:
+                book.addAuthor(author)
+
+            #create the library assets using a single block of library IDs
+            firstLibID = self.allocateLibraryIDs(nCopies)
+            for libID in range(firstLibID, firstLibID + nCopies):
+                bookAsset = LibraryAsset(libID, book)
+                bookAsset.setStatus(LibraryAsset.AVAILABLE)
+                book.addAsset(bookAsset)
+
+            #save the book before adding it so a book that could not be saved is not part of the library
+            if self._storage != None:
+                self._storage.saveBook(book)
+
+            #add the book to the library
+            self.addBook(book)
+
+            if self._journal != None:
+                journalSeq = self._journal.logBookRegistered(book)
 
+        if self._journal != None:
+            self._journal.waitDurable(journalSeq)
 
+        return book
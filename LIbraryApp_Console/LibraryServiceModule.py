@@ -0,0 +1,320 @@
+"""
+Module that defines the LibraryService class, an HTTP/JSON network service that provides the library
+services of the LibraryApplication to self-checkout kiosks
+
+Author: Prof. Magdin Stoica
+E-Mail: magdin.stoica@sheridancollege.ca
+Version 1.0 (Python)
+"""
+from LibraryModule import Library
+from LibraryAssetModule import LibraryAsset
+from ExceptionsModule import InvalidTransaction
+from MetricsRegistryModule import MetricsRegistry
+from HoldQueueModule import HoldQueue
+from urllib.parse import urlsplit, parse_qs, unquote
+from datetime import date
+import argparse
+import asyncio
+import json
+
+class LibraryService:
+    """
+    Asyncio HTTP/JSON service exposing the operations of the book menu of the LibraryApplication. A single
+    process serves thousands of kiosks: every connection is a coroutine, a client that is too slow to send its
+    request is disconnected after a timeout and the circulation operations of a persistent library, which wait
+    for the database or the journal, run in a thread pool so they never block the event loop. The book lookups
+    run in the thread pool with the operation that follows them because they can query the database or load the
+    book from a catalogue snapshot. The operations of a library that only lives in memory take microseconds and
+    run directly on the event loop.
+
+    Requests and responses:
+        GET  /books?name=NAME or /books?isbn=ISBN   -- select a book
+        GET  /books/ISBN/status                      -- check the status of the book and count its copies by status
+        POST /books/ISBN/borrow?patron=ID            -- borrow the book, the copy set aside for the patron if any
+        POST /books/ISBN/reserve?patron=ID&tier=N    -- place a hold on the book
+        GET  /books/ISBN/holds/ID                    -- the position and expected date of the hold of a patron
+        POST /books/ISBN/holds/ID/cancel             -- cancel the hold of a patron
+        POST /assets/LIBID/return                    -- return a library asset
+        GET  /books/ISBN/assets                      -- display the library assets of the book
+        GET  /assets/due?from=DATE&to=DATE&limit=N   -- the loaned assets due in a range of dates, in order of due date
+        GET  /status                                 -- count the copies of the whole library by status
+        GET  /metrics                                -- the operation metrics in the text exposition format
+
+    Responses are JSON except for the metrics, which are plain text. Errors are returned as {"error": message} with status 400 for invalid requests, 404 when the book or
+    asset is not found and 409 for invalid transactions.
+
+    Attributes:
+        _library         : Library -- the library the service provides access to
+        _requestTimeout  : float   -- the number of seconds a client has to send a complete request
+        _useThreadPool   : bool    -- True to run the operations in the thread pool of the event loop
+
+    Version 1.0 (Python)
+    """
+
+    """constant for the default port of the service"""
+    DEFAULT_PORT = 8080
+
+    """constant for the default number of seconds a client has to send a complete request"""
+    DEFAULT_REQUEST_TIMEOUT = 10.0
+
+    """constant for the maximum size of the request line and headers"""
+    MAX_HEADER_BYTES = 16384
+
+    """the text of the HTTP status codes used by the service"""
+    STATUS_TEXT = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+                   409: "Conflict", 500: "Internal Server Error"}
+
+    """the text of the asset statuses"""
+    ASSET_STATUS_TEXT = {LibraryAsset.NOT_AVAILABLE: "not available", LibraryAsset.AVAILABLE: "available",
+                         LibraryAsset.LOANED: "loaned", LibraryAsset.RESERVED: "reserved"}
+
+    def __init__(self, library, requestTimeout = DEFAULT_REQUEST_TIMEOUT, useThreadPool = None):
+        """
+        Initialize the service for the given library
+        Arguments:
+            library         : Library -- the library the service provides access to
+            requestTimeout  : float   -- the number of seconds a client has to send a complete request
+            useThreadPool   : bool    -- True to run the operations in a thread pool. By default the thread
+                                         pool is used when the library is persistent or loads its books
+                                         from a catalogue snapshot
+        """
+        self._library = library
+        self._requestTimeout = requestTimeout
+        self._useThreadPool = library.hasBlockingLookups() if useThreadPool == None else useThreadPool
+
+    async def serve(self, host = "127.0.0.1", port = DEFAULT_PORT):
+        """Accepts connections on the given address until the task is cancelled"""
+        server = await asyncio.start_server(self.handleConnection, host, port,
+                                            limit = LibraryService.MAX_HEADER_BYTES, backlog = 4096)
+        async with server:
+            await server.serve_forever()
+
+    async def handleConnection(self, reader, writer):
+        """Serves the requests of one client connection until the client closes it or is too slow"""
+        try:
+            while True:
+                try:
+                    request = await asyncio.wait_for(self.readRequest(reader), self._requestTimeout)
+                except (asyncio.TimeoutError, asyncio.IncompleteReadError, asyncio.LimitOverrunError,
+                        ConnectionError, ValueError):
+                    #the client closed the connection, was too slow or sent an invalid request
+                    return
+
+                (method, target, headers, body) = request
+                (status, response) = await self.handleRequest(method, target, body)
+
+                keepAlive = headers.get("connection", "").lower() != "close"
+                if isinstance(response, str):
+                    (contentType, payload) = ("text/plain; version=0.0.4", response.encode("utf-8"))
+                else:
+                    (contentType, payload) = ("application/json", json.dumps(response).encode("utf-8"))
+                writer.write((f"HTTP/1.1 {status} {LibraryService.STATUS_TEXT[status]}\r\n"
+                              f"Content-Type: {contentType}\r\n"
+                              f"Content-Length: {len(payload)}\r\n"
+                              f"Connection: {'keep-alive' if keepAlive else 'close'}\r\n\r\n").encode("ascii") + payload)
+                await writer.drain()
+
+                if not keepAlive:
+                    return
+        except ConnectionError:
+            return
+        finally:
+            writer.close()
+
+    async def readRequest(self, reader):
+        """
+        Reads one HTTP request from the client
+        Returns:
+            (method, target, headers, body)
+        """
+        headerBytes = await reader.readuntil(b"\r\n\r\n")
+        lines = headerBytes.decode("latin-1").split("\r\n")
+        (method, target, version) = lines[0].split(" ", 2)
+
+        headers = {}
+        for line in lines[1:]:
+            if len(line) > 0:
+                (name, value) = line.split(":", 1)
+                headers[name.strip().lower()] = value.strip()
+
+        contentLength = int(headers.get("content-length", "0"))
+        body = await reader.readexactly(contentLength) if contentLength > 0 else b""
+
+        return (method, target, headers, body)
+
+    async def handleRequest(self, method, target, body):
+        """
+        Performs the operation requested by the client
+        Returns:
+            (HTTP status, JSON response object or response text)
+        """
+        url = urlsplit(target)
+        parts = [unquote(part) for part in url.path.split("/") if len(part) > 0]
+        try:
+            if method == "GET" and parts == ["books"]:
+                return await self.runOperation(self.onSelectBook, parse_qs(url.query))
+
+            if method == "GET" and parts == ["status"]:
+                return (200, self.describeStatusCounts(self._library.getStatusCounts()))
+
+            if method == "GET" and parts == ["metrics"]:
+                return (200, MetricsRegistry.getRegistry().getTextExposition())
+
+            if len(parts) >= 3 and parts[0] == "books":
+                operation = self.findBookOperation(method, parts, parse_qs(url.query))
+                if operation != None:
+                    return await self.runOperation(self.onBookRequest, parts[1], *operation)
+
+            if method == "GET" and parts == ["assets", "due"]:
+                return await self.runOperation(self.onFindAssetsDue, parse_qs(url.query))
+
+            if method == "POST" and len(parts) == 3 and parts[0] == "assets" and parts[2] == "return":
+                return await self.runOperation(self.onReturnAsset, int(parts[1]))
+
+            return (404, {"error": f"{method} {url.path} is not a library service"})
+
+        except ValueError as err:
+            return (400, {"error": str(err)})
+        except InvalidTransaction as err:
+            return (409, {"error": str(err)})
+        except Exception as err:
+            #an unexpected error must not disconnect the kiosk
+            return (500, {"error": f"An error occurred with the following message: {err}"})
+
+    def findBookOperation(self, method, parts, query):
+        """
+        Finds the operation requested on a book, without looking up the book
+        Returns:
+            (operation, arguments after the book) or None if the request is not a book operation
+        """
+        patronID = query["patron"][0] if "patron" in query else None
+        if method == "GET" and parts[2:] == ["status"]:
+            return (self.onCheckBookStatus,)
+        if method == "POST" and parts[2:] == ["borrow"]:
+            return (self.onBorrowBook, patronID)
+        if method == "POST" and parts[2:] == ["reserve"]:
+            tier = int(query["tier"][0]) if "tier" in query else HoldQueue.STANDARD_TIER
+            return (self.onReserveBook, patronID, tier)
+        if method == "GET" and parts[2:] == ["assets"]:
+            return (self.onDisplayBookAssets,)
+        if method == "GET" and len(parts) == 4 and parts[2] == "holds":
+            return (self.onCheckHold, parts[3])
+        if method == "POST" and len(parts) == 5 and parts[2] == "holds" and parts[4] == "cancel":
+            return (self.onCancelHold, parts[3])
+        return None
+
+    def onBookRequest(self, isbn, operation, *arguments):
+        """
+        Looks up the book with the given ISBN and performs the operation on it. The lookup can read the storage or
+        the catalogue snapshot so it runs with the operation, outside the event loop
+        """
+        book = self._library.findBookByISBN(isbn)
+        if book == None:
+            return (404, {"error": f"A book with ISBN = {isbn} was not found"})
+        return operation(book, *arguments)
+
+    async def runOperation(self, operation, *arguments):
+        """Runs an operation in the thread pool of the event loop if operations can block"""
+        if not self._useThreadPool:
+            return operation(*arguments)
+        return await asyncio.get_running_loop().run_in_executor(None, operation, *arguments)
+
+    @staticmethod
+    def describeBook(book):
+        """Returns the JSON object describing a book"""
+        return {"name": book.getName(), "isbn": book.getISBN(), "authors": list(book.getAuthors()),
+                "copies": book.getAssetCount()}
+
+    @staticmethod
+    def describeStatusCounts(statusCounts):
+        """Returns the JSON object with the number of copies in each status"""
+        return {LibraryService.ASSET_STATUS_TEXT[status]: count for (status, count) in enumerate(statusCounts)}
+
+    def onSelectBook(self, query):
+        """Finds a book by name or ISBN"""
+        book = None
+        if "name" in query:
+            book = self._library.findBookByName(query["name"][0])
+        if book == None and "isbn" in query:
+            book = self._library.findBookByISBN(query["isbn"][0])
+
+        if book == None:
+            return (404, {"error": "The book was not found"})
+        return (200, LibraryService.describeBook(book))
+
+    def onCheckBookStatus(self, book):
+        """Checks whether the book is available and when it will be available if it is not"""
+        (isAvailable, nextAvailDate) = book.checkAvailability()
+        return (200, {"available": isAvailable,
+                      "availableOn": None if nextAvailDate == None else nextAvailDate.isoformat(),
+                      "copies": self.describeStatusCounts(book.getStatusCounts())})
+
+    def onBorrowBook(self, book, patronID):
+        """Loans an available asset of the book or the asset set aside for the patron"""
+        libAsset = self._library.borrowBook(book, patronID)
+        return (200, {"libID": libAsset.getLibID(), "dueDate": libAsset.getDueDate().isoformat()})
+
+    def onReserveBook(self, book, patronID, tier):
+        """Places a hold on the book for the patron"""
+        if patronID == None:
+            patronID = HoldQueue.newAnonymousPatronID()
+        self._library.reserveBook(book, patronID, tier)
+        return self.onCheckHold(book, patronID)
+
+    def onCheckHold(self, book, patronID):
+        """Returns the position of the patron in the hold queue and the date the book is expected to be ready"""
+        position = book.getHoldPosition(patronID)
+        readyOn = book.estimateHoldDate(patronID)
+        return (200, {"patron": patronID, "position": position,
+                      "readyOn": None if readyOn == None else readyOn.isoformat()})
+
+    def onCancelHold(self, book, patronID):
+        """Cancels the hold of the patron"""
+        self._library.cancelHold(book, patronID)
+        return (200, {"patron": patronID, "cancelled": True})
+
+    def onReturnAsset(self, libID):
+        """Returns a library asset using its library ID"""
+        (book, loanDuration, daysLate, lateFees) = self._library.returnAsset(libID)
+        return (200, {"isbn": book.getISBN(), "loanDays": loanDuration.days, "daysLate": daysLate,
+                      "lateFees": round(lateFees, 2)})
+
+    def onFindAssetsDue(self, query):
+        """Lists the loaned assets with a due date in the range of dates of the query"""
+        startDate = date.fromisoformat(query["from"][0]) if "from" in query else None
+        endDate = date.fromisoformat(query["to"][0]) if "to" in query else None
+        limit = int(query["limit"][0]) if "limit" in query else None
+        return (200, [{"libID": libAsset.getLibID(), "isbn": libAsset.getBook().getISBN(),
+                       "dueDate": libAsset.getDueDate().isoformat()}
+                      for libAsset in self._library.findAssetsDue(startDate, endDate, limit)])
+
+    def onDisplayBookAssets(self, book):
+        """Lists the library assets of the book with their loan information"""
+        assets = []
+        with book.getLock():
+            for libAsset in book.getAssets():
+                borrowedOn = libAsset.getBorrowedOn()
+                dueDate = libAsset.getDueDate()
+                assets.append({"libID": libAsset.getLibID(),
+                               "status": LibraryService.ASSET_STATUS_TEXT.get(libAsset.getStatus(), str(libAsset.getStatus())),
+                               "borrowedOn": None if borrowedOn == None else borrowedOn.isoformat(),
+                               "dueDate": None if dueDate == None else dueDate.isoformat(),
+                               "daysLate": libAsset.getLatePeriod().days})
+
+        response = LibraryService.describeBook(book)
+        response["assets"] = assets
+        return (200, response)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description = "Library HTTP/JSON service")
+    parser.add_argument("--host", default = "127.0.0.1")
+    parser.add_argument("--port", type = int, default = LibraryService.DEFAULT_PORT)
+    parser.add_argument("--metrics", action = "store_true", help = "measure the operations and serve the metrics")
+    arguments = parser.parse_args()
+    MetricsRegistry.getRegistry().setEnabled(arguments.metrics)
+
+    try:
+        asyncio.run(LibraryService(Library()).serve(arguments.host, arguments.port))
+    except KeyboardInterrupt:
+        pass
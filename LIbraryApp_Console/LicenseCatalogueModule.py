@@ -0,0 +1,247 @@
+"""
+Module that defines the LicenseCatalogue class that keeps the loan terms of the licenses of digital books in
+memory, and the providers the terms are fetched from
+
+Author: Prof. Magdin Stoica
+E-Mail: magdin.stoica@sheridancollege.ca
+Version 1.0 (Python)
+"""
+from BookModule import Book
+from collections import OrderedDict
+import csv
+import json
+import random
+import threading
+import time
+
+class LicenseTermsProvider:
+    """
+    Base class of the stores the license terms of digital books are fetched from, such as the server of a
+    license vendor. Fetching terms is slow so the terms of many books are fetched with a single request
+
+    Version 1.0 (Python)
+    """
+
+    def fetchTerms(self, isbns):
+        """
+        Fetches the license terms of the books with the given ISBNs
+        Arguments:
+            isbns  : list -- the ISBNs of the books
+        Returns:
+            a dictionary of the (maximum loan duration in days, late penalty per day) of each ISBN that has a
+            license, books without license are left out
+        """
+        raise NotImplementedError()
+
+
+class RandomLicenseProvider(LicenseTermsProvider):
+    """
+    Stand-in for a license server that makes up the terms of every book it is asked for using randomly
+    generated values according to the following business logic:
+    The maximum loan duration in weeks is generated randomly to be number between 2 and 8
+    The late penalty is betwen 0.1 and 0.5
+
+    Attributes:
+        _requestCount  : int -- the number of requests made to the provider
+
+    Version 1.0 (Python)
+    """
+
+    def __init__(self):
+        """Initialize the provider"""
+        self._requestCount = 0
+
+    def getRequestCount(self):
+        """Returns the number of requests made to the provider"""
+        return self._requestCount
+
+    def fetchTerms(self, isbns):
+        """Makes up the license terms of the books with the given ISBNs"""
+        self._requestCount += 1
+        return {isbn: (random.randint(2*7, 8*7), 0.1 + random.random()* 0.4) for isbn in isbns}
+
+
+class FileLicenseProvider(LicenseTermsProvider):
+    """
+    License terms read from a local file, used instead of a license server. CSV files must have a header with the
+    columns isbn, maxBorrowDays and latePenaltyPerDay. JSONL files contain one JSON object per line with the same
+    keys. The file is read once when the provider is created
+
+    Attributes:
+        _terms         : dict -- the (maximum loan duration in days, late penalty per day) of each ISBN in the file
+        _requestCount  : int  -- the number of requests made to the provider
+
+    Version 1.0 (Python)
+    """
+
+    def __init__(self, filePath):
+        """
+        Initialize the provider with the terms of the given file. Files ending with .jsonl or .json are read as
+        JSON lines, all other files are read as CSV
+        Arguments:
+            filePath  : str -- the path of the license terms file
+        """
+        self._terms = {}
+        self._requestCount = 0
+        with open(filePath, newline = "", encoding = "utf-8") as termsFile:
+            if filePath.endswith(".jsonl") or filePath.endswith(".json"):
+                records = (json.loads(line) for line in termsFile if len(line.strip()) > 0)
+            else:
+                records = csv.DictReader(termsFile)
+
+            for record in records:
+                self._terms[str(record["isbn"]).strip()] = (int(record["maxBorrowDays"]), float(record["latePenaltyPerDay"]))
+
+    def getRequestCount(self):
+        """Returns the number of requests made to the provider"""
+        return self._requestCount
+
+    def fetchTerms(self, isbns):
+        """Returns the license terms of the books with the given ISBNs that are in the file"""
+        self._requestCount += 1
+        return {isbn: self._terms[isbn] for isbn in isbns if isbn in self._terms}
+
+
+class LicenseCatalogue:
+    """
+    Cache of the license terms of digital books by ISBN in front of a LicenseTermsProvider. Terms are kept for a
+    limited time so changes made by the license vendor are picked up, and the least recently used terms are
+    dropped when the catalogue is full. Books the provider has no license for get the default terms, which are
+    cached like the others so the provider is not asked again for them.
+
+    Catalogue imports prefetch the terms of the digital books of a batch of records with a single request, so
+    creating the books reads their terms from memory.
+
+    Attributes:
+        _provider       : LicenseTermsProvider -- the store the terms are fetched from
+        _ttlSeconds     : float -- the number of seconds the terms are kept
+        _capacity       : int   -- the maximum number of ISBNs kept
+        _timer          : function -- returns the current time in seconds, time.monotonic by default
+        _entries        : OrderedDict -- the (terms, expiry time) of each cached ISBN, least recently used first
+        _hitCount       : int   -- the number of terms found in the cache
+        _missCount      : int   -- the number of terms that had to be fetched by getTerms
+        _fetchCount     : int   -- the number of requests made to the provider
+        _evictionCount  : int   -- the number of ISBNs dropped because the catalogue was full
+        _lock           : Lock  -- serializes the changes to the cache. The provider is called without holding it
+
+    Version 1.0 (Python)
+    """
+
+    """constant for the terms of books without license, (maximum loan duration in days, late penalty per day)"""
+    DEFAULT_LOAN_LICENSE = (Book.DEFAULT_BORROW_DAYS, 0.25)
+
+    """constant for the default number of seconds the terms are kept"""
+    DEFAULT_TTL_SECONDS = 24 * 60 * 60
+
+    """constant for the default maximum number of ISBNs kept"""
+    DEFAULT_CAPACITY = 100000
+
+    """the catalogue used by the libraries and digital books that are not given one"""
+    _defaultCatalogue = None
+
+    def __init__(self, provider, ttlSeconds = DEFAULT_TTL_SECONDS, capacity = DEFAULT_CAPACITY, timer = time.monotonic):
+        """
+        Initialize an empty catalogue
+        Arguments:
+            provider    : LicenseTermsProvider -- the store the terms are fetched from
+            ttlSeconds  : float -- the number of seconds the terms are kept
+            capacity    : int   -- the maximum number of ISBNs kept
+            timer       : function -- returns the current time in seconds
+        """
+        self._provider = provider
+        self._ttlSeconds = ttlSeconds
+        self._capacity = max(1, capacity)
+        self._timer = timer
+        self._entries = OrderedDict()
+        self._hitCount = 0
+        self._missCount = 0
+        self._fetchCount = 0
+        self._evictionCount = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def getDefaultCatalogue():
+        """Returns the catalogue used by the libraries and digital books that are not given one"""
+        return LicenseCatalogue._defaultCatalogue
+
+    def getProvider(self):
+        """Returns the store the terms are fetched from"""
+        return self._provider
+
+    def getLength(self):
+        """Returns the number of ISBNs in the cache, including the ones whose terms expired"""
+        return len(self._entries)
+
+    def getStatistics(self):
+        """Returns a dictionary of the hits, misses, provider requests and evictions of the catalogue"""
+        with self._lock:
+            return {"hits": self._hitCount, "misses": self._missCount, "fetches": self._fetchCount,
+                    "evictions": self._evictionCount, "size": len(self._entries)}
+
+    def storeTerms(self, isbns, fetchedTerms):
+        """
+        Adds the fetched terms of the given ISBNs to the cache, the default terms for the ISBNs without terms, and
+        drops the least recently used ISBNs when the catalogue is full
+        Arguments:
+            isbns         : list -- the ISBNs that were fetched
+            fetchedTerms  : dict -- the terms returned by the provider
+        """
+        with self._lock:
+            expiryTime = self._timer() + self._ttlSeconds
+            for isbn in isbns:
+                self._entries[isbn] = (fetchedTerms.get(isbn, LicenseCatalogue.DEFAULT_LOAN_LICENSE), expiryTime)
+                self._entries.move_to_end(isbn)
+
+            while len(self._entries) > self._capacity:
+                self._entries.popitem(last = False)
+                self._evictionCount += 1
+
+    def fetchTerms(self, isbns):
+        """Fetches the terms of the given ISBNs from the provider with a single request and caches them"""
+        fetchedTerms = self._provider.fetchTerms(isbns)
+        with self._lock:
+            self._fetchCount += 1
+        self.storeTerms(isbns, fetchedTerms)
+        return fetchedTerms
+
+    def getTerms(self, isbn):
+        """
+        Returns the license terms of the book with the given ISBN, fetching them if they are not cached or expired.
+        Terms found in the cache become the most recently used
+        Returns:
+            (maximum loan duration in days, late penalty per day)
+        """
+        with self._lock:
+            entry = self._entries.get(isbn)
+            if entry != None and entry[1] > self._timer():
+                self._entries.move_to_end(isbn)
+                self._hitCount += 1
+                return entry[0]
+            self._missCount += 1
+
+        return self.fetchTerms([isbn]).get(isbn, LicenseCatalogue.DEFAULT_LOAN_LICENSE)
+
+    def prefetch(self, isbns):
+        """
+        Fetches the terms of the given ISBNs that are not cached or expired with a single request. ISBNs beyond the
+        capacity of the catalogue would drop each other so callers prefetch batches smaller than the capacity
+        Arguments:
+            isbns  : iterable -- the ISBNs of the books whose terms are about to be used
+        Returns:
+            the number of ISBNs that were fetched
+        """
+        with self._lock:
+            now = self._timer()
+            missingISBNs = list(dict.fromkeys(isbn for isbn in isbns
+                                              if isbn not in self._entries or self._entries[isbn][1] <= now))
+        if len(missingISBNs) > 0:
+            self.fetchTerms(missingISBNs)
+        return len(missingISBNs)
+
+    def clear(self):
+        """Drops all the cached terms"""
+        with self._lock:
+            self._entries.clear()
+
+
+LicenseCatalogue._defaultCatalogue = LicenseCatalogue(RandomLicenseProvider())
@@ -8,9 +8,29 @@ Version 1.0 (Python)
 """
 
 from LibraryApplicationModule import LibraryApplication
+from MetricsRegistryModule import MetricsRegistry
+import argparse
+
+#the library can be saved to a database file, its books can be loaded from a catalogue snapshot and its
+#changes can be recorded in a circulation journal
+parser = argparse.ArgumentParser(description = "Library App")
+parser.add_argument("database", nargs = "?", help = "the database file the library is saved to")
+parser.add_argument("--snapshot", help = "the catalogue snapshot the books are loaded from")
+parser.add_argument("--journal", help = "the directory of the circulation journal the library is recovered from")
+parser.add_argument("--metrics", help = "the file the operation metrics are written to when the application exits")
+arguments = parser.parse_args()
+
+#the operations are only measured when the metrics are requested
+if arguments.metrics != None:
+    MetricsRegistry.getRegistry().setEnabled(True)
 
 #create the application object
-app = LibraryApplication()
+app = LibraryApplication(arguments.database, arguments.snapshot, arguments.journal)
 
 #ask the app to run
-app.run()
\ No newline at end of file
+app.run()
+
+#write the metrics in the text exposition format so a local scraper can read them
+if arguments.metrics != None:
+    with open(arguments.metrics, "w") as metricsFile:
+        metricsFile.write(MetricsRegistry.getRegistry().getTextExposition())
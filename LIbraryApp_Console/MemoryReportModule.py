@@ -0,0 +1,102 @@
+"""
+Module that defines the MemoryReport class used to size the hosts running the library application
+
+Author: Prof. Magdin Stoica
+E-Mail: magdin.stoica@sheridancollege.ca
+Version 1.0 (Python)
+"""
+from LibraryModule import Library
+from LibraryAssetModule import LibraryAsset
+from PaperBookModule import PaperBook
+import sys
+import tracemalloc
+
+class DictLibraryAsset:
+    """
+    Replica of the library asset layout before the field variables were declared as slots. Each instance
+    stores its six field variables in a per-instance dictionary. Used as the "before" measurement
+    """
+
+    def __init__(self, libID, book):
+        self._libID = libID
+        self._book = book
+        self._status = LibraryAsset.NOT_AVAILABLE
+        self._borrowedOn = None
+        self._returnedOn = None
+        self._dueDate = None
+
+class MemoryReport:
+    """
+    Measures the memory used per library asset with tracemalloc so the memory needed by a library
+    with a given number of copies can be estimated.
+
+    Attributes:
+        _assetCount : int -- the number of assets created for each measurement
+
+    Version 1.0 (Python)
+    """
+
+    """constant for the default number of assets created for each measurement"""
+    DEFAULT_ASSET_COUNT = 100000
+
+    def __init__(self, assetCount = DEFAULT_ASSET_COUNT):
+        """
+        Initialize the report with the number of assets to create for each measurement
+        Arguments:
+            assetCount  : int -- the number of assets created for each measurement
+        """
+        self._assetCount = assetCount
+
+    def measureBytesPerAsset(self, assetClass):
+        """
+        Creates the assets with the given class and returns the number of bytes allocated per asset
+        Arguments:
+            assetClass - the class used to create the assets, LibraryAsset or DictLibraryAsset
+        """
+        book = PaperBook("Memory Report", "000-0000000000")
+
+        tracemalloc.start()
+        try:
+            assets = [assetClass(libID, book) for libID in range(self._assetCount)]
+            (allocatedBytes, peakBytes) = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+
+        #the list holding the assets is not part of the asset cost
+        allocatedBytes -= sys.getsizeof(assets)
+        return allocatedBytes / self._assetCount
+
+    def measureBytesPerRegisteredCopy(self):
+        """
+        Registers a book with the given number of copies and returns the number of bytes allocated per copy,
+        including the lists and indexes the book and the library keep for each copy
+        """
+        library = Library()
+
+        tracemalloc.start()
+        try:
+            library.registerBook("Memory Report", "000-0000000000", ["Memory Report"], Library.BOOK_TYPE_PAPER,
+                                 self._assetCount)
+            (allocatedBytes, peakBytes) = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+
+        return allocatedBytes / self._assetCount
+
+    def getReport(self):
+        """Returns the text of the memory report"""
+        bytesBefore = self.measureBytesPerAsset(DictLibraryAsset)
+        bytesAfter = self.measureBytesPerAsset(LibraryAsset)
+        bytesPerCopy = self.measureBytesPerRegisteredCopy()
+
+        return "\n".join([f"Assets measured: {self._assetCount:,}",
+                          f"Bytes per asset object with a dictionary (before): {bytesBefore:,.1f}",
+                          f"Bytes per asset object with slots (after): {bytesAfter:,.1f}",
+                          f"Bytes per registered copy including book and library indexes: {bytesPerCopy:,.1f}",
+                          f"Estimated memory for 1,000,000 copies: {bytesPerCopy * 1000000 / 2**20:,.0f} MiB"])
+
+
+if __name__ == "__main__":
+    #the number of assets can be given on the command line
+    assetCount = int(sys.argv[1]) if len(sys.argv) > 1 else MemoryReport.DEFAULT_ASSET_COUNT
+    print(MemoryReport(assetCount).getReport())
@@ -0,0 +1,195 @@
+"""
+Module that defines the MetricsRegistry class that counts the library operations and measures how long
+they take, and the LatencyHistogram class used for the measures
+
+Author: Prof. Magdin Stoica
+E-Mail: magdin.stoica@sheridancollege.ca
+Version 1.0 (Python)
+"""
+from ExceptionsModule import InvalidTransaction
+from bisect import bisect_left
+import functools
+import threading
+import time
+
+class LatencyHistogram:
+    """
+    Histogram of durations with fixed buckets. Each bucket counts the durations up to its upper bound that
+    did not fit in the previous bucket, the last bucket counts the durations above all bounds.
+
+    Attributes:
+        _bounds       : tuple -- the upper bound of each bucket in seconds, in increasing order
+        _bucketCounts : list  -- the number of durations in each bucket, one more than the bounds
+        _sum          : float -- the sum of all durations in seconds
+        _count        : int   -- the number of durations
+
+    Version 1.0 (Python)
+    """
+
+    def __init__(self, bounds):
+        """
+        Initialize an empty histogram
+        Arguments:
+            bounds  : tuple -- the upper bound of each bucket in seconds, in increasing order
+        """
+        self._bounds = bounds
+        self._bucketCounts = [0] * (len(bounds) + 1)
+        self._sum = 0.0
+        self._count = 0
+
+    def observe(self, seconds):
+        """Adds a duration to the histogram"""
+        self._bucketCounts[bisect_left(self._bounds, seconds)] += 1
+        self._sum += seconds
+        self._count += 1
+
+    def getSnapshot(self):
+        """
+        Returns the state of the histogram as a dictionary with the cumulative count of each bucket, as
+        (upper bound, count) pairs ending with the None bound of all durations, the sum and the count
+        """
+        (buckets, cumulativeCount) = ([], 0)
+        for (bound, bucketCount) in zip(self._bounds + (None,), self._bucketCounts):
+            cumulativeCount += bucketCount
+            buckets.append((bound, cumulativeCount))
+        return {"buckets": buckets, "sum": self._sum, "count": self._count}
+
+
+class MetricsRegistry:
+    """
+    Process-local registry of counters and latency histograms. Operations are instrumented with the
+    MetricsRegistry.instrument decorator which counts the calls, the calls that failed with an InvalidTransaction
+    and their durations. While the registry is disabled, which is the default, the decorator only checks the
+    enabled flag before calling the operation.
+
+    For an operation named "book_borrow" the registry holds the counters book_borrow_total and
+    book_borrow_failures_total and the histogram book_borrow_seconds.
+
+    Attributes:
+        _enabled     : bool  -- True when the operations are measured
+        _counters    : dict  -- the value of each counter by name
+        _histograms  : dict  -- the LatencyHistogram of each histogram by name
+        _lock        : Lock  -- serializes the updates of the counters and histograms
+
+    Version 1.0 (Python)
+    """
+
+    """constant for the upper bounds in seconds of the buckets of the latency histograms"""
+    LATENCY_BUCKETS = (0.00001, 0.000025, 0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005,
+                       0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+    """constant for the prefix of the metric names in the text exposition"""
+    METRIC_PREFIX = "library_"
+
+    """the registry of the process, created when the module is imported"""
+    _processRegistry = None
+
+    def __init__(self):
+        """Initialize an empty registry that is disabled"""
+        self._enabled = False
+        self._counters = {}
+        self._histograms = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def getRegistry():
+        """Returns the registry of the process, the one the instrumented operations report to"""
+        return MetricsRegistry._processRegistry
+
+    def isEnabled(self):
+        """Returns True when the operations are measured"""
+        return self._enabled
+
+    def setEnabled(self, enabled):
+        """Starts or stops measuring the operations. The values measured so far are kept"""
+        self._enabled = enabled
+
+    def reset(self):
+        """Removes all counters and histograms"""
+        with self._lock:
+            self._counters = {}
+            self._histograms = {}
+
+    def incrementCounter(self, counterName, amount = 1):
+        """Adds the given amount to a counter, which starts at 0"""
+        with self._lock:
+            self._counters[counterName] = self._counters.get(counterName, 0) + amount
+
+    def observeLatency(self, histogramName, seconds):
+        """Adds a duration in seconds to a latency histogram"""
+        with self._lock:
+            histogram = self._histograms.get(histogramName)
+            if histogram == None:
+                histogram = self._histograms[histogramName] = LatencyHistogram(MetricsRegistry.LATENCY_BUCKETS)
+            histogram.observe(seconds)
+
+    def recordOperation(self, operationName, seconds, failed):
+        """Records a call of an instrumented operation that lasted the given number of seconds"""
+        with self._lock:
+            counters = self._counters
+            counters[f"{operationName}_total"] = counters.get(f"{operationName}_total", 0) + 1
+            if failed:
+                counters[f"{operationName}_failures_total"] = counters.get(f"{operationName}_failures_total", 0) + 1
+
+            histogram = self._histograms.get(f"{operationName}_seconds")
+            if histogram == None:
+                histogram = self._histograms[f"{operationName}_seconds"] = LatencyHistogram(MetricsRegistry.LATENCY_BUCKETS)
+            histogram.observe(seconds)
+
+    def getSnapshot(self):
+        """
+        Returns a consistent copy of all the metrics
+        Returns:
+            dictionary with the "counters" by name and the "histograms" by name as returned by
+            LatencyHistogram.getSnapshot
+        """
+        with self._lock:
+            return {"counters": dict(self._counters),
+                    "histograms": {name: histogram.getSnapshot() for (name, histogram) in self._histograms.items()}}
+
+    def getTextExposition(self):
+        """Returns the metrics in the Prometheus text exposition format so a local scraper can read them"""
+        snapshot = self.getSnapshot()
+        lines = []
+        for (counterName, value) in sorted(snapshot["counters"].items()):
+            metricName = MetricsRegistry.METRIC_PREFIX + counterName
+            lines.append(f"# TYPE {metricName} counter")
+            lines.append(f"{metricName} {value}")
+
+        for (histogramName, histogram) in sorted(snapshot["histograms"].items()):
+            metricName = MetricsRegistry.METRIC_PREFIX + histogramName
+            lines.append(f"# TYPE {metricName} histogram")
+            for (bound, cumulativeCount) in histogram["buckets"]:
+                lines.append(f'{metricName}_bucket{{le="{"+Inf" if bound == None else repr(bound)}"}} {cumulativeCount}')
+            lines.append(f"{metricName}_sum {histogram['sum']!r}")
+            lines.append(f"{metricName}_count {histogram['count']}")
+
+        return "\n".join(lines) + "\n"
+
+    @staticmethod
+    def instrument(operationName):
+        """
+        Decorator that records the calls of the decorated function in the registry of the process
+        Arguments:
+            operationName  : str -- the name of the operation the metrics are named after
+        """
+        def decorate(function):
+            @functools.wraps(function)
+            def instrumented(*args, **kwargs):
+                registry = MetricsRegistry._processRegistry
+                if not registry._enabled:
+                    return function(*args, **kwargs)
+
+                startTime = time.perf_counter()
+                try:
+                    result = function(*args, **kwargs)
+                except InvalidTransaction:
+                    registry.recordOperation(operationName, time.perf_counter() - startTime, True)
+                    raise
+                registry.recordOperation(operationName, time.perf_counter() - startTime, False)
+                return result
+            return instrumented
+        return decorate
+
+
+MetricsRegistry._processRegistry = MetricsRegistry()
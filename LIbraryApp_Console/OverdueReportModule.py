@@ -0,0 +1,121 @@
+"""
+Module that defines the OverdueReport class that calculates the late days and late fees of all
+the overdue library assets in a single batched pass
+
+Author: Prof. Magdin Stoica
+E-Mail: magdin.stoica@sheridancollege.ca
+Version 1.0 (Python)
+"""
+from datetime import timedelta
+import numpy as np
+
+class OverdueReport:
+    """
+    Library-wide report of the overdue assets and their projected late fees. Only the assets on loan can be late
+    and the due date index of the library keeps their due dates in order, so the report reads the range of the
+    index that is due before the report date instead of going through the assets. The due dates are turned into
+    an array of date ordinals and the late days and fees are computed for all of them at once with NumPy. The fees
+    use the late penalty per day of each book, the PaperBook constant or the penalty of the license of each
+    DigitalBook.
+
+    Attributes:
+        _reportDate : date        -- the date the late periods are calculated for
+        _books      : list        -- the books with overdue assets, referenced by the book index of each asset
+        _libIDs     : np.ndarray  -- the library ID of each overdue asset
+        _bookIndex  : np.ndarray  -- the index in _books of the book of each overdue asset
+        _daysLate   : np.ndarray  -- the number of days each overdue asset is late
+        _lateFees   : np.ndarray  -- the projected late fees of each overdue asset
+        _assetCount : int         -- the number of assets of the library when the report was calculated
+
+    Version 1.0 (Python)
+    """
+
+    def __init__(self, library, reportDate = None, readSnapshot = None):
+        """
+        Calculates the report for the given library
+        Arguments:
+            library       : Library -- the library to report on
+            reportDate    : date -- the date the late periods are calculated for, by default the date of the library
+                                    clock, when the read snapshot was opened if there is one
+            readSnapshot  : ReadSnapshot -- the snapshot the state of the assets is read from, optional. Without
+                                            snapshot the live state of the assets is read
+        """
+        if reportDate == None:
+            reportDate = library.getClock().today() if readSnapshot == None else readSnapshot.getOpenedOn()
+        self._reportDate = reportDate
+
+        #an asset due the day before the report date is one day late
+        endDate = self._reportDate - timedelta(days = 1)
+        entries = library.findDueDateEntries(None, endDate)
+        if readSnapshot == None:
+            statusCounts = library.getStatusCounts()
+        else:
+            entries = readSnapshot.getLoanedDueDates(entries, endDate)
+            statusCounts = readSnapshot.getStatusCounts()
+        self._assetCount = sum(statusCounts)
+
+        #find the book of each overdue asset without loading the asset, numbering the books as they are found
+        self._books = []
+        bookNumbers = {}
+        libIDs = []
+        bookIndex = []
+        dueOrdinals = []
+        for (dueDate, libID) in entries:
+            book = library.findBookByLibID(libID)
+            if book == None:
+                continue
+            if book not in bookNumbers:
+                bookNumbers[book] = len(self._books)
+                self._books.append(book)
+            libIDs.append(libID)
+            bookIndex.append(bookNumbers[book])
+            dueOrdinals.append(dueDate.toordinal())
+
+        #an asset on loan is not returned yet so its late period is measured up to the report date
+        penalties = np.array([book.getLatePenaltyPerDay() for book in self._books], dtype = np.float64)
+        self._libIDs = np.array(libIDs, dtype = np.int64)
+        self._bookIndex = np.array(bookIndex, dtype = np.int64)
+        self._daysLate = self._reportDate.toordinal() - np.array(dueOrdinals, dtype = np.int64)
+        self._lateFees = self._daysLate * penalties[self._bookIndex]
+
+    def getReportDate(self):
+        """Returns the date the late periods are calculated for"""
+        return self._reportDate
+
+    def getAssetCount(self):
+        """Returns the number of assets of the library when the report was calculated"""
+        return self._assetCount
+
+    def getOverdueCount(self):
+        """Returns the number of assets that are overdue"""
+        return len(self._libIDs)
+
+    def getTotalLateFees(self):
+        """Returns the total projected late fees of all overdue assets"""
+        return float(self._lateFees.sum())
+
+    def getOverdueAssets(self, minDaysLate = 1):
+        """
+        Returns the overdue assets that are late by at least the given number of days, the latest first
+        Arguments:
+            minDaysLate  : int -- the minimum number of days an asset must be late to be included
+        Returns:
+            a list of (library ID, book, days late, late fees) tuples
+        """
+        selected = np.nonzero(self._daysLate >= minDaysLate)[0]
+        selected = selected[np.argsort(-self._daysLate[selected], kind = "stable")]
+
+        return [(int(self._libIDs[i]), self._books[self._bookIndex[i]], int(self._daysLate[i]), float(self._lateFees[i]))
+                for i in selected]
+
+    def getLateFeesByBook(self):
+        """
+        Returns the total projected late fees of each book with overdue assets
+        Returns:
+            a list of (book, number of overdue assets, late fees) tuples
+        """
+        overdueCounts = np.bincount(self._bookIndex, minlength = len(self._books))
+        feeTotals = np.bincount(self._bookIndex, weights = self._lateFees, minlength = len(self._books))
+
+        return [(self._books[iBook], int(overdueCounts[iBook]), float(feeTotals[iBook]))
+                for iBook in np.nonzero(overdueCounts)[0]]
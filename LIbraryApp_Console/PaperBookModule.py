@@ -6,7 +6,6 @@ E-Mail: magdin.stoica@sheridancollege.ca
 Version 1.0 (Python)
 """
 from BookModule import Book
-from datetime import date, timedelta
 
 class PaperBook(Book):
     """
@@ -20,6 +19,9 @@ class PaperBook(Book):
     Version 1.0 (Python)
     """
 
+    #paper books have no field variables of their own
+    __slots__ = ()
+
     #these are class variables which are not specific to an instance, they are not field variables
     #they are shared by all instances and are accessible using the name of the class with the DOT notation
     
@@ -32,19 +34,13 @@ class PaperBook(Book):
     def __init__(self, bookName, bookISBN):
         Book.__init__(self, bookName, bookISBN)
 
-    def borrowBook(self):
-        """
-        Overrides the base implementation to use the deadline and renewal conditions for paper books
-        Returns:
-            library asset that is loaned to the library users. The ID of the asset needs to be used to return the asset
-        """
-        #call the base implementation to borrow the book
-        libAsset = Book.borrowBook(self)
-
-        #adjust the due date according to the policy for paper books
-        libAsset.setDueDate(date.today() + timedelta(days = PaperBook.MAX_BORROW_DAYS))
+    def getMaxBorrowDays(self):
+        """Overrides the base implementation to use the deadline for paper books"""
+        return PaperBook.MAX_BORROW_DAYS
 
-        return libAsset
+    def getLatePenaltyPerDay(self):
+        """Returns the late penalty per day that applies to all paper books"""
+        return PaperBook.LATE_PENALTY_PER_DAY
 
     def returnBook(self, libID):
         """
@@ -59,7 +55,8 @@ class PaperBook(Book):
             days late       - the number of days the book was late
             late fees       - the late fees applicable if any
         """
-        #call the base implementation to borrow the book
-        (loanDuration, daysLate, lateFees) = Book.returnBook(self, libID)
+        with self._lock:
+            #call the base implementation to borrow the book
+            (loanDuration, daysLate, lateFees) = Book.returnBook(self, libID)
 
-        return (loanDuration, daysLate, daysLate * PaperBook.LATE_PENALTY_PER_DAY)
\ No newline at end of file
+            return (loanDuration, daysLate, daysLate * self.getLatePenaltyPerDay())
@@ -0,0 +1,205 @@
+"""
+Module that defines the ReadSnapshot class, a point-in-time view of the books and assets of a library that
+reports read while the desks keep changing the library
+
+Author: Prof. Magdin Stoica
+E-Mail: magdin.stoica@sheridancollege.ca
+Version 1.0 (Python)
+"""
+from LibraryAssetModule import LibraryAsset
+from datetime import date
+
+class ReadSnapshot:
+    """
+    Consistent view of the state of the assets of a library at the time the snapshot was opened. Nothing is copied
+    when the snapshot is opened: assets are copied on write instead. The first time an asset changes after the
+    snapshot was opened the library gives the snapshot the state the asset had before the change, and the snapshot
+    reads the saved state of the assets that changed and the live state of the others. Desks are never blocked by
+    the readers of the snapshot, only by the opening of the snapshot which waits for the operations in progress.
+
+    The state of an asset is saved before any of its fields change, so the live state of an asset is read first
+    and the saved states are checked again afterwards: an asset whose state was saved in between is read from the
+    saved state instead of the state that was being changed. Assets added after the snapshot was opened have a
+    library ID that was not allocated yet when it was opened and they are left out.
+
+    The books of the catalogue snapshot of the library that were not loaded when the snapshot was opened are not
+    loaded for it. The catalogue snapshot is never written to, so their state when the snapshot was opened is read
+    from its records even if they were loaded and changed since.
+
+    Attributes:
+        _library        : Library -- the library the snapshot is a view of
+        _books          : list    -- the books of the library that were loaded when the snapshot was opened
+        _catalogueSnapshot : CatalogueSnapshot -- the catalogue snapshot the library loaded its books from when the
+                                     snapshot was opened or None
+        _loadedBookIndexes : set  -- the indexes of the books of the catalogue snapshot that were loaded when the
+                                     snapshot was opened
+        _nextLibID      : int     -- the first library ID that was not allocated when the snapshot was opened
+        _openedOn       : date    -- the date of the library clock when the snapshot was opened
+        _statusCounts   : list    -- the number of assets of the library in each status when the snapshot was opened
+        _savedStates    : dict    -- the (status, borrowed on, returned on, due date) each asset that changed had
+                                     when the snapshot was opened, by library ID
+        _changedBooks   : set     -- the books with assets that changed since the snapshot was opened
+
+    Version 1.0 (Python)
+    """
+
+    def __init__(self, library, books, nextLibID, catalogueSnapshot = None, loadedBookIndexes = ()):
+        """
+        Initialize the snapshot. Snapshots are opened by Library.openReadSnapshot while no operation is in progress
+        Arguments:
+            library            : Library -- the library the snapshot is a view of
+            books              : list    -- the books of the library that are loaded
+            nextLibID          : int     -- the first library ID that is not allocated yet
+            catalogueSnapshot  : CatalogueSnapshot -- the catalogue snapshot the library loads its books from or None
+            loadedBookIndexes  : iterable -- the indexes of the books of the catalogue snapshot that are loaded
+        """
+        self._library = library
+        self._books = list(books)
+        self._catalogueSnapshot = catalogueSnapshot
+        self._loadedBookIndexes = set(loadedBookIndexes)
+        self._nextLibID = nextLibID
+        self._openedOn = library.getClock().today()
+        self._statusCounts = library.getStatusCounts()
+        self._savedStates = {}
+        self._changedBooks = set()
+
+    def getBooks(self):
+        """Returns the books of the library that were loaded when the snapshot was opened"""
+        return self._books
+
+    def getUnloadedBookIndexes(self):
+        """
+        Returns the indexes in the catalogue snapshot of the books that were not loaded when the snapshot was opened.
+        Their assets are read with getUnloadedAssetStates
+        """
+        if self._catalogueSnapshot == None:
+            return []
+        return [bookIndex for bookIndex in range(self._catalogueSnapshot.getBookCount())
+                if bookIndex not in self._loadedBookIndexes]
+
+    def getUnloadedBookText(self, bookIndex):
+        """Returns the (book name, list of authors) of a book that was not loaded when the snapshot was opened"""
+        return self._catalogueSnapshot.readBookText(bookIndex)
+
+    def getUnloadedAssetStates(self, bookIndex):
+        """
+        Returns the state of the assets of a book that was not loaded when the snapshot was opened, read from the
+        records of the catalogue snapshot without loading the book
+        Arguments:
+            bookIndex  : int -- the index of the book in the catalogue snapshot
+        Returns:
+            the list of (library ID, status, borrowed on, returned on, due date) of the assets of the book
+        """
+        (firstAsset, assetCount) = self._catalogueSnapshot.readBookRecord(bookIndex)[6:]
+        return [(libID, status, ReadSnapshot.toDate(borrowedOn), ReadSnapshot.toDate(returnedOn), ReadSnapshot.toDate(dueDate))
+                for (libID, assetBookIndex, status, borrowedOn, returnedOn, dueDate)
+                in self._catalogueSnapshot.readAssetRecords(firstAsset, assetCount)]
+
+    def getOpenedOn(self):
+        """Returns the date of the library clock when the snapshot was opened"""
+        return self._openedOn
+
+    def getStatusCounts(self):
+        """Returns the number of assets of the library in each status when the snapshot was opened"""
+        return self._statusCounts
+
+    def getSavedStateCount(self):
+        """Returns the number of assets whose state was saved because they changed after the snapshot was opened"""
+        return len(self._savedStates)
+
+    def preserveAssetState(self, libAsset):
+        """
+        Saves the state of an asset that is about to change, unless its state was already saved or the asset was
+        added after the snapshot was opened. Called by the library, with the book of the asset locked
+        Arguments:
+            libAsset  : LibraryAsset -- the asset that is about to change
+        """
+        libID = libAsset.getLibID()
+        if libID < self._nextLibID and libID not in self._savedStates:
+            #the book is marked first so a reader that finds no changed book also finds no saved state
+            self._changedBooks.add(libAsset.getBook())
+            self._savedStates[libID] = (libAsset.getStatus(), libAsset.getBorrowedOn(), libAsset.getReturnedOn(),
+                                        libAsset.getDueDate())
+
+    def isBookUnchanged(self, book):
+        """
+        Returns True if no asset of the given book changed since the snapshot was opened. The check is made after the
+        live state of the book was read, so a change that started before it is always noticed
+        """
+        return book not in self._changedBooks
+
+    def getAssetStates(self, book):
+        """
+        Returns the state of the assets of the given book when the snapshot was opened, without locking the book.
+        The assets that are not loaded are read from the asset source of the book without being loaded
+        Returns:
+            the list of (library ID, status, borrowed on, returned on, due date) of the assets of the book
+        """
+        assetStates = []
+
+        #the loaded assets are the first assets of the asset source followed by the assets added to the book
+        loadedAssets = list(book.getLoadedAssets())
+        for libAsset in loadedAssets:
+            libID = libAsset.getLibID()
+            if libID >= self._nextLibID:
+                continue
+
+            savedState = self._savedStates.get(libID)
+            if savedState == None:
+                liveState = (libAsset.getStatus(), libAsset.getBorrowedOn(), libAsset.getReturnedOn(), libAsset.getDueDate())
+
+                #the asset could have started to change while it was being read
+                savedState = self._savedStates.get(libID, liveState)
+            assetStates.append((libID,) + savedState)
+
+        #the assets that are not loaded have the state of the asset source unless they were loaded and changed since
+        for (libID, status, borrowedOn, returnedOn, dueDate) in book.readSourceAssetStates(len(loadedAssets)):
+            savedState = self._savedStates.get(libID)
+            if savedState == None:
+                savedState = (status, ReadSnapshot.toDate(borrowedOn), ReadSnapshot.toDate(returnedOn), ReadSnapshot.toDate(dueDate))
+            assetStates.append((libID,) + savedState)
+
+        return assetStates
+
+    def getLoanedDueDates(self, liveEntries, endDate):
+        """
+        Returns the entries of the assets that were on loan when the snapshot was opened, with a due date up to the
+        given date. The entries of the due date index must be read after the snapshot was opened and before this
+        call: an asset that changed since has its saved state, which replaces its live entry
+        Arguments:
+            liveEntries  : list -- the (due date, library ID) entries of the due date index up to the end date
+            endDate      : date -- the latest due date
+        Returns:
+            the list of (due date, library ID) entries
+        """
+        savedStates = dict(self._savedStates)
+        entries = [(dueDate, libID) for (dueDate, libID) in liveEntries
+                   if libID < self._nextLibID and libID not in savedStates]
+        for (libID, (status, borrowedOn, returnedOn, dueDate)) in savedStates.items():
+            if status == LibraryAsset.LOANED and dueDate != None and dueDate <= endDate:
+                entries.append((dueDate, libID))
+        return entries
+
+    def countAssetStatuses(self, book):
+        """Returns the number of assets of the given book in each status when the snapshot was opened, indexed by status"""
+        statusCounts = [0] * LibraryAsset.STATUS_COUNT
+        for (libID, status, borrowedOn, returnedOn, dueDate) in self.getAssetStates(book):
+            statusCounts[status] += 1
+        return statusCounts
+
+    def countUnloadedAssetStatuses(self, bookIndex):
+        """
+        Returns the number of assets in each status, indexed by status, of a book that was not loaded when the
+        snapshot was opened
+        """
+        (firstAsset, assetCount) = self._catalogueSnapshot.readBookRecord(bookIndex)[6:]
+        return self._catalogueSnapshot.countAssetStatuses(firstAsset, assetCount)
+
+    @staticmethod
+    def toDate(ordinal):
+        """Returns the date with the given ordinal or None for 0"""
+        return None if ordinal == 0 else date.fromordinal(ordinal)
+
+    def close(self):
+        """Closes the snapshot so the library stops saving the states of the assets for it"""
+        self._library.closeReadSnapshot(self)
@@ -0,0 +1,426 @@
+"""
+Module that defines the SQLiteLibraryStorage class that stores the books and library assets of a
+library in a SQLite database
+
+Author: Prof. Magdin Stoica
+E-Mail: magdin.stoica@sheridancollege.ca
+Version 1.0 (Python)
+"""
+from LibraryModule import Library
+from PaperBookModule import PaperBook
+from DigitalBookModule import DigitalBook
+from LibraryAssetModule import LibraryAsset
+from ExceptionsModule import DuplicateBook
+from contextlib import contextmanager
+from datetime import date
+import queue
+import sqlite3
+
+class SQLiteLibraryStorage:
+    """
+    Persistent storage for a library on top of a SQLite database file. The database uses write-ahead logging
+    so that several console or service processes can share one catalogue file on a local disk: readers do not
+    block the writer and each borrow, return or reserve operation is a single short transaction. Books registered
+    by another process are loaded from the database the first time they are looked up and not found in memory,
+    and registering a book that another process registered first raises DuplicateBook.
+
+    Every circulation transaction starts with BEGIN IMMEDIATE which takes the write lock, refreshes the assets
+    of the book from the database if another process changed them since they were loaded, lets the book
+    perform the operation in memory and writes back the asset the operation changed, and the holds on the book
+    when the operation changed them. Each book has a version number that is incremented by every circulation
+    transaction so the refresh is skipped when the book was not changed by another process.
+
+    The SQL statements are constants so that the statement cache of each connection reuses their prepared
+    form. Connections are kept in a pool and handed out to one thread at a time.
+
+    Attributes:
+        _dbPath       : str         -- the path of the database file
+        _pool         : queue.Queue -- the pool of idle connections
+        _bookVersions : dict        -- the version of each book (by ISBN) as it was last loaded or written
+        _lastBookRowID : int        -- the row ID of the last book loaded in the order books were saved, the books
+                                       saved after it were registered by other processes
+
+    Version 1.0 (Python)
+    """
+
+    """constant for the default number of pooled connections"""
+    DEFAULT_POOL_SIZE = 4
+
+    """constant for the number of milliseconds a connection waits for the write lock held by another process"""
+    BUSY_TIMEOUT_MS = 5000
+
+    """constants representing the type of book stored in the database"""
+    BOOK_TYPE_PAPER = 1
+    BOOK_TYPE_DIGITAL = 2
+
+    """separator used to store the list of authors in a single column"""
+    AUTHOR_SEPARATOR = "\x1f"
+
+    SCHEMA_SQL = """
+        CREATE TABLE IF NOT EXISTS books (
+            isbn              TEXT PRIMARY KEY,
+            name              TEXT NOT NULL,
+            normalizedName    TEXT NOT NULL,
+            bookType          INTEGER NOT NULL,
+            authors           TEXT NOT NULL,
+            maxBorrowDays     INTEGER,
+            latePenaltyPerDay REAL,
+            version           INTEGER NOT NULL DEFAULT 0
+        );
+        CREATE INDEX IF NOT EXISTS booksByName ON books (normalizedName);
+        CREATE INDEX IF NOT EXISTS booksByISBNKey ON books (upper(replace(replace(isbn, '-', ''), ' ', '')));
+        CREATE TABLE IF NOT EXISTS assets (
+            libID      INTEGER PRIMARY KEY,
+            isbn       TEXT NOT NULL REFERENCES books (isbn),
+            status     INTEGER NOT NULL,
+            borrowedOn INTEGER,
+            returnedOn INTEGER,
+            dueDate    INTEGER
+        );
+        CREATE INDEX IF NOT EXISTS assetsByISBN ON assets (isbn);
+        CREATE TABLE IF NOT EXISTS holds (
+            isbn      TEXT NOT NULL REFERENCES books (isbn),
+            position  INTEGER NOT NULL,
+            patronID  TEXT NOT NULL,
+            tier      INTEGER,
+            heldLibID INTEGER,
+            PRIMARY KEY (isbn, position)
+        );
+        CREATE TABLE IF NOT EXISTS settings (
+            name  TEXT PRIMARY KEY,
+            value INTEGER NOT NULL
+        );
+    """
+
+    INSERT_BOOK_SQL = ("INSERT INTO books (isbn, name, normalizedName, bookType, authors, maxBorrowDays, latePenaltyPerDay) "
+                       "VALUES (?, ?, ?, ?, ?, ?, ?)")
+    INSERT_ASSET_SQL = "INSERT INTO assets (libID, isbn, status, borrowedOn, returnedOn, dueDate) VALUES (?, ?, ?, ?, ?, ?)"
+    UPDATE_BOOK_AUTHORS_SQL = "UPDATE books SET authors = ? WHERE isbn = ?"
+    UPDATE_ASSET_SQL = "UPDATE assets SET status = ?, borrowedOn = ?, returnedOn = ?, dueDate = ? WHERE libID = ?"
+    SELECT_BOOKS_SQL = "SELECT isbn, name, bookType, authors, maxBorrowDays, latePenaltyPerDay, version FROM books"
+    SELECT_NEW_BOOKS_SQL = ("SELECT isbn, name, bookType, authors, maxBorrowDays, latePenaltyPerDay, version, rowid "
+                            "FROM books WHERE rowid > ? ORDER BY rowid")
+    SELECT_LAST_BOOK_ROWID_SQL = "SELECT ifnull(max(rowid), 0) FROM books"
+    SELECT_BOOK_BY_ISBN_KEY_SQL = SELECT_BOOKS_SQL + " WHERE upper(replace(replace(isbn, '-', ''), ' ', '')) = ?"
+    SELECT_BOOK_BY_NAME_SQL = SELECT_BOOKS_SQL + " WHERE normalizedName = ? ORDER BY rowid LIMIT 1"
+    SELECT_BOOK_BY_LIBID_SQL = SELECT_BOOKS_SQL + " WHERE isbn = (SELECT isbn FROM assets WHERE libID = ?)"
+    SELECT_ASSETS_SQL = "SELECT libID, isbn, status, borrowedOn, returnedOn, dueDate FROM assets ORDER BY libID"
+    SELECT_BOOK_ASSETS_SQL = "SELECT libID, status, borrowedOn, returnedOn, dueDate FROM assets WHERE isbn = ?"
+    SELECT_HOLDS_SQL = "SELECT isbn, patronID, tier, heldLibID FROM holds ORDER BY isbn, position"
+    SELECT_BOOK_HOLDS_SQL = "SELECT patronID, tier, heldLibID FROM holds WHERE isbn = ? ORDER BY position"
+    DELETE_BOOK_HOLDS_SQL = "DELETE FROM holds WHERE isbn = ?"
+    INSERT_HOLD_SQL = "INSERT INTO holds (isbn, position, patronID, tier, heldLibID) VALUES (?, ?, ?, ?, ?)"
+    SELECT_BOOK_VERSION_SQL = "SELECT version FROM books WHERE isbn = ?"
+    INCREMENT_BOOK_VERSION_SQL = "UPDATE books SET version = version + 1 WHERE isbn = ?"
+    SELECT_SETTING_SQL = "SELECT value FROM settings WHERE name = ?"
+    UPSERT_SETTING_SQL = ("INSERT INTO settings (name, value) VALUES (?, ?) "
+                          "ON CONFLICT (name) DO UPDATE SET value = excluded.value")
+
+    """name of the setting that holds the next library ID to allocate"""
+    NEXT_LIBID_SETTING = "nextLibID"
+
+    def __init__(self, dbPath, poolSize = DEFAULT_POOL_SIZE):
+        """
+        Opens the database file, creating the tables if needed
+        Arguments:
+            dbPath    : str -- the path of the database file
+            poolSize  : int -- the number of pooled connections
+        """
+        self._dbPath = dbPath
+        self._bookVersions = {}
+        self._lastBookRowID = 0
+        self._pool = queue.Queue()
+        for iConnection in range(poolSize):
+            self._pool.put(self.openConnection())
+
+        with self.connection() as dbConnection:
+            dbConnection.executescript(SQLiteLibraryStorage.SCHEMA_SQL)
+
+    def openConnection(self):
+        """Opens a connection to the database configured for write-ahead logging and manual transactions"""
+        dbConnection = sqlite3.connect(self._dbPath, isolation_level = None, check_same_thread = False,
+                                       timeout = SQLiteLibraryStorage.BUSY_TIMEOUT_MS / 1000)
+        dbConnection.execute("PRAGMA journal_mode = WAL")
+        dbConnection.execute("PRAGMA synchronous = NORMAL")
+        dbConnection.execute("PRAGMA foreign_keys = ON")
+        return dbConnection
+
+    @contextmanager
+    def connection(self):
+        """Borrows a connection from the pool for the duration of a with block"""
+        dbConnection = self._pool.get()
+        try:
+            yield dbConnection
+        finally:
+            self._pool.put(dbConnection)
+
+    @contextmanager
+    def transaction(self):
+        """Runs the with block in a write transaction that is committed at the end or rolled back on error"""
+        with self.connection() as dbConnection:
+            dbConnection.execute("BEGIN IMMEDIATE")
+            try:
+                yield dbConnection
+                dbConnection.execute("COMMIT")
+            except BaseException:
+                dbConnection.execute("ROLLBACK")
+                raise
+
+    @contextmanager
+    def readTransaction(self):
+        """Runs the with block in a read transaction so all its queries see the same state of the database"""
+        with self.connection() as dbConnection:
+            dbConnection.execute("BEGIN")
+            try:
+                yield dbConnection
+            finally:
+                dbConnection.execute("COMMIT")
+
+    def close(self):
+        """Closes all the pooled connections"""
+        while not self._pool.empty():
+            self._pool.get().close()
+
+    @staticmethod
+    def toOrdinal(value):
+        """Converts a date to the integer stored in the database"""
+        return None if value == None else value.toordinal()
+
+    @staticmethod
+    def fromOrdinal(value):
+        """Converts an integer stored in the database back to a date"""
+        return None if value == None else date.fromordinal(value)
+
+    @staticmethod
+    def assetRow(libAsset):
+        """Returns the values of the asset fields as they are stored in the database"""
+        return (libAsset.getStatus(), SQLiteLibraryStorage.toOrdinal(libAsset.getBorrowedOn()),
+                SQLiteLibraryStorage.toOrdinal(libAsset.getReturnedOn()),
+                SQLiteLibraryStorage.toOrdinal(libAsset.getDueDate()))
+
+    def allocateLibraryIDs(self, count, defaultStart):
+        """
+        Allocates a block of consecutive library IDs that is unique across all processes sharing the database
+        Arguments:
+            count         : int -- the number of library IDs to allocate
+            defaultStart  : int -- the first library ID when no ID was allocated yet
+        Returns:
+            the first ID of the block
+        """
+        with self.transaction() as dbConnection:
+            row = dbConnection.execute(SQLiteLibraryStorage.SELECT_SETTING_SQL,
+                                       (SQLiteLibraryStorage.NEXT_LIBID_SETTING,)).fetchone()
+            firstLibID = defaultStart if row == None else row[0]
+            dbConnection.execute(SQLiteLibraryStorage.UPSERT_SETTING_SQL,
+                                 (SQLiteLibraryStorage.NEXT_LIBID_SETTING, firstLibID + count))
+        return firstLibID
+
+    def saveBook(self, book):
+        """
+        Inserts a newly registered book and all its assets in a single transaction
+        Arguments:
+            book  : Book -- the book to save
+        """
+        if isinstance(book, DigitalBook):
+            bookType = SQLiteLibraryStorage.BOOK_TYPE_DIGITAL
+            (maxBorrowDays, latePenaltyPerDay) = book.getLoanLicense()
+        else:
+            bookType = SQLiteLibraryStorage.BOOK_TYPE_PAPER
+            (maxBorrowDays, latePenaltyPerDay) = (None, None)
+
+        try:
+            with self.transaction() as dbConnection:
+                dbConnection.execute(SQLiteLibraryStorage.INSERT_BOOK_SQL,
+                                     (book.getISBN(), book.getName(), Library.normalizeName(book.getName()), bookType,
+                                      SQLiteLibraryStorage.AUTHOR_SEPARATOR.join(book.getAuthors()),
+                                      maxBorrowDays, latePenaltyPerDay))
+                dbConnection.executemany(SQLiteLibraryStorage.INSERT_ASSET_SQL,
+                                         ((libAsset.getLibID(), book.getISBN()) + SQLiteLibraryStorage.assetRow(libAsset)
+                                          for libAsset in book.getAssets()))
+        except sqlite3.IntegrityError as err:
+            #another process sharing the database registered the book after this process last looked it up
+            raise DuplicateBook(f"A book with ISBN = {book.getISBN()} is already registered in the library") from err
+        self._bookVersions[book.getISBN()] = 0
+
+    def saveAuthors(self, book):
+        """
+        Updates the authors of a book that were changed after the book was registered
+        Arguments:
+            book  : Book -- the book whose authors were changed
+        """
+        with self.transaction() as dbConnection:
+            dbConnection.execute(SQLiteLibraryStorage.UPDATE_BOOK_AUTHORS_SQL,
+                                 (SQLiteLibraryStorage.AUTHOR_SEPARATOR.join(book.getAuthors()), book.getISBN()))
+
+    def loadBooks(self):
+        """
+        Creates the books stored in the database together with their assets
+        Returns:
+            the list of books in the order they are stored
+        """
+        booksByISBN = {}
+        with self.connection() as dbConnection:
+            #books saved while the books are loaded are loaded again by loadNewBooks, which the library ignores
+            (self._lastBookRowID,) = dbConnection.execute(SQLiteLibraryStorage.SELECT_LAST_BOOK_ROWID_SQL).fetchone()
+            for bookRow in dbConnection.execute(SQLiteLibraryStorage.SELECT_BOOKS_SQL):
+                booksByISBN[bookRow[0]] = self.createBook(bookRow)
+
+            for (libID, isbn, status, borrowedOn, returnedOn, dueDate) in \
+                    dbConnection.execute(SQLiteLibraryStorage.SELECT_ASSETS_SQL):
+                book = booksByISBN[isbn]
+                libAsset = LibraryAsset(libID, book)
+                libAsset.restoreState(status, SQLiteLibraryStorage.fromOrdinal(borrowedOn),
+                                      SQLiteLibraryStorage.fromOrdinal(returnedOn), SQLiteLibraryStorage.fromOrdinal(dueDate))
+                book.addAsset(libAsset)
+
+            holdsByISBN = {}
+            for (isbn, patronID, tier, heldLibID) in dbConnection.execute(SQLiteLibraryStorage.SELECT_HOLDS_SQL):
+                holdsByISBN.setdefault(isbn, []).append((patronID, tier, heldLibID))
+
+        #every book restores its holds, which also releases the reserved copies that have no holder
+        for (isbn, book) in booksByISBN.items():
+            book.restoreHolds(holdsByISBN.get(isbn, []))
+
+        return list(booksByISBN.values())
+
+    def createBook(self, bookRow):
+        """
+        Creates the book stored in the given row of the books table, without its assets, and records its version
+        Arguments:
+            bookRow  : tuple -- the row selected by SELECT_BOOKS_SQL
+        """
+        (isbn, name, bookType, authors, maxBorrowDays, latePenaltyPerDay, version) = bookRow
+        if bookType == SQLiteLibraryStorage.BOOK_TYPE_DIGITAL:
+            book = DigitalBook(name, isbn, (maxBorrowDays, latePenaltyPerDay))
+        else:
+            book = PaperBook(name, isbn)
+
+        for author in authors.split(SQLiteLibraryStorage.AUTHOR_SEPARATOR) if len(authors) > 0 else []:
+            book.addAuthor(author)
+
+        self._bookVersions[isbn] = version
+        return book
+
+    def loadNewBooks(self, isLoaded):
+        """
+        Loads the books saved since the books were last loaded, together with their assets and holds
+        Arguments:
+            isLoaded  : function -- returns True for the ISBN of a book the library already has, such as the books
+                                    registered by this process, which are not loaded again
+        Returns:
+            the list of books, which are not added to the library
+        """
+        books = []
+        with self.readTransaction() as dbConnection:
+            for bookRow in dbConnection.execute(SQLiteLibraryStorage.SELECT_NEW_BOOKS_SQL, (self._lastBookRowID,)).fetchall():
+                self._lastBookRowID = max(self._lastBookRowID, bookRow[-1])
+                if not isLoaded(bookRow[0]):
+                    book = self.createBook(bookRow[:-1])
+                    self.refreshAssets(dbConnection, book)
+                    books.append(book)
+        return books
+
+    def invalidateBook(self, isbn):
+        """Forgets the version of the book with the given ISBN so its next transaction reloads it from the database"""
+        self._bookVersions.pop(isbn, None)
+
+    def findBook(self, selectSQL, key):
+        """
+        Loads the book selected by the given query together with its assets and holds. Used to find the books
+        registered by other processes after this process loaded the books
+        Arguments:
+            selectSQL  : str -- one of the SELECT_BOOK_BY statements
+            key        : the value of the parameter of the statement
+        Returns:
+            the book, which is not added to the library, or None if the database has no such book
+        """
+        with self.readTransaction() as dbConnection:
+            bookRow = dbConnection.execute(selectSQL, (key,)).fetchone()
+            if bookRow == None:
+                return None
+
+            #the version is read in the same transaction as the assets so the assets are not refreshed again
+            book = self.createBook(bookRow)
+            self.refreshAssets(dbConnection, book)
+        return book
+
+    def findBookByISBN(self, isbnKey):
+        """Loads the book with the given normalized ISBN from the database or returns None if there is no such book"""
+        return self.findBook(SQLiteLibraryStorage.SELECT_BOOK_BY_ISBN_KEY_SQL, isbnKey)
+
+    def findBookByName(self, nameKey):
+        """Loads the first book with the given normalized name from the database or returns None if there is no such book"""
+        return self.findBook(SQLiteLibraryStorage.SELECT_BOOK_BY_NAME_SQL, nameKey)
+
+    def findBookByLibID(self, libID):
+        """Loads the book that has the asset with the given library ID or returns None if there is no such asset"""
+        return self.findBook(SQLiteLibraryStorage.SELECT_BOOK_BY_LIBID_SQL, libID)
+
+    def refreshBook(self, dbConnection, book):
+        """
+        Reloads the state of the assets and the holds of the given book if another process changed them since they
+        were last loaded or written by this process. Must be called inside a transaction
+        Returns:
+            the version of the book in the database
+        """
+        row = dbConnection.execute(SQLiteLibraryStorage.SELECT_BOOK_VERSION_SQL, (book.getISBN(),)).fetchone()
+        if row == None or row[0] == self._bookVersions.get(book.getISBN()):
+            return None if row == None else row[0]
+
+        self.refreshAssets(dbConnection, book)
+        self._bookVersions[book.getISBN()] = row[0]
+        return row[0]
+
+    def refreshAssets(self, dbConnection, book):
+        """
+        Sets the state of the assets and the holds of the given book to the rows of the database. Assets that are
+        in the database but not in the book are created and added to the book
+        """
+        for (libID, status, borrowedOn, returnedOn, dueDate) in \
+                dbConnection.execute(SQLiteLibraryStorage.SELECT_BOOK_ASSETS_SQL, (book.getISBN(),)):
+            libAsset = book.getAsset(libID)
+            isNewAsset = libAsset == None
+            if isNewAsset:
+                libAsset = LibraryAsset(libID, book)
+            libAsset.restoreState(status, SQLiteLibraryStorage.fromOrdinal(borrowedOn),
+                                  SQLiteLibraryStorage.fromOrdinal(returnedOn), SQLiteLibraryStorage.fromOrdinal(dueDate))
+            if isNewAsset:
+                book.addAsset(libAsset)
+        book.restoreHolds(list(dbConnection.execute(SQLiteLibraryStorage.SELECT_BOOK_HOLDS_SQL, (book.getISBN(),))))
+
+    @contextmanager
+    def circulationTransaction(self, book):
+        """
+        Runs a borrow, return or reserve operation on the given book as a single transaction. The assets of the
+        book are refreshed before the operation. The with block receives a list to which it adds the assets
+        changed by the operation and these assets are written when the block completes, together with the holds
+        on the book if the operation changed them. If the transaction
+        fails, the book is reloaded from the database at the start of its next transaction
+        Arguments:
+            book  : Book -- the book the operation is performed on
+        """
+        isbn = book.getISBN()
+        try:
+            with self.transaction() as dbConnection:
+                version = self.refreshBook(dbConnection, book)
+                previousHolds = book.getHolds()
+
+                changedAssets = []
+                yield changedAssets
+
+                #write the assets and the holds that changed and record the new version of the book
+                holds = book.getHolds()
+                if len(changedAssets) > 0 or holds != previousHolds:
+                    dbConnection.executemany(SQLiteLibraryStorage.UPDATE_ASSET_SQL,
+                                             (SQLiteLibraryStorage.assetRow(libAsset) + (libAsset.getLibID(),)
+                                              for libAsset in changedAssets))
+                    if holds != previousHolds:
+                        dbConnection.execute(SQLiteLibraryStorage.DELETE_BOOK_HOLDS_SQL, (isbn,))
+                        dbConnection.executemany(SQLiteLibraryStorage.INSERT_HOLD_SQL,
+                                                 ((isbn, position) + hold for (position, hold) in enumerate(holds)))
+                    dbConnection.execute(SQLiteLibraryStorage.INCREMENT_BOOK_VERSION_SQL, (isbn,))
+                    self._bookVersions[isbn] = None if version == None else version + 1
+        except BaseException:
+            #the memory and the database could differ so the book is reloaded by the next transaction
+            self._bookVersions.pop(isbn, None)
+            raise
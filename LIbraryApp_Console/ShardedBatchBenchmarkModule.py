@@ -0,0 +1,148 @@
+"""
+Module that defines the ShardedBatchBenchmark class that measures how the library-wide batch jobs scale with the
+number of worker processes of the ShardedBatchExecutor
+
+Author: Prof. Magdin Stoica
+E-Mail: magdin.stoica@sheridancollege.ca
+Version 1.0 (Python)
+"""
+from LibraryModule import Library
+from LibraryClockModule import SimulatedClock
+from ShardedBatchExecutorModule import ShardedBatchExecutor, OverdueScanJob, LateFeeTotalsJob, InventoryAuditJob, DueDateReindexJob
+from datetime import date, timedelta
+import argparse
+import os
+import pickle
+import random
+import time
+
+class ShardedBatchBenchmark:
+    """
+    Builds a synthetic library with part of its copies on loan, some of them late, and runs the overdue scan, the
+    late fee totals, the inventory audit and the due date reindexing on 1 to N worker processes. The books are
+    partitioned once and every run works on the same shards, so the runs only differ by the number of workers.
+    The results of every run must be the same as the results of the single worker run.
+
+    Attributes:
+        _bookCount      : int  -- the number of books in the library
+        _copiesPerBook  : int  -- the number of copies of each book
+        _runCount       : int  -- the number of runs for each number of workers, the fastest is kept
+
+    Version 1.0 (Python)
+    """
+
+    """constant for the date the synthetic loans are made on"""
+    START_DATE = date(2024, 1, 1)
+
+    """constant for the number of days between the loans and the report, so many of the loans are late"""
+    REPORT_DAYS = 30
+
+    def __init__(self, bookCount = 20000, copiesPerBook = 20, runCount = 3):
+        """
+        Initialize the benchmark
+        Arguments:
+            bookCount      : int -- the number of books in the library
+            copiesPerBook  : int -- the number of copies of each book
+            runCount       : int -- the number of runs for each number of workers, the fastest is kept
+        """
+        self._bookCount = bookCount
+        self._copiesPerBook = copiesPerBook
+        self._runCount = runCount
+
+    def buildLibrary(self):
+        """
+        Creates the synthetic library. Half the copies of each book are borrowed on random days of the month
+        before the report date
+        Returns:
+            (the library, the report date)
+        """
+        clock = SimulatedClock(ShardedBatchBenchmark.START_DATE)
+        library = Library(clock = clock)
+        rand = random.Random(self._bookCount)
+        books = [library.registerBook(f"Batch Book {iBook}", f"BATCH-{iBook:07d}", [],
+                                      Library.BOOK_TYPE_PAPER if iBook % 2 == 0 else Library.BOOK_TYPE_DIGITAL,
+                                      self._copiesPerBook)
+                 for iBook in range(self._bookCount)]
+
+        #the loans are made day by day so the clock only moves forward
+        loansByDay = [[] for day in range(ShardedBatchBenchmark.REPORT_DAYS)]
+        for book in books:
+            for iCopy in range(self._copiesPerBook // 2):
+                loansByDay[rand.randrange(ShardedBatchBenchmark.REPORT_DAYS)].append(book)
+        for (day, loanedBooks) in enumerate(loansByDay):
+            clock.setToday(ShardedBatchBenchmark.START_DATE + timedelta(days = day))
+            for book in loanedBooks:
+                library.borrowBook(book)
+
+        reportDate = ShardedBatchBenchmark.START_DATE + timedelta(days = ShardedBatchBenchmark.REPORT_DAYS)
+        clock.setToday(reportDate)
+        return (library, reportDate)
+
+    def timeRun(self, executor, shards, jobs):
+        """
+        Runs the jobs on the shards several times
+        Returns:
+            (the seconds of the fastest run, the results of the jobs)
+        """
+        bestSeconds = None
+        for iRun in range(self._runCount):
+            startTime = time.perf_counter()
+            results = executor.runShards(shards, jobs)
+            elapsedSeconds = time.perf_counter() - startTime
+            if bestSeconds == None or elapsedSeconds < bestSeconds:
+                bestSeconds = elapsedSeconds
+        return (bestSeconds, results)
+
+    def getReport(self, maxWorkers = None):
+        """
+        Runs the benchmark for 1, 2, 4 ... workers up to the given number and returns the text of the report
+        Arguments:
+            maxWorkers  : int -- the largest number of workers, the number of cores by default
+        """
+        maxWorkers = max(1, os.cpu_count() or 1) if maxWorkers == None else maxWorkers
+        workerCounts = []
+        workerCount = 1
+        while workerCount < maxWorkers:
+            workerCounts.append(workerCount)
+            workerCount *= 2
+        workerCounts.append(maxWorkers)
+
+        (library, reportDate) = self.buildLibrary()
+        jobs = [OverdueScanJob(reportDate), LateFeeTotalsJob(reportDate), InventoryAuditJob(), DueDateReindexJob()]
+
+        #the shards are the same for every run so the partitioning is timed once
+        shardCount = maxWorkers * ShardedBatchExecutor.SHARDS_PER_WORKER
+        startTime = time.perf_counter()
+        shards = ShardedBatchExecutor(maxWorkers, shardCount).partitionBooks(library)
+        partitionSeconds = time.perf_counter() - startTime
+        shardBytes = sum(len(pickle.dumps(shard)) for shard in shards)
+
+        lines = [f"{self._bookCount:,} books, {self._bookCount * self._copiesPerBook:,} assets, {shardCount} shards "
+                 f"of {shardBytes / shardCount / 1024:,.0f} KiB on average, partitioned in {partitionSeconds:.2f}s",
+                 f"{'Workers':>7} {'Seconds':>9} {'Speedup':>8} {'Same results':>13}"]
+        (singleWorkerSeconds, singleWorkerResults) = (None, None)
+        for workerCount in workerCounts:
+            executor = ShardedBatchExecutor(workerCount, shardCount)
+            try:
+                #the first run starts the worker processes so it is not timed
+                executor.runShards(shards, jobs)
+                (seconds, results) = self.timeRun(executor, shards, jobs)
+            finally:
+                executor.close()
+
+            if singleWorkerSeconds == None:
+                (singleWorkerSeconds, singleWorkerResults) = (seconds, results)
+            sameResults = (results[:3] == singleWorkerResults[:3] and
+                           results[3].findRange() == singleWorkerResults[3].findRange())
+            lines.append(f"{workerCount:>7} {seconds:>9.3f} {singleWorkerSeconds / seconds:>7.2f}x {str(sameResults):>13}")
+        return "\n".join(lines)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description = "Scaling benchmark of the sharded batch jobs")
+    parser.add_argument("--books", type = int, default = 20000, help = "the number of books in the library")
+    parser.add_argument("--copies", type = int, default = 20, help = "the number of copies of each book")
+    parser.add_argument("--max-workers", type = int, help = "the largest number of workers, the number of cores by default")
+    arguments = parser.parse_args()
+
+    print(ShardedBatchBenchmark(arguments.books, arguments.copies).getReport(arguments.max_workers))
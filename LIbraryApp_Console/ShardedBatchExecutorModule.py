@@ -0,0 +1,376 @@
+"""
+Module that defines the ShardedBatchExecutor class that runs library-wide batch jobs such as overdue scans, late
+fee totals, inventory audits and reindexing on several processes, the BookShard class holding the compact state
+of the books of one shard and the jobs that run on the shards
+
+Author: Prof. Magdin Stoica
+E-Mail: magdin.stoica@sheridancollege.ca
+Version 1.0 (Python)
+"""
+from LibraryAssetModule import LibraryAsset
+from DueDateIndexModule import DueDateIndex
+from concurrent.futures import ProcessPoolExecutor
+from array import array
+from datetime import date
+import heapq
+import os
+import zlib
+
+class BookShard:
+    """
+    The state of the books of one shard and of their assets stored in flat arrays, one entry per book or per asset.
+    A shard is sent to a worker process as a handful of arrays instead of a graph of Book and LibraryAsset objects,
+    which is many times smaller to pickle and does not depend on the locks and the library the objects refer to.
+
+    Attributes:
+        _isbns          : list  -- the ISBN of each book of the shard
+        _latePenalties  : array -- the late penalty per day of each book
+        _statusCounts   : array -- the status counters of each book, LibraryAsset.STATUS_COUNT entries per book
+        _bookIndex      : array -- the index of the book of each asset
+        _libIDs         : array -- the library ID of each asset
+        _statuses       : bytearray -- the status of each asset
+        _borrowedOn     : array -- the date each asset was borrowed on as a date ordinal, 0 when there is no date
+        _returnedOn     : array -- the date each asset was returned on as a date ordinal, 0 when there is no date
+        _dueDates       : array -- the due date of each asset as a date ordinal, 0 when there is no date
+
+    Version 1.0 (Python)
+    """
+
+    __slots__ = ("_isbns", "_latePenalties", "_statusCounts", "_bookIndex", "_libIDs", "_statuses", "_borrowedOn",
+                 "_returnedOn", "_dueDates")
+
+    def __init__(self):
+        """Initialize an empty shard"""
+        self._isbns = []
+        self._latePenalties = array("d")
+        self._statusCounts = array("q")
+        self._bookIndex = array("i")
+        self._libIDs = array("q")
+        self._statuses = bytearray()
+        self._borrowedOn = array("i")
+        self._returnedOn = array("i")
+        self._dueDates = array("i")
+
+    def addBook(self, book):
+        """
+        Adds the state of a book and of its assets to the shard. The book is locked while its state is read so
+        the counters and the assets are read at the same point in time
+        """
+        with book.getLock():
+            iBook = len(self._isbns)
+            self._isbns.append(book.getISBN())
+            self._latePenalties.append(book.getLatePenaltyPerDay())
+            self._statusCounts.extend(book.getStatusCounts())
+            for (libID, status, borrowedOn, returnedOn, dueDate) in book.readAssetStates():
+                self._bookIndex.append(iBook)
+                self._libIDs.append(libID)
+                self._statuses.append(status)
+                self._borrowedOn.append(borrowedOn)
+                self._returnedOn.append(returnedOn)
+                self._dueDates.append(dueDate)
+
+    def getBookCount(self):
+        """Returns the number of books in the shard"""
+        return len(self._isbns)
+
+    def getAssetCount(self):
+        """Returns the number of assets in the shard"""
+        return len(self._libIDs)
+
+    def getISBN(self, iBook):
+        """Returns the ISBN of the book with the given index in the shard"""
+        return self._isbns[iBook]
+
+    def getLatePenalty(self, iBook):
+        """Returns the late penalty per day of the book with the given index in the shard"""
+        return self._latePenalties[iBook]
+
+    def getStatusCounts(self, iBook):
+        """Returns the status counters of the book with the given index in the shard, indexed by status"""
+        return list(self._statusCounts[iBook * LibraryAsset.STATUS_COUNT:(iBook + 1) * LibraryAsset.STATUS_COUNT])
+
+    def getAssetStates(self):
+        """
+        Returns the state of the assets of the shard
+        Returns:
+            an iterator of (book index, library ID, status, borrowed on, returned on, due date) with the dates as
+            date ordinals, 0 when there is no date
+        """
+        return zip(self._bookIndex, self._libIDs, self._statuses, self._borrowedOn, self._returnedOn, self._dueDates)
+
+
+class BatchJob:
+    """
+    Base class of the map/reduce jobs run by the ShardedBatchExecutor. The map step runs in a worker process on
+    the state of one shard and returns a partial result, the reduce step runs in the calling process and merges
+    the partial results of all the shards. Jobs are sent to the workers with their arguments so they must only
+    hold plain values
+
+    Version 1.0 (Python)
+    """
+
+    def mapShard(self, shard):
+        """Returns the partial result of the job for the books of the given BookShard"""
+        raise NotImplementedError()
+
+    def reduce(self, partialResults):
+        """Returns the result of the job merged from the partial results of all the shards"""
+        raise NotImplementedError()
+
+
+class OverdueScanJob(BatchJob):
+    """
+    Finds the overdue assets and their projected late fees. Like the OverdueReport only the assets on loan are
+    counted and their late period follows the rules of LibraryAsset.getLatePeriod
+
+    Attributes:
+        _reportOrdinal  : int -- the date the late periods are calculated for as a date ordinal
+        _minDaysLate    : int -- the minimum number of days an asset must be late to be included
+
+    Version 1.0 (Python)
+    """
+
+    def __init__(self, reportDate, minDaysLate = 1):
+        """
+        Initialize the job
+        Arguments:
+            reportDate   : date -- the date the late periods are calculated for
+            minDaysLate  : int  -- the minimum number of days an asset must be late to be included
+        """
+        self._reportOrdinal = reportDate.toordinal()
+        self._minDaysLate = max(1, minDaysLate)
+
+    def mapShard(self, shard):
+        """Returns the (days late, library ID, ISBN, late fees) of the overdue assets of the shard, the latest first"""
+        overdueAssets = []
+        for (iBook, libID, status, borrowedOn, returnedOn, dueDate) in shard.getAssetStates():
+            #only the assets on loan can be late, reserved copies can keep the dates of an earlier loan
+            if dueDate == 0 or status != LibraryAsset.LOANED:
+                continue
+
+            #the late period is measured up to the report date since the asset is not returned yet
+            daysLate = self._reportOrdinal - dueDate
+            if daysLate >= self._minDaysLate:
+                overdueAssets.append((-daysLate, libID, shard.getISBN(iBook), daysLate * shard.getLatePenalty(iBook)))
+        overdueAssets.sort()
+        return overdueAssets
+
+    def reduce(self, partialResults):
+        """
+        Merges the sorted overdue assets of the shards
+        Returns:
+            a list of (library ID, ISBN, days late, late fees) tuples, the latest first
+        """
+        return [(libID, isbn, -negativeDaysLate, lateFees)
+                for (negativeDaysLate, libID, isbn, lateFees) in heapq.merge(*partialResults)]
+
+
+class LateFeeTotalsJob(BatchJob):
+    """
+    Totals the projected late fees of each book with overdue assets
+
+    Attributes:
+        _reportOrdinal  : int -- the date the late periods are calculated for as a date ordinal
+
+    Version 1.0 (Python)
+    """
+
+    def __init__(self, reportDate):
+        """
+        Initialize the job
+        Arguments:
+            reportDate  : date -- the date the late periods are calculated for
+        """
+        self._reportOrdinal = reportDate.toordinal()
+
+    def mapShard(self, shard):
+        """Returns the [number of overdue assets, late fees] of each book of the shard with overdue assets, by ISBN"""
+        feeTotals = {}
+        for (iBook, libID, status, borrowedOn, returnedOn, dueDate) in shard.getAssetStates():
+            if dueDate == 0 or status != LibraryAsset.LOANED:
+                continue
+
+            daysLate = self._reportOrdinal - dueDate
+            if daysLate > 0:
+                bookTotals = feeTotals.setdefault(shard.getISBN(iBook), [0, 0.0])
+                bookTotals[0] += 1
+                bookTotals[1] += daysLate * shard.getLatePenalty(iBook)
+        return feeTotals
+
+    def reduce(self, partialResults):
+        """
+        Merges the totals of the shards. A book belongs to a single shard so the totals of the shards do not overlap
+        Returns:
+            a dictionary of the (number of overdue assets, late fees) of each book with overdue assets, by ISBN
+        """
+        feeTotals = {}
+        for shardTotals in partialResults:
+            for (isbn, (overdueCount, lateFees)) in shardTotals.items():
+                feeTotals[isbn] = (overdueCount, lateFees)
+        return feeTotals
+
+
+class InventoryAuditJob(BatchJob):
+    """
+    Recounts the assets of each book in each status and compares the recount with the status counters of the book,
+    like Library.checkStatusCounts does for the whole library in one process
+
+    Version 1.0 (Python)
+    """
+
+    def mapShard(self, shard):
+        """Returns the recount of the assets of the shard in each status and the (ISBN, counters, recount) of the
+        books of the shard whose counters do not match"""
+        shardRecount = [0] * LibraryAsset.STATUS_COUNT
+        bookRecounts = [[0] * LibraryAsset.STATUS_COUNT for iBook in range(shard.getBookCount())]
+        for (iBook, libID, status, borrowedOn, returnedOn, dueDate) in shard.getAssetStates():
+            bookRecounts[iBook][status] += 1
+
+        discrepancies = []
+        for (iBook, recount) in enumerate(bookRecounts):
+            statusCounts = shard.getStatusCounts(iBook)
+            if statusCounts != recount:
+                discrepancies.append((shard.getISBN(iBook), statusCounts, recount))
+            for (status, count) in enumerate(recount):
+                shardRecount[status] += count
+        return (shardRecount, discrepancies)
+
+    def reduce(self, partialResults):
+        """
+        Adds up the recounts of the shards
+        Returns:
+            (the recount of the assets of the library in each status, the list of (ISBN, counters, recount) of the
+            books whose counters do not match)
+        """
+        libraryRecount = [0] * LibraryAsset.STATUS_COUNT
+        discrepancies = []
+        for (shardRecount, shardDiscrepancies) in partialResults:
+            for (status, count) in enumerate(shardRecount):
+                libraryRecount[status] += count
+            discrepancies.extend(shardDiscrepancies)
+        return (libraryRecount, discrepancies)
+
+
+class DueDateReindexJob(BatchJob):
+    """
+    Rebuilds the due date index of the loaned assets. Each shard sorts its own entries and the sorted entries of
+    the shards are merged, so the index is filled in order without searching for the place of each entry
+
+    Version 1.0 (Python)
+    """
+
+    def mapShard(self, shard):
+        """Returns the sorted (due date, library ID) entries of the loaned assets of the shard, due dates as ordinals"""
+        entries = [(dueDate, libID) for (iBook, libID, status, borrowedOn, returnedOn, dueDate) in shard.getAssetStates()
+                   if status == LibraryAsset.LOANED and dueDate != 0]
+        entries.sort()
+        return entries
+
+    def reduce(self, partialResults):
+        """Returns the DueDateIndex of the loaned assets of all the shards"""
+        return DueDateIndex.fromSortedEntries((date.fromordinal(dueDate), libID)
+                                              for (dueDate, libID) in heapq.merge(*partialResults))
+
+
+def runShardJobs(jobs, shard):
+    """Runs the map step of each job on a shard. Called in the worker processes so it is a module-level function"""
+    return [job.mapShard(shard) for job in jobs]
+
+
+class ShardedBatchExecutor:
+    """
+    Runs map/reduce batch jobs over the books of a library on a pool of worker processes so they are not limited
+    to one core. The books are partitioned into shards by a hash of their normalized ISBN, which is the same in
+    every process and every run, and each shard is sent to the workers as a BookShard. Several jobs run on one
+    partitioning of the books so the state of the library is read and sent once.
+
+    The state of the books is read in the calling process, the map steps run in parallel in the workers and the
+    reduce steps run in the calling process. With a single worker the jobs run in the calling process without
+    a pool, which is the baseline the parallel runs are compared with.
+
+    Attributes:
+        _workerCount  : int -- the number of worker processes
+        _shardCount   : int -- the number of shards the books are partitioned into
+        _pool         : ProcessPoolExecutor -- the pool of worker processes, created when jobs are first run
+
+    Version 1.0 (Python)
+    """
+
+    """constant for the default number of shards per worker. Smaller shards than one per worker keep all the
+    workers busy when some shards take longer than others"""
+    SHARDS_PER_WORKER = 4
+
+    def __init__(self, workerCount = None, shardCount = None):
+        """
+        Initialize the executor
+        Arguments:
+            workerCount  : int -- the number of worker processes, the number of cores by default
+            shardCount   : int -- the number of shards, SHARDS_PER_WORKER per worker by default
+        """
+        self._workerCount = max(1, os.cpu_count() or 1) if workerCount == None else max(1, workerCount)
+        self._shardCount = self._workerCount * ShardedBatchExecutor.SHARDS_PER_WORKER if shardCount == None else max(1, shardCount)
+        self._pool = None
+
+    def getWorkerCount(self):
+        """Returns the number of worker processes"""
+        return self._workerCount
+
+    def getShardCount(self):
+        """Returns the number of shards the books are partitioned into"""
+        return self._shardCount
+
+    @staticmethod
+    def getShardNumber(isbnKey, shardCount):
+        """Returns the shard of the book with the given normalized ISBN. CRC-32 is used instead of the built-in
+        hash because string hashes differ from one process to another"""
+        return zlib.crc32(isbnKey.encode("utf-8")) % shardCount
+
+    def partitionBooks(self, library):
+        """
+        Reads the state of the books of the library into shards. The assets of the snapshot books are read from
+        the snapshot without being loaded
+        Returns:
+            the list of BookShard, some of which can be empty
+        """
+        shards = [BookShard() for iShard in range(self._shardCount)]
+        for book in library.getBooks():
+            isbnKey = library.normalizeISBN(book.getISBN())
+            shards[ShardedBatchExecutor.getShardNumber(isbnKey, self._shardCount)].addBook(book)
+        return shards
+
+    def runShards(self, shards, jobs):
+        """
+        Runs the jobs on already partitioned shards
+        Arguments:
+            shards  : list -- the BookShard of each shard
+            jobs    : list -- the BatchJob to run
+        Returns:
+            the list of the results of the jobs, in the order of the jobs
+        """
+        shards = [shard for shard in shards if shard.getBookCount() > 0]
+        if self._workerCount == 1:
+            shardResults = [runShardJobs(jobs, shard) for shard in shards]
+        else:
+            if self._pool == None:
+                self._pool = ProcessPoolExecutor(max_workers = self._workerCount)
+            shardResults = list(self._pool.map(runShardJobs, [jobs] * len(shards), shards))
+
+        #the partial results of each job are in the same position in the results of every shard
+        return [job.reduce([results[iJob] for results in shardResults]) for (iJob, job) in enumerate(jobs)]
+
+    def run(self, library, jobs):
+        """
+        Runs the jobs over all the books of the library
+        Arguments:
+            library  : Library -- the library the jobs run on
+            jobs     : list    -- the BatchJob to run
+        Returns:
+            the list of the results of the jobs, in the order of the jobs
+        """
+        return self.runShards(self.partitionBooks(library), jobs)
+
+    def close(self):
+        """Stops the worker processes"""
+        if self._pool != None:
+            self._pool.shutdown()
+            self._pool = None
@@ -0,0 +1,70 @@
+"""
+Module that defines the TransactionResult class
+
+Author: Prof. Magdin Stoica
+E-Mail: magdin.stoica@sheridancollege.ca
+Version 1.0 (Python)
+"""
+
+class TransactionResult:
+    """
+    The result of a circulation command processed by Library.processTransactions. A successful borrow or reserve
+    has the library ID and due date of the asset, a successful return has the loan duration, the days late and
+    the late fees. A failed command has the error message instead of raising an exception.
+
+    Attributes:
+        _command      : tuple     -- the (operation, key) command the result is for
+        _error        : str       -- the reason the command failed or None if it was successful
+        _libID        : int       -- the library ID of the asset that was borrowed, reserved or returned
+        _dueDate      : date      -- the due date of the borrowed or reserved asset
+        _loanDuration : timedelta -- the duration of the loan of the returned asset
+        _daysLate     : int       -- the number of days the returned asset was late
+        _lateFees     : float     -- the late fees of the returned asset
+
+    Version 1.0 (Python)
+    """
+
+    #results are created for every command of a batch so they do not carry a per-instance dictionary
+    __slots__ = ("_command", "_error", "_libID", "_dueDate", "_loanDuration", "_daysLate", "_lateFees")
+
+    def __init__(self, command, error = None, libID = None, dueDate = None, loanDuration = None, daysLate = 0, lateFees = 0.0):
+        """Initialize the result of the given command"""
+        self._command = command
+        self._error = error
+        self._libID = libID
+        self._dueDate = dueDate
+        self._loanDuration = loanDuration
+        self._daysLate = daysLate
+        self._lateFees = lateFees
+
+    def getCommand(self):
+        """Returns the (operation, key) command the result is for"""
+        return self._command
+
+    def isSuccessful(self):
+        """Returns True if the command was performed"""
+        return self._error == None
+
+    def getError(self):
+        """Returns the reason the command failed or None if it was successful"""
+        return self._error
+
+    def getLibID(self):
+        """Returns the library ID of the asset that was borrowed, reserved or returned"""
+        return self._libID
+
+    def getDueDate(self):
+        """Returns the due date of the borrowed or reserved asset"""
+        return self._dueDate
+
+    def getLoanDuration(self):
+        """Returns the duration of the loan of the returned asset"""
+        return self._loanDuration
+
+    def getDaysLate(self):
+        """Returns the number of days the returned asset was late"""
+        return self._daysLate
+
+    def getLateFees(self):
+        """Returns the late fees of the returned asset"""
+        return self._lateFees
@@ -0,0 +1,61 @@
+"""
+Module that defines the regression tests of the Book class
+
+Author: Prof. Magdin Stoica
+E-Mail: magdin.stoica@sheridancollege.ca
+Version 1.0 (Python)
+"""
+from LibraryModule import Library
+from LibraryAssetModule import LibraryAsset
+from LibraryClockModule import SimulatedClock
+from datetime import date, timedelta
+import unittest
+
+class BookTest(unittest.TestCase):
+    """
+    Tests the circulation of the copies of a book on a simulated calendar
+
+    Version 1.0 (Python)
+    """
+
+    def setUp(self):
+        """Creates a library with the default books whose clock starts on the first day of 2026"""
+        self._clock = SimulatedClock(date(2026, 1, 1))
+        self._library = Library(clock = self._clock)
+        self._book = self._library.findBookByISBN("978-0261102385")
+
+    def testHeldCopyIsLateOnlyForTheHolderLoan(self):
+        """A copy returned late and set aside for a holder is not late on the shelf and is late again if the holder is late"""
+        libIDs = [self._library.borrowBook(self._book).getLibID() for iCopy in range(self._book.getAssetCount())]
+        self._library.reserveBook(self._book, "alice")
+
+        #the first copy comes back 10 days late and goes to the hold shelf
+        self._clock.advance(self._book.getMaxBorrowDays() + 10)
+        (loanDuration, daysLate, lateFees) = self._library.returnBook(self._book, libIDs[0])
+        self.assertEqual(daysLate, 10)
+        heldAsset = self._library.findAssetByLibID(libIDs[0])
+        self.assertEqual(heldAsset.getStatus(), LibraryAsset.RESERVED)
+        self.assertEqual((heldAsset.getBorrowedOn(), heldAsset.getReturnedOn(), heldAsset.getDueDate()), (None, None, None))
+        self.assertEqual(heldAsset.getLatePeriod(), timedelta())
+        self.assertNotIn(heldAsset, self._library.findOverdueAssets())
+        self.assertNotIn(heldAsset.getLibID(), [libID for (libID, book, daysLate, lateFees)
+                                                in self._library.getOverdueReport().getOverdueAssets()])
+
+        #alice picks the copy up a few days later and returns it 5 days late
+        self._clock.advance(3)
+        self.assertIs(self._library.borrowBook(self._book, "alice"), heldAsset)
+        self.assertEqual(heldAsset.getReturnedOn(), None)
+        self._clock.advance(self._book.getMaxBorrowDays() + 5)
+        self.assertEqual(heldAsset.getLatePeriod(), timedelta(days = 5))
+        self.assertIn(heldAsset, self._library.findOverdueAssets())
+        self.assertIn((heldAsset.getLibID(), self._book, 5, 5 * self._book.getLatePenaltyPerDay()),
+                      self._library.getOverdueReport().getOverdueAssets())
+
+        (loanDuration, daysLate, lateFees) = self._library.returnBook(self._book, heldAsset.getLibID())
+        self.assertEqual(loanDuration, timedelta(days = self._book.getMaxBorrowDays() + 5))
+        self.assertEqual(daysLate, 5)
+        self.assertEqual(lateFees, 5 * self._book.getLatePenaltyPerDay())
+
+
+if __name__ == "__main__":
+    unittest.main()
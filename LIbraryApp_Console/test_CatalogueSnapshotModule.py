@@ -0,0 +1,101 @@
+"""
+Module that defines the regression tests of the books of a library opened from a CatalogueSnapshot
+
+Author: Prof. Magdin Stoica
+E-Mail: magdin.stoica@sheridancollege.ca
+Version 1.0 (Python)
+"""
+from LibraryModule import Library
+from LibraryAssetModule import LibraryAsset
+from LibraryClockModule import SimulatedClock
+from CatalogueSnapshotModule import CatalogueSnapshot
+from BookModule import Book
+from datetime import date
+import os
+import tempfile
+import unittest
+
+class CatalogueSnapshotTest(unittest.TestCase):
+    """
+    Tests the loading of the assets of snapshot books in pages and the unloading of the books used least recently
+
+    Version 1.0 (Python)
+    """
+
+    """constant for the number of copies of the large book, a little more than two pages of assets"""
+    LARGE_COPY_COUNT = 2 * Book.ASSET_PAGE_SIZE + 88
+
+    def setUp(self):
+        """Saves a catalogue with a large book and one copy on loan of each default book"""
+        self._directory = tempfile.TemporaryDirectory()
+        self._clock = SimulatedClock(date(2026, 1, 1))
+        library = Library(clock = self._clock)
+        largeBook = library.registerBook("Dune", "978-0441172719", ["Frank Herbert"], Library.BOOK_TYPE_PAPER,
+                                         CatalogueSnapshotTest.LARGE_COPY_COUNT)
+        self._lastLibID = largeBook.getAssets()[-1].getLibID()
+        for isbn in ("978-0261102385", "978-1408898659"):
+            library.borrowBook(library.findBookByISBN(isbn))
+
+        self._snapshotPath = os.path.join(self._directory.name, "catalogue.snap")
+        library.saveSnapshot(self._snapshotPath)
+        self._snapshot = CatalogueSnapshot(self._snapshotPath)
+
+    def tearDown(self):
+        """Closes the catalogue snapshot and removes its file"""
+        self._snapshot.close()
+        self._directory.cleanup()
+
+    def testAssetsAreLoadedInPages(self):
+        """A loan loads one page of copies and the counts of the book are correct before its copies are loaded"""
+        library = Library(snapshot = self._snapshot, clock = self._clock)
+        book = library.findBookByISBN("978-0441172719")
+        self.assertEqual(book.getLoadedAssets(), [])
+        self.assertEqual(book.getAssetCount(), CatalogueSnapshotTest.LARGE_COPY_COUNT)
+        self.assertEqual(book.getStatusCounts(), [0, CatalogueSnapshotTest.LARGE_COPY_COUNT, 0, 0])
+
+        library.borrowBook(book)
+        self.assertEqual(len(book.getLoadedAssets()), Book.ASSET_PAGE_SIZE)
+        self.assertEqual(len(book.readAssetStates()), CatalogueSnapshotTest.LARGE_COPY_COUNT)
+        self.assertEqual(len(book.getLoadedAssets()), Book.ASSET_PAGE_SIZE)
+
+        #the last copy is in the last page so every page up to it is loaded
+        self.assertEqual(library.findAssetByLibID(self._lastLibID).getStatus(), LibraryAsset.AVAILABLE)
+        self.assertEqual(len(book.getLoadedAssets()), CatalogueSnapshotTest.LARGE_COPY_COUNT)
+        self.assertEqual(book.getStatusCounts(), [0, CatalogueSnapshotTest.LARGE_COPY_COUNT - 1, 1, 0])
+        self.assertEqual(library.checkStatusCounts(), [])
+
+    def testLeastRecentlyUsedBooksAreUnloaded(self):
+        """Books whose copies did not change are unloaded when the cache is full and books with a loan keep their copies"""
+        library = Library(snapshot = self._snapshot, clock = self._clock, assetCacheSize = 1)
+        largeBook = library.findBookByISBN("978-0441172719")
+        paperBook = library.findBookByISBN("978-0261102385")
+        digitalBook = library.findBookByISBN("978-1408898659")
+        largeBook.loadAssetPage()
+        paperBook.loadAssetPage()
+
+        #the large book was used least recently so its copies are dropped and its counts are kept
+        self.assertEqual(largeBook.getLoadedAssets(), [])
+        self.assertEqual(largeBook.getStatusCounts(), [0, CatalogueSnapshotTest.LARGE_COPY_COUNT, 0, 0])
+        self.assertEqual(len(paperBook.getLoadedAssets()), 5)
+        self.assertEqual(library.checkStatusCounts(), [])
+
+        #a book with a new loan is not in the snapshot any more and cannot be unloaded
+        loanedAsset = library.borrowBook(paperBook)
+        self.assertEqual(paperBook.unloadAssets(), [])
+        digitalBook.loadAssetPage()
+        largeBook.loadAssetPage()
+        self.assertEqual(len(paperBook.getLoadedAssets()), 5)
+        self.assertIs(library.findAssetByLibID(loanedAsset.getLibID()), loanedAsset)
+        self.assertEqual(digitalBook.getLoadedAssets(), [])
+
+        #an unloaded copy is loaded again with the state it has in the snapshot
+        (loanedLibID,) = [libID for (libID, status, borrowedOn, returnedOn, dueDate) in digitalBook.readAssetStates()
+                          if status == LibraryAsset.LOANED]
+        digitalAsset = library.findAssetByLibID(loanedLibID)
+        self.assertEqual(digitalAsset.getStatus(), LibraryAsset.LOANED)
+        self.assertEqual(library.getStatusCounts(), [0, CatalogueSnapshotTest.LARGE_COPY_COUNT + 7, 3, 0])
+        self.assertEqual(library.checkStatusCounts(), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
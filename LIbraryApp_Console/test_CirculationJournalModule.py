@@ -0,0 +1,160 @@
+"""
+Module that defines the regression tests of the CirculationJournal class
+
+Author: Prof. Magdin Stoica
+E-Mail: magdin.stoica@sheridancollege.ca
+Version 1.0 (Python)
+"""
+from CirculationJournalModule import CirculationJournal
+from LibraryModule import Library
+from BookModule import Book
+from LibraryAssetModule import LibraryAsset
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+from unittest import mock
+import weakref
+
+class CirculationJournalTest(unittest.TestCase):
+    """
+    Tests the recovery of a library from its journal directory
+
+    Version 1.0 (Python)
+    """
+
+    def setUp(self):
+        """Creates an empty journal directory for each test"""
+        self._directory = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        """Removes the journal directory"""
+        self._directory.cleanup()
+
+    def reopen(self, library):
+        """Closes the journal of the library like a program that stops and opens the library again"""
+        library._journal.close()
+        return CirculationJournal.openLibrary(self._directory.name)
+
+    def testRecordsAfterTornTailAreReplayed(self):
+        """A loan made after recovering from a torn journal tail survives the next restart"""
+        library = CirculationJournal.openLibrary(self._directory.name)
+        book = library.findBookByISBN("978-0261102385")
+        firstLibID = library.borrowBook(book).getLibID()
+
+        #a crash in the middle of a write leaves part of a record at the end of the journal
+        library._journal.close()
+        with open(os.path.join(self._directory.name, CirculationJournal.JOURNAL_FILE_NAME), "ab") as journalFile:
+            journalFile.write(b"\x20\x00\x00\x00\x01torn")
+
+        library = CirculationJournal.openLibrary(self._directory.name)
+        self.assertEqual(library.findAssetByLibID(firstLibID).getStatus(), LibraryAsset.LOANED)
+        secondLibID = library.borrowBook(library.findBookByISBN("978-0261102385")).getLibID()
+
+        library = self.reopen(library)
+        self.assertEqual(library.findAssetByLibID(firstLibID).getStatus(), LibraryAsset.LOANED)
+        self.assertEqual(library.findAssetByLibID(secondLibID).getStatus(), LibraryAsset.LOANED)
+        library._journal.close()
+
+    def testFailedWriteFailsLaterWaits(self):
+        """After a failed fsync no later transaction is told that its records are durable"""
+        library = CirculationJournal.openLibrary(self._directory.name)
+        book = library.findBookByISBN("978-0261102385")
+        with mock.patch("CirculationJournalModule.os.fsync", side_effect = OSError("disk full")):
+            self.assertRaises(OSError, library.borrowBook, book)
+        self.assertRaises(OSError, library.borrowBook, book)
+        self.assertRaises(OSError, library._journal.close)
+
+    def testHoldsSurviveRestartAndCheckpoint(self):
+        """A copy set aside for a holder and the patrons still waiting are recovered from the journal and the checkpoint"""
+        library = CirculationJournal.openLibrary(self._directory.name)
+        book = library.findBookByISBN("978-0261102385")
+        libIDs = [library.borrowBook(book).getLibID() for iCopy in range(book.getAssetCount())]
+        library.reserveBook(book, "alice")
+        library.reserveBook(book, "bob")
+        library.returnBook(book, libIDs[0])
+
+        for checkpoint in (False, True):
+            if checkpoint:
+                library.checkpoint()
+            library = self.reopen(library)
+            book = library.findBookByISBN("978-0261102385")
+            self.assertEqual(book.getHolds(), [("alice", None, libIDs[0]), ("bob", 1, None)])
+            self.assertEqual(book.getStatusCounts(), [0, 0, 4, 1])
+
+        self.assertEqual(library.borrowBook(book, "alice").getLibID(), libIDs[0])
+        library.cancelHold(book, "bob")
+        library = self.reopen(library)
+        book = library.findBookByISBN("978-0261102385")
+        self.assertEqual(book.getHolds(), [])
+        self.assertEqual(library.findAssetByLibID(libIDs[0]).getStatus(), LibraryAsset.LOANED)
+        library._journal.close()
+
+    def testAnonymousHoldsAfterRestart(self):
+        """A patron placing an anonymous hold after a restart does not get the ID of an anonymous hold that was restored"""
+        library = CirculationJournal.openLibrary(self._directory.name)
+        book = library.findBookByISBN("978-0261102385")
+        for iCopy in range(book.getAssetCount()):
+            library.borrowBook(book)
+        library._journal.close()
+
+        #each anonymous hold is placed by a new program like the programs started on the same library
+        reserveScript = ("from CirculationJournalModule import CirculationJournal\n"
+                         f"library = CirculationJournal.openLibrary({self._directory.name!r})\n"
+                         "library.reserveBook(library.findBookByISBN('978-0261102385'))\n"
+                         "library._journal.close()\n")
+        for iRun in range(2):
+            subprocess.run([sys.executable, "-c", reserveScript], check = True, capture_output = True,
+                           cwd = os.path.dirname(os.path.abspath(__file__)))
+
+        library = CirculationJournal.openLibrary(self._directory.name)
+        patronIDs = [patronID for (patronID, tier, heldLibID) in library.findBookByISBN("978-0261102385").getHolds()]
+        self.assertEqual(len(set(patronIDs)), 2)
+        library._journal.close()
+
+    def testReservedCopyWithoutHolderIsReleased(self):
+        """A reserved copy recorded without the holds of its book is made available when the library is opened"""
+        library = CirculationJournal.openLibrary(self._directory.name)
+        libAsset = library.findBookByISBN("978-0261102385").getAssets()[0]
+        libAsset.restoreState(LibraryAsset.RESERVED, None, None, None)
+        library._journal.waitDurable(library._journal.logAssetStates([libAsset]))
+
+        library = self.reopen(library)
+        self.assertEqual(library.findAssetByLibID(libAsset.getLibID()).getStatus(), LibraryAsset.AVAILABLE)
+        library.checkpoint()
+        library = self.reopen(library)
+        self.assertEqual(library.findBookByISBN("978-0261102385").getStatusCounts(), [0, 5, 0, 0])
+        library._journal.close()
+
+    def testCheckpointDoesNotLoadSnapshotBooks(self):
+        """A checkpoint copies the books that are not loaded from the old checkpoint and the library moves to the new one"""
+        library = CirculationJournal.openLibrary(self._directory.name)
+        library.registerBook("Dune", "978-0441172719", ["Frank Herbert"], Library.BOOK_TYPE_PAPER, 600)
+        library.checkpoint()
+        library = self.reopen(library)
+
+        #only the first page of copies of the book is loaded by the loan
+        book = library.findBookByISBN("978-0441172719")
+        firstLibID = library.borrowBook(book).getLibID()
+        lastLibID = max(libID for (libID, status, borrowedOn, returnedOn, dueDate) in book.readAssetStates())
+        oldSnapshot = weakref.ref(library._snapshot)
+        library.checkpoint()
+
+        self.assertEqual(len(library._bookList), 1)
+        self.assertEqual(len(book.getLoadedAssets()), Book.ASSET_PAGE_SIZE)
+        self.assertEqual(oldSnapshot(), None)
+
+        #the copies that are not loaded and the books that are not loaded are read from the new checkpoint
+        library.borrowBook(book)
+        self.assertEqual(library.findAssetByLibID(lastLibID).getStatus(), LibraryAsset.AVAILABLE)
+        self.assertEqual(library.findBookByISBN("978-0261102385").getStatusCounts(), [0, 5, 0, 0])
+        library.checkpoint()
+        library = self.reopen(library)
+        self.assertEqual(library.findBookByISBN("978-0441172719").getStatusCounts(), [0, 598, 2, 0])
+        self.assertEqual(library.findAssetByLibID(firstLibID).getStatus(), LibraryAsset.LOANED)
+        library._journal.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,83 @@
+"""
+Module that defines the regression tests of the circulation of books by many desks at the same time
+
+Author: Prof. Magdin Stoica
+E-Mail: magdin.stoica@sheridancollege.ca
+Version 1.0 (Python)
+"""
+from CirculationStressBenchmarkModule import CirculationStressBenchmark
+from LibraryModule import Library
+from LibraryAssetModule import LibraryAsset
+from ExceptionsModule import InvalidTransaction
+import sys
+import threading
+import unittest
+
+class CirculationStressTest(unittest.TestCase):
+    """
+    Tests that the per-book locks keep the copies of a book consistent when desk threads use it at the same time
+
+    Version 1.0 (Python)
+    """
+
+    def setUp(self):
+        """Switches between the desk threads often so that their operations interleave"""
+        self._switchInterval = sys.getswitchinterval()
+        sys.setswitchinterval(1e-6)
+
+    def tearDown(self):
+        """Restores the thread switch interval"""
+        sys.setswitchinterval(self._switchInterval)
+
+    def testDesksNeverShareACopy(self):
+        """Desks borrowing, returning and reserving the same few books never get the same copy"""
+        benchmark = CirculationStressBenchmark(bookCount = 2, copiesPerBook = 5, operationsPerDesk = 2000)
+        for deskCount in (1, 4):
+            (throughput, doubleLoanCount, isConsistent) = benchmark.runDesks(deskCount)
+            self.assertEqual(doubleLoanCount, 0)
+            self.assertTrue(isConsistent)
+
+    def testDesksBorrowingTheLastCopies(self):
+        """Desks racing for the copies of one book get each copy once and the counts of the book stay exact"""
+        library = Library()
+        book = library.findBookByISBN("978-0261102385")
+        startBarrier = threading.Barrier(4)
+        borrowedIDs = []
+
+        def desk():
+            startBarrier.wait()
+            for iAttempt in range(3):
+                try:
+                    borrowedIDs.append(library.borrowBook(book).getLibID())
+                except InvalidTransaction:
+                    #all the copies of the book are out
+                    pass
+
+        desks = [threading.Thread(target = desk) for iDesk in range(4)]
+        for deskThread in desks:
+            deskThread.start()
+        for deskThread in desks:
+            deskThread.join()
+
+        self.assertEqual(sorted(borrowedIDs), sorted(libAsset.getLibID() for libAsset in book.getAssets()))
+        self.assertEqual(book.getStatusCounts(), [0, 0, book.getAssetCount(), 0])
+        self.assertEqual(library.checkStatusCounts(), [])
+
+    def testLockedBookDoesNotBlockOtherBooks(self):
+        """A desk working on one book does not wait for a desk that holds the lock of another book"""
+        library = Library()
+        paperBook = library.findBookByISBN("978-0261102385")
+        digitalBook = library.findBookByISBN("978-1408898659")
+        borrowedAssets = []
+        with paperBook.getLock():
+            deskThread = threading.Thread(target = lambda: borrowedAssets.append(library.borrowBook(digitalBook)))
+            deskThread.start()
+            deskThread.join(5)
+            self.assertFalse(deskThread.is_alive())
+
+        self.assertEqual(borrowedAssets[0].getStatus(), LibraryAsset.LOANED)
+        self.assertEqual(paperBook.getStatusCounts(), [0, 5, 0, 0])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,86 @@
+"""
+Module that defines the regression tests of the DueDateIndex class and of the due date queries of the library
+
+Author: Prof. Magdin Stoica
+E-Mail: magdin.stoica@sheridancollege.ca
+Version 1.0 (Python)
+"""
+from DueDateIndexModule import DueDateIndex
+from LibraryModule import Library
+from LibraryClockModule import SimulatedClock
+from PaperBookModule import PaperBook
+from datetime import date, timedelta
+import unittest
+
+class DueDateIndexTest(unittest.TestCase):
+    """
+    Tests the range and top-N queries of the due date index and of the library on a simulated calendar
+
+    Version 1.0 (Python)
+    """
+
+    def setUp(self):
+        """Creates a library with the default books whose clock starts on the first day of 2026"""
+        self._clock = SimulatedClock(date(2026, 1, 1))
+        self._library = Library(clock = self._clock)
+        self._book = self._library.findBookByISBN("978-0261102385")
+
+    def testRangeAndTopQueries(self):
+        """Entries are found in order of due date then library ID, across many buckets"""
+        dueDateIndex = DueDateIndex()
+        firstDate = date(2026, 1, 1)
+        for libID in range(3 * DueDateIndex.BUCKET_SIZE, 0, -1):
+            dueDateIndex.add(firstDate + timedelta(days = libID % 10), libID)
+        dueDateIndex.add(firstDate + timedelta(days = 1), 1)
+
+        self.assertEqual(dueDateIndex.getLength(), 3 * DueDateIndex.BUCKET_SIZE)
+        entries = dueDateIndex.findRange()
+        self.assertEqual(entries, sorted(entries))
+
+        #the assets due on the same day are all in the range and in order of library ID
+        dueOnThird = dueDateIndex.findRange(firstDate + timedelta(days = 2), firstDate + timedelta(days = 2))
+        self.assertEqual([libID for (dueDate, libID) in dueOnThird], list(range(2, 3 * DueDateIndex.BUCKET_SIZE, 10)))
+        self.assertEqual(dueDateIndex.findRange(limit = 3), [(firstDate, 10), (firstDate, 20), (firstDate, 30)])
+        self.assertEqual(dueDateIndex.findRange(firstDate + timedelta(days = 9), limit = 2),
+                         [(firstDate + timedelta(days = 9), 9), (firstDate + timedelta(days = 9), 19)])
+        self.assertEqual(dueDateIndex.findRange(firstDate + timedelta(days = 10)), [])
+        self.assertEqual(dueDateIndex.findRange(limit = 0), [])
+
+    def testChangesBeforeAQueryAreCombined(self):
+        """An entry added and removed between two queries leaves no entry and a moved entry is found once"""
+        dueDateIndex = DueDateIndex.fromSortedEntries([(date(2026, 1, 5), 1), (date(2026, 1, 6), 2)])
+        dueDateIndex.add(date(2026, 1, 7), 3)
+        dueDateIndex.remove(date(2026, 1, 7), 3)
+        dueDateIndex.update(1, date(2026, 1, 5), date(2026, 1, 8))
+        dueDateIndex.update(1, date(2026, 1, 8), date(2026, 1, 9))
+        dueDateIndex.remove(date(2026, 1, 4), 2)
+        self.assertEqual(dueDateIndex.findRange(), [(date(2026, 1, 6), 2), (date(2026, 1, 9), 1)])
+
+    def testReturnsAndRenewals(self):
+        """Returned copies leave the index and renewed copies move to their new due date"""
+        libIDs = [self._library.borrowBook(self._book).getLibID() for iCopy in range(3)]
+        self._clock.advance(1)
+        laterLibID = self._library.borrowBook(self._book).getLibID()
+        dueDate = self._clock.today() - timedelta(days = 1) + timedelta(days = PaperBook.MAX_BORROW_DAYS)
+
+        #the copies borrowed the same day are due the same day and come first
+        self.assertEqual([libAsset.getLibID() for libAsset in self._library.findAssetsDue(limit = 2)], sorted(libIDs)[:2])
+        self.assertEqual(sorted(libAsset.getLibID() for libAsset in self._library.findAssetsDue(dueDate, dueDate)), sorted(libIDs))
+
+        self._library.returnAsset(libIDs[0])
+        renewedAsset = self._library.findAssetByLibID(libIDs[1])
+        with self._book.getLock():
+            renewedAsset.setDueDate(dueDate + timedelta(days = PaperBook.MAX_BORROW_DAYS))
+
+        self.assertEqual([libAsset.getLibID() for libAsset in self._library.findAssetsDue()], [libIDs[2], laterLibID, libIDs[1]])
+        self.assertEqual([libAsset.getLibID() for libAsset in self._library.findAssetsDue(dueDate + timedelta(days = 1))],
+                         [laterLibID, libIDs[1]])
+
+        #a day after the first due date only the copy that was neither returned nor renewed is overdue
+        self._clock.advance(PaperBook.MAX_BORROW_DAYS)
+        self.assertEqual([libAsset.getLibID() for libAsset in self._library.findOverdueAssets()], [libIDs[2]])
+        self.assertEqual(self._library._dueDateIndex.getLength(), 3)
+
+
+if __name__ == "__main__":
+    unittest.main()
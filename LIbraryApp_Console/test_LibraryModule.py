@@ -0,0 +1,75 @@
+"""
+Module that defines the regression tests of the Library class
+
+Author: Prof. Magdin Stoica
+E-Mail: magdin.stoica@sheridancollege.ca
+Version 1.0 (Python)
+"""
+from LibraryModule import Library
+from LibraryAssetModule import LibraryAsset
+from LibraryClockModule import SimulatedClock
+from PaperBookModule import PaperBook
+from datetime import date, timedelta
+import unittest
+
+class LibraryTest(unittest.TestCase):
+    """
+    Tests the batches of circulation commands of a library on a simulated calendar
+
+    Version 1.0 (Python)
+    """
+
+    def setUp(self):
+        """Creates a library with the default books whose clock starts on the first day of 2026"""
+        self._clock = SimulatedClock(date(2026, 1, 1))
+        self._library = Library(clock = self._clock)
+        self._paperISBN = "978-0261102385"
+        self._digitalISBN = "978-1408898659"
+
+    def testInvalidCommandDoesNotStopTheChunk(self):
+        """Each invalid command of a chunk gets an error result and the other commands of the chunk are performed"""
+        paperBook = self._library.findBookByISBN(self._paperISBN)
+        firstLibID = self._library.borrowBook(paperBook).getLibID()
+        for iCopy in range(3):
+            self._library.borrowBook(paperBook)
+        self._clock.advance(PaperBook.MAX_BORROW_DAYS + 2)
+
+        #the second borrow finds no copy left, the return makes one available to the last borrow
+        commands = [(Library.TRANSACTION_BORROW, self._paperISBN),
+                    (Library.TRANSACTION_BORROW, self._paperISBN),
+                    (Library.TRANSACTION_BORROW, "978-0000000000"),
+                    ("renew", self._paperISBN),
+                    (Library.TRANSACTION_RETURN, 999999),
+                    (Library.TRANSACTION_RETURN, firstLibID),
+                    (Library.TRANSACTION_BORROW, self._paperISBN)]
+        results = list(self._library.processTransactions(commands))
+
+        self.assertEqual([result.getCommand() for result in results], commands)
+        self.assertEqual([result.isSuccessful() for result in results], [True, False, False, False, False, True, True])
+        for result in results[1:5]:
+            self.assertNotEqual(result.getError(), None)
+
+        #the commands around the failed ones were performed and are still in effect
+        for result in (results[0], results[6]):
+            libAsset = self._library.findAssetByLibID(result.getLibID())
+            self.assertEqual(libAsset.getStatus(), LibraryAsset.LOANED)
+            self.assertEqual(result.getDueDate(), self._clock.today() + timedelta(days = PaperBook.MAX_BORROW_DAYS))
+        self.assertEqual((results[5].getLibID(), results[5].getDaysLate(), results[5].getLateFees()),
+                         (firstLibID, 2, 2 * PaperBook.LATE_PENALTY_PER_DAY))
+        self.assertEqual(results[6].getLibID(), firstLibID)
+        self.assertEqual(self._library.getStatusCounts(), [0, 5, 5, 0])
+        self.assertEqual(self._library.checkStatusCounts(), [])
+
+    def testCommandsAfterAFailedChunkArePerformed(self):
+        """A chunk with only failed commands does not stop the following chunks"""
+        commands = [(Library.TRANSACTION_BORROW, self._paperISBN)] * 7 + [(Library.TRANSACTION_BORROW, self._digitalISBN)]
+        results = list(self._library.processTransactions(commands, chunkSize = 2))
+
+        #the paper book has 5 copies so the sixth and seventh borrows fail together in the fourth chunk
+        self.assertEqual([result.isSuccessful() for result in results], [True] * 5 + [False, False, True])
+        self.assertEqual(len({result.getLibID() for result in results if result.isSuccessful()}), 6)
+        self.assertEqual(self._library.findBookByISBN(self._digitalISBN).getStatusCount(LibraryAsset.LOANED), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,54 @@
+"""
+Module that defines the regression tests of the OverdueReport class
+
+Author: Prof. Magdin Stoica
+E-Mail: magdin.stoica@sheridancollege.ca
+Version 1.0 (Python)
+"""
+from OverdueReportModule import OverdueReport
+from LibraryModule import Library
+from LibraryClockModule import SimulatedClock
+from PaperBookModule import PaperBook
+from datetime import date, timedelta
+import unittest
+
+class OverdueReportTest(unittest.TestCase):
+    """
+    Tests the overdue report of a library on a simulated calendar
+
+    Version 1.0 (Python)
+    """
+
+    def setUp(self):
+        """Creates a library with the default books whose clock starts on the first day of 2026"""
+        self._clock = SimulatedClock(date(2026, 1, 1))
+        self._library = Library(clock = self._clock)
+        self._book = self._library.findBookByISBN("978-0261102385")
+
+    def testReportDateIsTheLibraryClock(self):
+        """A report calculated without a report date uses the date of the library clock"""
+        libIDs = [self._library.borrowBook(self._book).getLibID() for iCopy in range(2)]
+        self._clock.advance(PaperBook.MAX_BORROW_DAYS + 3)
+
+        for report in (OverdueReport(self._library), self._library.getOverdueReport()):
+            self.assertEqual(report.getReportDate(), date(2026, 1, 1) + timedelta(days = PaperBook.MAX_BORROW_DAYS + 3))
+            self.assertEqual(report.getAssetCount(), 10)
+            self.assertEqual(sorted(libID for (libID, book, daysLate, lateFees) in report.getOverdueAssets(3)), sorted(libIDs))
+            self.assertEqual(report.getTotalLateFees(), 2 * 3 * PaperBook.LATE_PENALTY_PER_DAY)
+            self.assertEqual(report.getLateFeesByBook(), [(self._book, 2, 2 * 3 * PaperBook.LATE_PENALTY_PER_DAY)])
+
+    def testReportReadsTheStateWhenTheSnapshotWasOpened(self):
+        """A copy returned after the read snapshot was opened is still overdue in the report of the snapshot"""
+        libID = self._library.borrowBook(self._book).getLibID()
+        self._clock.advance(PaperBook.MAX_BORROW_DAYS + 1)
+
+        with self._library.readSnapshot() as readSnapshot:
+            self._library.returnAsset(libID)
+            self._library.borrowBook(self._book)
+            report = OverdueReport(self._library, date(2026, 12, 31), readSnapshot)
+        self.assertEqual([libID for (libID, book, daysLate, lateFees) in report.getOverdueAssets()], [libID])
+        self.assertEqual(OverdueReport(self._library).getOverdueCount(), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,92 @@
+"""
+Module that defines the regression tests of the ReadSnapshot class
+
+Author: Prof. Magdin Stoica
+E-Mail: magdin.stoica@sheridancollege.ca
+Version 1.0 (Python)
+"""
+from LibraryModule import Library
+from LibraryAssetModule import LibraryAsset
+from LibraryClockModule import SimulatedClock
+from CatalogueSnapshotModule import CatalogueSnapshot
+from PaperBookModule import PaperBook
+from datetime import date
+import os
+import tempfile
+import unittest
+
+class ReadSnapshotTest(unittest.TestCase):
+    """
+    Tests the read snapshots of a library opened from a catalogue snapshot on a simulated calendar
+
+    Version 1.0 (Python)
+    """
+
+    def setUp(self):
+        """Saves a catalogue of a few books with one overdue copy and opens a library from it"""
+        self._directory = tempfile.TemporaryDirectory()
+        self._clock = SimulatedClock(date(2026, 1, 1))
+        library = Library(clock = self._clock)
+        for iBook in range(3):
+            library.registerBook(f"Book {iBook}", f"978000000000{iBook}", ["Ann Author"], Library.BOOK_TYPE_PAPER, 2)
+        self._overdueLibID = library.borrowBook(library.findBookByISBN("978-0261102385")).getLibID()
+        self._clock.advance(PaperBook.MAX_BORROW_DAYS + 2)
+
+        snapshotPath = os.path.join(self._directory.name, "catalogue.snap")
+        library.saveSnapshot(snapshotPath)
+        self._snapshot = CatalogueSnapshot(snapshotPath)
+        self._library = Library(snapshot = self._snapshot, clock = self._clock)
+
+    def tearDown(self):
+        """Closes the catalogue snapshot and removes its file"""
+        self._library = None
+        self._snapshot.close()
+        self._directory.cleanup()
+
+    def testReportLeavesUnloadedBooksUnloaded(self):
+        """A read snapshot and the overdue report only load the book of the overdue copy"""
+        with self._library.readSnapshot() as readSnapshot:
+            self.assertEqual(self._library._snapshotBooksLoaded, {})
+            self.assertEqual(readSnapshot.getBooks(), [])
+            self.assertEqual(len(readSnapshot.getUnloadedBookIndexes()), 5)
+
+            #the copies of the books that are not loaded are read from the catalogue snapshot
+            statusCounts = [0] * LibraryAsset.STATUS_COUNT
+            for bookIndex in readSnapshot.getUnloadedBookIndexes():
+                for (status, count) in enumerate(readSnapshot.countUnloadedAssetStatuses(bookIndex)):
+                    statusCounts[status] += count
+            self.assertEqual(statusCounts, self._library.getStatusCounts())
+
+        report = self._library.getOverdueReport()
+        self.assertEqual([libID for (libID, book, daysLate, lateFees) in report.getOverdueAssets()], [self._overdueLibID])
+        self.assertEqual([book.getISBN() for book in self._library._snapshotBooksLoaded.values()], ["978-0261102385"])
+        self.assertEqual(self._library.checkStatusCounts(), [])
+        self.assertEqual(len(self._library._snapshotBooksLoaded), 1)
+
+    def testSnapshotIsIsolatedFromLoans(self):
+        """Copies borrowed, returned and added after the snapshot was opened keep the state they had when it was opened"""
+        book = self._library.findBookByISBN("978-0261102385")
+        with self._library.readSnapshot() as readSnapshot:
+            statusCounts = readSnapshot.getStatusCounts()
+            borrowedLibID = self._library.borrowBook(book).getLibID()
+            self._library.returnAsset(self._overdueLibID)
+            addedLibID = self._library.registerBook("Dune", "978-0441172719", ["Frank Herbert"],
+                                                    Library.BOOK_TYPE_PAPER, 1).getAssets()[0].getLibID()
+
+            assetStates = {libID: status for (libID, status, borrowedOn, returnedOn, dueDate) in readSnapshot.getAssetStates(book)}
+            self.assertEqual(assetStates[borrowedLibID], LibraryAsset.AVAILABLE)
+            self.assertEqual(assetStates[self._overdueLibID], LibraryAsset.LOANED)
+            self.assertEqual(readSnapshot.countAssetStatuses(book), book.getStatusCounts())
+            self.assertEqual(readSnapshot.getStatusCounts(), statusCounts)
+            self.assertNotIn(addedLibID, [libID for (libID, status, borrowedOn, returnedOn, dueDate)
+                                          in readSnapshot.getAssetStates(self._library.findBookByISBN("978-0441172719"))])
+            self.assertEqual(readSnapshot.getSavedStateCount(), 2)
+
+        #the assets no longer save their state once the snapshot is closed
+        self._library.returnAsset(borrowedLibID)
+        self.assertEqual(readSnapshot.getSavedStateCount(), 2)
+        self.assertEqual(self._library._readSnapshots, ())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,100 @@
+"""
+Module that defines the regression tests of the SQLiteLibraryStorage class
+
+Author: Prof. Magdin Stoica
+E-Mail: magdin.stoica@sheridancollege.ca
+Version 1.0 (Python)
+"""
+from SQLiteStorageModule import SQLiteLibraryStorage
+from LibraryModule import Library
+from LibraryAssetModule import LibraryAsset
+from PaperBookModule import PaperBook
+from CatalogueImportModule import CatalogueImporter
+from ExceptionsModule import DuplicateBook
+import os
+import tempfile
+import unittest
+
+class SQLiteLibraryStorageTest(unittest.TestCase):
+    """
+    Tests libraries that are saved to a database and opened again
+
+    Version 1.0 (Python)
+    """
+
+    def setUp(self):
+        """Creates an empty database file for each test"""
+        self._directory = tempfile.TemporaryDirectory()
+        self._dbPath = os.path.join(self._directory.name, "library.db")
+        self._storages = []
+
+    def tearDown(self):
+        """Closes the storages and removes the database file"""
+        for storage in self._storages:
+            storage.close()
+        self._directory.cleanup()
+
+    def openLibrary(self):
+        """Opens the library saved in the database like a program that starts"""
+        storage = SQLiteLibraryStorage(self._dbPath)
+        self._storages.append(storage)
+        return Library(storage = storage)
+
+    def testHoldsSurviveRestart(self):
+        """The copy set aside for a holder is still kept for them after a restart and can be borrowed or released"""
+        library = self.openLibrary()
+        book = library.findBookByISBN("978-0261102385")
+        libIDs = [library.borrowBook(book).getLibID() for iCopy in range(book.getAssetCount())]
+        library.reserveBook(book, "alice")
+        library.returnBook(book, libIDs[0])
+
+        library = self.openLibrary()
+        book = library.findBookByISBN("978-0261102385")
+        self.assertEqual(book.getStatusCounts(), [0, 0, 4, 1])
+        self.assertEqual(book.getHoldPosition("alice"), 0)
+        library.cancelHold(book, "alice")
+        self.assertEqual(library.findAssetByLibID(libIDs[0]).getStatus(), LibraryAsset.AVAILABLE)
+
+        library = self.openLibrary()
+        book = library.findBookByISBN("978-0261102385")
+        library.reserveBook(book, "bob")
+        library = self.openLibrary()
+        book = library.findBookByISBN("978-0261102385")
+        self.assertEqual(library.borrowBook(book, "bob").getLibID(), libIDs[0])
+
+    def testBooksRegisteredByAnotherProcessAreVisible(self):
+        """A book registered by another process sharing the database is found, listed and cannot be registered again"""
+        (library, otherLibrary) = (self.openLibrary(), self.openLibrary())
+        otherLibrary.registerBook("Dune", "978-0441172719", ["Frank Herbert"], Library.BOOK_TYPE_PAPER, 2)
+
+        self.assertEqual(library.findBookByName("dune").getISBN(), "978-0441172719")
+        self.assertRaises(DuplicateBook, library.registerBook, "Dune", "9780441172719", ["Frank Herbert"],
+                          Library.BOOK_TYPE_PAPER, 1)
+
+        otherLibrary.registerBook("Emma", "978-0141439587", ["Jane Austen"], Library.BOOK_TYPE_PAPER, 1)
+        self.assertEqual([book.getName() for book in library.searchBooks("emma")], ["Emma"])
+        self.assertEqual(len(library.getBooks()), 4)
+
+        #a copy borrowed in the other process is returned with only its library ID
+        book = otherLibrary.registerBook("Ulysses", "978-0199535675", ["James Joyce"], Library.BOOK_TYPE_PAPER, 1)
+        libID = otherLibrary.borrowBook(book).getLibID()
+        (returnedBook, loanDuration, daysLate, lateFees) = library.returnAsset(libID)
+        self.assertEqual(returnedBook.getName(), "Ulysses")
+        self.assertEqual(library.findAssetByLibID(libID).getStatus(), LibraryAsset.AVAILABLE)
+
+    def testDuplicateFromAnotherProcessIsRejectedByImport(self):
+        """A book registered by another process after it was looked up is rejected without stopping the import"""
+        (library, otherLibrary) = (self.openLibrary(), self.openLibrary())
+        self.assertEqual(library.findBookByISBN("978-0441172719"), None)
+        otherLibrary.registerBook("Dune", "978-0441172719", ["Frank Herbert"], Library.BOOK_TYPE_PAPER, 2)
+
+        self.assertRaises(DuplicateBook, self._storages[0].saveBook, PaperBook("Dune", "978-0441172719"))
+        importer = CatalogueImporter(library)
+        importer.importRecords([{"name": "Dune", "isbn": "978-0441172719", "authors": ["Frank Herbert"], "type": "paper", "copies": 1},
+                                {"name": "Emma", "isbn": "978-0141439587", "authors": ["Jane Austen"], "type": "paper", "copies": 1}])
+        self.assertEqual(library.findBookByISBN("978-0141439587").getName(), "Emma")
+        self.assertEqual(otherLibrary.findBookByISBN("978-0141439587").getAssetCount(), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
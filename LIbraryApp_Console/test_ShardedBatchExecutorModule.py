@@ -0,0 +1,101 @@
+"""
+Module that defines the regression tests of the ShardedBatchExecutor class and of its batch jobs
+
+Author: Prof. Magdin Stoica
+E-Mail: magdin.stoica@sheridancollege.ca
+Version 1.0 (Python)
+"""
+from ShardedBatchExecutorModule import (ShardedBatchExecutor, OverdueScanJob, LateFeeTotalsJob, InventoryAuditJob,
+                                        DueDateReindexJob)
+from LibraryModule import Library
+from LibraryAssetModule import LibraryAsset
+from LibraryClockModule import SimulatedClock
+from PaperBookModule import PaperBook
+from datetime import date, timedelta
+import unittest
+
+class ShardedBatchExecutorTest(unittest.TestCase):
+    """
+    Tests that the batch jobs run on the shards of a library agree with the reports and counters of the library,
+    on a simulated calendar
+
+    Version 1.0 (Python)
+    """
+
+    def setUp(self):
+        """Creates a library with copies on loan, late, returned late and set aside with the dates of a late loan"""
+        self._clock = SimulatedClock(date(2026, 1, 1))
+        self._library = Library(clock = self._clock)
+        books = [self._library.findBookByISBN("978-0261102385"), self._library.findBookByISBN("978-1408898659")]
+        for iBook in range(6):
+            books.append(self._library.registerBook(f"Book {iBook}", f"978000000000{iBook}", ["Ann Author"],
+                                                    Library.BOOK_TYPE_PAPER if iBook % 2 == 0 else Library.BOOK_TYPE_DIGITAL, 4))
+
+        #the copies are borrowed on different days so they are late by different numbers of days
+        for (iBook, book) in enumerate(books):
+            for iCopy in range(iBook % 3 + 1):
+                self._library.borrowBook(book)
+            self._clock.advance(1)
+        self._clock.advance(PaperBook.MAX_BORROW_DAYS)
+
+        #a copy returned late is available and a reserved copy keeps the dates of its late loan, neither is overdue
+        returnedAsset = [libAsset for libAsset in books[2].getAssets() if libAsset.getStatus() == LibraryAsset.LOANED][0]
+        self._library.returnAsset(returnedAsset.getLibID())
+        self._reservedAsset = [libAsset for libAsset in books[4].getAssets() if libAsset.getStatus() == LibraryAsset.LOANED][0]
+        with books[4].getLock():
+            self._reservedAsset.restoreState(LibraryAsset.RESERVED, self._reservedAsset.getBorrowedOn(), None,
+                                             self._reservedAsset.getDueDate())
+        self._clock.advance(5)
+
+    def testJobsAgreeWithTheLibrary(self):
+        """The overdue scan, the late fee totals, the audit and the reindex match the report, counters and index of the library"""
+        executor = ShardedBatchExecutor(workerCount = 1, shardCount = 3)
+        jobs = [OverdueScanJob(self._clock.today()), LateFeeTotalsJob(self._clock.today()), InventoryAuditJob(),
+                DueDateReindexJob()]
+        (overdueAssets, feeTotals, (recount, discrepancies), dueDateIndex) = executor.run(self._library, jobs)
+
+        #only the copies on loan are overdue, the latest first
+        report = self._library.getOverdueReport()
+        self.assertEqual(sorted(overdueAssets), sorted((libID, book.getISBN(), daysLate, lateFees)
+                                                       for (libID, book, daysLate, lateFees) in report.getOverdueAssets()))
+        self.assertEqual([daysLate for (libID, isbn, daysLate, lateFees) in overdueAssets],
+                         sorted((daysLate for (libID, isbn, daysLate, lateFees) in overdueAssets), reverse = True))
+        self.assertLess(self._reservedAsset.getDueDate(), self._clock.today())
+        self.assertNotIn(self._reservedAsset.getLibID(), [libID for (libID, isbn, daysLate, lateFees) in overdueAssets])
+        self.assertEqual(len(overdueAssets), report.getOverdueCount())
+
+        self.assertEqual(feeTotals, {book.getISBN(): (overdueCount, lateFees)
+                                     for (book, overdueCount, lateFees) in report.getLateFeesByBook() if overdueCount > 0})
+        self.assertEqual(sum(overdueCount for (overdueCount, lateFees) in feeTotals.values()), len(overdueAssets))
+
+        self.assertEqual(recount, self._library.getStatusCounts())
+        self.assertEqual(recount[LibraryAsset.RESERVED], 1)
+        self.assertEqual(discrepancies, [])
+        self.assertEqual(dueDateIndex.findRange(), self._library.findDueDateEntries())
+
+    def testAuditFindsWrongCounters(self):
+        """A book whose status counters do not match its copies is reported with its counters and its recount"""
+        executor = ShardedBatchExecutor(workerCount = 1, shardCount = 1)
+        (shard,) = executor.partitionBooks(self._library)
+        statusCounts = shard.getStatusCounts(0)
+        shard._statusCounts[LibraryAsset.AVAILABLE] += 1
+
+        ((recount, discrepancies),) = executor.runShards([shard], [InventoryAuditJob()])
+        self.assertEqual(recount, self._library.getStatusCounts())
+        wrongCounts = list(statusCounts)
+        wrongCounts[LibraryAsset.AVAILABLE] += 1
+        self.assertEqual(discrepancies, [(shard.getISBN(0), wrongCounts, statusCounts)])
+
+    def testWorkerProcessesGiveTheSameResults(self):
+        """The jobs give the same results in worker processes as in the calling process"""
+        jobs = [OverdueScanJob(self._clock.today() - timedelta(days = 2), minDaysLate = 3), InventoryAuditJob()]
+        executor = ShardedBatchExecutor(workerCount = 2)
+        try:
+            results = executor.run(self._library, jobs)
+        finally:
+            executor.close()
+        self.assertEqual(results, ShardedBatchExecutor(workerCount = 1, shardCount = executor.getShardCount()).run(self._library, jobs))
+
+
+if __name__ == "__main__":
+    unittest.main()